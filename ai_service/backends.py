@@ -0,0 +1,319 @@
+"""
+Inference backends
+
+The PyTorch checkpoint (best.pt) is the source of truth. For CPU nodes it
+can be exported once to ONNX Runtime or OpenVINO, optionally quantized to
+INT8 with a few calibration images, and checked against the PyTorch
+baseline before it is used. Exports are cached next to the checkpoint and
+rebuilt when the checkpoint changes.
+
+Every backend has the same interface:
+    backend.names                          -> {class id: class name}
+    backend.predict(images, conf, iou)     -> [(boxes, scores, classes), ...]
+
+Configuration (environment):
+    INFERENCE_BACKEND   torch | onnx | openvino | auto   (default torch)
+    INFERENCE_INT8      1 to quantize the exported model  (default 0)
+    CALIBRATION_DIR     images for INT8 calibration and the parity check
+    PARITY_CHECK        1 to compare against PyTorch at startup (default 1)
+    PARITY_MIN_AGREEMENT  fall back to torch below this match rate (default 0.9)
+"""
+import os
+import shutil
+import time
+
+import numpy as np
+from PIL import Image
+
+BACKENDS = ("torch", "onnx", "openvino")
+IMAGE_SIZE = 640
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+class BackendError(Exception):
+    pass
+
+
+def import_runtime():
+    """Import ultralytics (and with it torch) - the slow part of booting, deferred until after the server is up"""
+    import ultralytics  # noqa: F401
+
+
+class UltralyticsBackend:
+    """A YOLO model in any format ultralytics can run (.pt, .onnx, *_openvino_model/)"""
+
+    def __init__(self, path, kind):
+        from ultralytics import YOLO
+
+        self.path = path
+        self.kind = kind
+        self.model = YOLO(path, task="detect")
+        self.names = self.model.names
+
+    def predict(self, images, conf=0.25, iou=0.45):
+        results = self.model.predict(source=images, conf=conf, iou=iou, imgsz=IMAGE_SIZE, verbose=False)
+        return [
+            (
+                result.boxes.xyxy.cpu().numpy(),
+                result.boxes.conf.cpu().numpy(),
+                result.boxes.cls.cpu().numpy().astype(np.int64),
+            )
+            for result in results
+        ]
+
+    def __repr__(self):
+        return f"<{self.kind} backend {self.path}>"
+
+
+# ============================================
+# Export and quantization
+# ============================================
+
+def _is_fresh(target, source):
+    return os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(source)
+
+
+def letterbox(image, size=IMAGE_SIZE):
+    """Resize keeping aspect ratio and pad to size x size - the model's input layout (1, 3, H, W), 0-1 floats"""
+    scale = size / max(image.width, image.height)
+    resized = image.convert("RGB").resize((round(image.width * scale), round(image.height * scale)), Image.BILINEAR)
+    canvas = Image.new("RGB", (size, size), (114, 114, 114))
+    canvas.paste(resized, ((size - resized.width) // 2, (size - resized.height) // 2))
+    return (np.asarray(canvas, dtype=np.float32) / 255.0).transpose(2, 0, 1)[None]
+
+
+def load_sample_images(directory, limit=64):
+    """
+    RGB images from a directory
+
+    Real field images are required: calibrating INT8 ranges or checking
+    parity on synthetic noise says nothing about accuracy on crops.
+    """
+    paths = []
+    if directory and os.path.isdir(directory):
+        paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )[:limit]
+    if not paths:
+        raise BackendError(f"No sample images in {directory}/ - needed for INT8 calibration and the parity check")
+    return [Image.open(path).convert("RGB") for path in paths]
+
+
+def export_onnx(checkpoint):
+    """best.pt -> best.onnx (dynamic batch), reused while newer than the checkpoint"""
+    target = os.path.splitext(checkpoint)[0] + ".onnx"
+    if not _is_fresh(target, checkpoint):
+        from ultralytics import YOLO
+        exported = YOLO(checkpoint).export(format="onnx", imgsz=IMAGE_SIZE, dynamic=True, simplify=True)
+        if os.path.abspath(exported) != os.path.abspath(target):
+            shutil.move(exported, target)
+    return target
+
+
+def quantize_onnx(onnx_path, calibration_images):
+    """Static INT8 quantization (QDQ, per-channel weights) calibrated on sample images"""
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+
+    target = onnx_path.replace(".onnx", "_int8.onnx")
+    if _is_fresh(target, onnx_path):
+        return target
+
+    input_name = onnx.load(onnx_path, load_external_data=False).graph.input[0].name
+
+    class Reader(CalibrationDataReader):
+        def __init__(self):
+            self.samples = iter(calibration_images)
+
+        def get_next(self):
+            image = next(self.samples, None)
+            return None if image is None else {input_name: letterbox(image)}
+
+    quantize_static(
+        onnx_path, target, Reader(),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        weight_type=QuantType.QInt8,
+        activation_type=QuantType.QUInt8,
+    )
+
+    # Keep the class names and task ultralytics reads from the model metadata
+    source, quantized = onnx.load(onnx_path), onnx.load(target)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(source.metadata_props)
+    onnx.save(quantized, target)
+    return target
+
+
+def export_openvino(checkpoint):
+    """best.pt -> best_openvino_model/ (dynamic batch)"""
+    target = os.path.splitext(checkpoint)[0] + "_openvino_model"
+    if not _is_fresh(target, checkpoint):
+        from ultralytics import YOLO
+        exported = YOLO(checkpoint).export(format="openvino", imgsz=IMAGE_SIZE, dynamic=True)
+        if os.path.abspath(exported) != os.path.abspath(target):
+            shutil.rmtree(target, ignore_errors=True)
+            shutil.move(exported, target)
+    return target
+
+
+def quantize_openvino(model_dir, calibration_images):
+    """Post-training INT8 quantization with NNCF calibrated on sample images"""
+    import nncf
+    import openvino as ov
+
+    target = model_dir.replace("_openvino_model", "_int8_openvino_model")
+    if _is_fresh(target, model_dir):
+        return target
+
+    xml = next(name for name in os.listdir(model_dir) if name.endswith(".xml"))
+    model = ov.Core().read_model(os.path.join(model_dir, xml))
+    quantized = nncf.quantize(
+        model,
+        nncf.Dataset([letterbox(image) for image in calibration_images]),
+        preset=nncf.QuantizationPreset.MIXED,
+        subset_size=len(calibration_images),
+    )
+
+    os.makedirs(target, exist_ok=True)
+    ov.save_model(quantized, os.path.join(target, xml))
+    metadata = os.path.join(model_dir, "metadata.yaml")
+    if os.path.exists(metadata):
+        shutil.copy(metadata, target)
+    return target
+
+
+# ============================================
+# Parity check
+# ============================================
+
+def _iou(box, boxes):
+    width = np.clip(np.minimum(box[2], boxes[:, 2]) - np.maximum(box[0], boxes[:, 0]), 0, None)
+    height = np.clip(np.minimum(box[3], boxes[:, 3]) - np.maximum(box[1], boxes[:, 1]), 0, None)
+    inter = width * height
+    union = (box[2] - box[0]) * (box[3] - box[1]) + (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1]) - inter
+    return inter / np.maximum(union, 1e-9)
+
+
+def parity_check(baseline, candidate, images, iou_threshold=0.5):
+    """
+    Compare a candidate backend's detections with the PyTorch baseline
+
+    A baseline box is matched by a candidate box of the same class with
+    IoU >= iou_threshold (each candidate box used once).
+
+    Returns:
+        dict: {"images", "baseline_boxes", "candidate_boxes", "matched",
+               "agreement", "max_score_delta", "speedup"}
+    """
+    arrays = [np.asarray(image) for image in images]
+    started = time.perf_counter()
+    expected = baseline.predict(arrays)
+    baseline_time = time.perf_counter() - started
+    started = time.perf_counter()
+    actual = candidate.predict(arrays)
+    candidate_time = time.perf_counter() - started
+
+    matched = total_expected = total_actual = 0
+    score_delta = 0.0
+    for (boxes, scores, classes), (c_boxes, c_scores, c_classes) in zip(expected, actual):
+        total_expected += len(boxes)
+        total_actual += len(c_boxes)
+        used = np.zeros(len(c_boxes), dtype=bool)
+        for box, score, cls in zip(boxes, scores, classes):
+            candidates = np.nonzero((c_classes == cls) & ~used)[0]
+            if not len(candidates):
+                continue
+            overlaps = _iou(box, c_boxes[candidates])
+            best = int(np.argmax(overlaps))
+            if overlaps[best] >= iou_threshold:
+                used[candidates[best]] = True
+                matched += 1
+                score_delta = max(score_delta, abs(float(score) - float(c_scores[candidates[best]])))
+
+    # No baseline detections means nothing was compared - that is not agreement
+    denominator = max(total_expected, total_actual)
+    return {
+        "images": len(images),
+        "baseline_boxes": total_expected,
+        "candidate_boxes": total_actual,
+        "matched": matched,
+        "agreement": matched / denominator if total_expected else 0.0,
+        "max_score_delta": round(score_delta, 4),
+        "speedup": round(baseline_time / candidate_time, 2) if candidate_time else None,
+    }
+
+
+# ============================================
+# Selection at startup
+# ============================================
+
+def build_backend(checkpoint, kind, int8=False, calibration_images=None):
+    """Export (and quantize) the checkpoint for one backend and load it"""
+    if kind == "torch":
+        return UltralyticsBackend(checkpoint, "torch")
+    if kind == "onnx":
+        path = export_onnx(checkpoint)
+        if int8:
+            path = quantize_onnx(path, calibration_images)
+        return UltralyticsBackend(path, "onnx-int8" if int8 else "onnx")
+    if kind == "openvino":
+        path = export_openvino(checkpoint)
+        if int8:
+            path = quantize_openvino(path, calibration_images)
+        return UltralyticsBackend(path, "openvino-int8" if int8 else "openvino")
+    raise BackendError(f"Unknown backend '{kind}' (use one of: {', '.join(BACKENDS)}, auto)")
+
+
+def load_backend(checkpoint, kind=None, int8=None, calibration_dir=None, parity=None, min_agreement=None, log=print):
+    """
+    Backend chosen by INFERENCE_BACKEND (or the arguments)
+
+    "auto" tries OpenVINO, then ONNX Runtime. Any export, quantization or
+    parity failure falls back to the PyTorch model, so the service always
+    starts with a working backend.
+
+    Returns:
+        tuple: (backend, report dict for /health)
+    """
+    kind = kind or os.getenv("INFERENCE_BACKEND", "torch")
+    int8 = int8 if int8 is not None else os.getenv("INFERENCE_INT8", "0") == "1"
+    calibration_dir = calibration_dir or os.getenv("CALIBRATION_DIR", "calibration")
+    parity = parity if parity is not None else os.getenv("PARITY_CHECK", "1") == "1"
+    min_agreement = min_agreement if min_agreement is not None else float(os.getenv("PARITY_MIN_AGREEMENT", "0.9"))
+
+    baseline = UltralyticsBackend(checkpoint, "torch")
+    report = {"requested": kind, "int8": int8, "backend": "torch", "parity": None}
+    if kind == "torch":
+        return baseline, report
+
+    samples = None
+    if int8 or parity:
+        try:
+            samples = load_sample_images(calibration_dir)
+        except BackendError as e:
+            log(f"⚠️ {e}")
+            log("⚠️ Falling back to the PyTorch backend")
+            return baseline, report
+
+    for candidate_kind in (("openvino", "onnx") if kind == "auto" else (kind,)):
+        try:
+            candidate = build_backend(checkpoint, candidate_kind, int8, samples)
+            if parity:
+                result = parity_check(baseline, candidate, samples)
+                report["parity"] = result
+                log(f"🔍 Parity {candidate.kind} vs torch: {result}")
+                if not result["baseline_boxes"]:
+                    log(f"⚠️ No detections on the samples - add images with visible disease to {calibration_dir}/")
+                    continue
+                if result["agreement"] < min_agreement:
+                    log(f"⚠️ {candidate.kind} agreement {result['agreement']:.2f} < {min_agreement} - not used")
+                    continue
+            report["backend"] = candidate.kind
+            return candidate, report
+        except Exception as e:
+            log(f"⚠️ {candidate_kind} backend unavailable: {e}")
+
+    log("⚠️ Falling back to the PyTorch backend")
+    return baseline, report
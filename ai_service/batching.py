@@ -0,0 +1,71 @@
+"""
+Per-model micro-batching
+
+Concurrent /detect requests for the same model are queued and run
+together: a worker per model takes the first waiting image, collects
+more for up to max_wait_ms (or until max_batch_size), and runs them in
+one forward pass in the thread pool. Different models run in parallel;
+each model runs one batch at a time.
+"""
+import asyncio
+
+from fastapi.concurrency import run_in_threadpool
+
+
+class MicroBatcher:
+    def __init__(self, max_batch_size=8, max_wait_ms=10, on_batch=None):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.on_batch = on_batch  # callable(model name, batch size), e.g. for metrics
+        self._queues = {}
+        self._workers = {}
+
+    def queue_depth(self):
+        return {name: queue.qsize() for name, queue in self._queues.items()}
+
+    async def predict(self, handle, image):
+        """(boxes, scores, classes) for one HxWx3 array, batched with concurrent requests for the same model"""
+        queue = self._queues.get(handle.name)
+        if queue is None:
+            queue = self._queues[handle.name] = asyncio.Queue()
+            self._workers[handle.name] = asyncio.create_task(self._work(queue))
+        future = asyncio.get_running_loop().create_future()
+        await queue.put((handle, image, future))
+        return await future
+
+    async def _work(self, queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            # A hot reload can swap versions mid-batch - never mix them in one pass
+            by_handle = {}
+            for item in batch:
+                by_handle.setdefault(id(item[0]), []).append(item)
+            for items in by_handle.values():
+                handle = items[0][0]
+                if self.on_batch:
+                    self.on_batch(handle.name, len(items))
+                try:
+                    outputs = await run_in_threadpool(handle.predict, [image for _, image, _ in items])
+                except Exception as e:
+                    for _, _, future in items:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                for (_, _, future), output in zip(items, outputs):
+                    if not future.done():
+                        future.set_result(output)
+
+    def stop(self):
+        for worker in self._workers.values():
+            worker.cancel()
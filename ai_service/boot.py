@@ -0,0 +1,69 @@
+"""
+Boot sequence: liveness vs readiness
+
+The web server starts answering as soon as the light modules are
+imported - /health/live is 200 from then on. The inference runtime
+(ultralytics/torch), the general model and its warmup run on a
+background thread; /health/ready turns 200 only once they are done, so
+an orchestrator sends traffic to a replica only when the first request
+will be fast. Each phase is timed and reported.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+PROCESS_STARTED = time.perf_counter()
+
+
+class BootSequence:
+    def __init__(self, log=print):
+        self.log = log
+        self.state = "starting"  # starting -> loading -> ready | failed
+        self.phase_name = None
+        self.phases = {}
+        self.error = None
+        self._thread = None
+
+    @contextmanager
+    def phase(self, name):
+        self.phase_name = name
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        self.phases[name] = round(seconds, 3)
+        self.log(f"⏱️ {name}: {seconds:.2f}s")
+
+    @property
+    def ready(self):
+        return self.state == "ready"
+
+    def start(self, steps):
+        """Run steps() on a background thread; ready when it returns, failed if it raises"""
+        def run():
+            self.state = "loading"
+            try:
+                steps(self)
+            except Exception as e:
+                self.state = "failed"
+                self.error = str(e)
+                self.log(f"❌ Boot failed during {self.phase_name}: {e}")
+                return
+            self.state = "ready"
+            self.phase_name = None
+            self.record("time_to_ready", time.perf_counter() - PROCESS_STARTED)
+
+        self._thread = threading.Thread(target=run, name="boot", daemon=True)
+        self._thread.start()
+
+    def report(self):
+        return {
+            "state": self.state,
+            "phase": self.phase_name,
+            "phases": dict(self.phases),
+            "uptime": round(time.perf_counter() - PROCESS_STARTED, 3),
+            "error": self.error,
+        }
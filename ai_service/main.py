@@ -1,11 +1,25 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from boot import PROCESS_STARTED, BootSequence  # First, so import time is measured
+
+from fastapi import FastAPI, File, UploadFile, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from ultralytics import YOLO
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from PIL import Image
 import io
 import numpy as np
-import cv2
-from typing import List, Dict
+import os
+import time
+from typing import List, Dict, Optional
+
+# ultralytics/torch are imported on the boot thread (backends.import_runtime), not here
+from backends import import_runtime
+from batching import MicroBatcher
+from metrics import MetricsRegistry, StageTimer
+from registry import ModelRegistry, process_rss_bytes
+from tiling import sliced_predict
+
+boot = BootSequence()
+boot.record("imports", time.perf_counter() - PROCESS_STARTED)
 
 app = FastAPI(title="TerraNova AI Disease Detection Service")
 
@@ -18,21 +32,94 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Load YOLO model
-MODEL_PATH = "models/best.pt"
-model = None
+# Load YOLO models: models/best.pt plus optional per-crop models/<crop_type>.pt
+MODELS_DIR = "models"
+
+# Routes by crop, keeps models within the memory budget and hot-swaps new versions (see registry.py)
+registry = ModelRegistry(
+    MODELS_DIR,
+    memory_budget_mb=float(os.getenv("MODEL_MEMORY_BUDGET_MB", "2048")),
+    poll_interval=float(os.getenv("MODEL_POLL_INTERVAL", "5")),
+    warmup_runs=int(os.getenv("WARMUP_RUNS", "2")),
+    # Warm every batch shape the batcher can produce up to its maximum
+    warmup_batch_sizes=[
+        int(size) for size in os.getenv("WARMUP_BATCH_SIZES", f"1,{os.getenv('MAX_BATCH_SIZE', '8')}").split(",")
+    ],
+)
+
+# ============================================
+# Metrics (GET /metrics, Prometheus text format - see metrics.py)
+# ============================================
+metrics = MetricsRegistry()
+REQUEST_SECONDS = metrics.histogram(
+    "ai_request_duration_seconds", "Request latency by endpoint and status", ["endpoint", "status"])
+STAGE_SECONDS = metrics.histogram(
+    "ai_stage_duration_seconds", "Time per request stage (read, decode, to_array, predict, parse)",
+    ["endpoint", "stage"])
+BATCH_SIZE = metrics.histogram(
+    "ai_batch_size", "Images per forward pass", ["model", "source"], buckets=(1, 2, 4, 8, 16, 32, 64))
+MODEL_CACHE = metrics.counter(
+    "ai_model_cache_total", "Model lookups served by a loaded model (hit) or a load (miss)", ["model", "result"])
+
+# Per-request Server-Timing header with the stage durations (for browser dev tools / curl -v)
+SERVER_TIMING = os.getenv("SERVER_TIMING", "0") == "1"
+
+# Concurrent single-image requests for the same model share a forward pass (see batching.py)
+batcher = MicroBatcher(
+    max_batch_size=int(os.getenv("MAX_BATCH_SIZE", "8")),
+    max_wait_ms=float(os.getenv("BATCH_WAIT_MS", "10")),
+    on_batch=lambda model_name, size: BATCH_SIZE.observe(size, model=model_name, source="detect"),
+)
+
+metrics.gauge("ai_queue_depth", "Images waiting for a batch slot", ["model"], function=batcher.queue_depth)
+metrics.gauge(
+    "ai_model_info", "Loaded models (value 1) with their version and backend", ["model", "version", "backend"],
+    function=lambda: {
+        (name, model["version"], (model["backend"] or {}).get("backend", "")): 1
+        for name, model in registry.status()["models"].items() if model["loaded"]
+    })
+metrics.gauge(
+    "ai_model_memory_bytes", "Estimated memory per loaded model", ["model"],
+    function=lambda: {
+        name: model["memory_mb"] * 2 ** 20
+        for name, model in registry.status()["models"].items() if model["loaded"]
+    })
+metrics.counter("ai_model_evictions_total", "Models unloaded to stay within the memory budget",
+                function=lambda: registry.evictions)
+metrics.gauge("ai_boot_phase_seconds", "Duration of each boot phase", ["phase"],
+              function=lambda: dict(boot.phases))
+metrics.gauge("ai_ready", "1 once the service is ready for traffic",
+              function=lambda: int(boot.ready and registry.current() is not None))
+metrics.gauge("process_resident_memory_bytes", "Resident memory size in bytes", function=process_rss_bytes)
+
+# Sliced inference defaults (see tiling.py)
+TILE_SIZE = int(os.getenv("TILE_SIZE", "640"))
+TILE_OVERLAP = float(os.getenv("TILE_OVERLAP", "0.2"))
+TILE_BATCH_SIZE = int(os.getenv("TILE_BATCH_SIZE", "8"))
+
+def boot_steps(boot):
+    """Runtime import, model load and warmup - on the boot thread while the server already answers /health/live"""
+    with boot.phase("runtime_import"):
+        import_runtime()
+    with boot.phase("model"):
+        registry.start()
+    handle = registry.current()
+    if handle:
+        boot.record("model_load", handle.timings["load"])
+        boot.record("warmup", handle.timings["warmup"])
+        print(f"📊 Model classes: {handle.names}")
+    else:
+        print("⚠️ Service will run without model - please add best.pt to models/ directory")
 
 @app.on_event("startup")
 async def load_model():
-    """Load YOLO model on startup"""
-    global model
-    try:
-        model = YOLO(MODEL_PATH)
-        print(f"✅ Model loaded successfully from {MODEL_PATH}")
-        print(f"📊 Model classes: {model.names}")
-    except Exception as e:
-        print(f"❌ Error loading model: {e}")
-        print("⚠️ Service will run without model - please add best.pt to models/ directory")
+    """Load YOLO model in the background (backend chosen by INFERENCE_BACKEND, see backends.py), then watch for new versions"""
+    boot.start(boot_steps)
+
+@app.on_event("shutdown")
+async def stop_watcher():
+    registry.stop()
+    batcher.stop()
 
 @app.get("/")
 def read_root():
@@ -40,25 +127,145 @@ def read_root():
     return {
         "service": "NovaTerra AI Disease Detection",
         "status": "running",
-        "model_loaded": model is not None,
+        "model_loaded": registry.current() is not None,
     }
 
+@app.middleware("http")
+async def time_requests(request: Request, call_next):
+    """Request latency histogram, plus the Server-Timing header when enabled"""
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+
+    route = request.scope.get("route")
+    endpoint = route.path if route else "unmatched"  # Route template keeps label cardinality bounded
+    REQUEST_SECONDS.observe(elapsed, endpoint=endpoint, status=response.status_code)
+
+    if SERVER_TIMING:
+        timer = getattr(request.state, "timer", None)
+        stages = f"{timer.server_timing()}, " if timer and timer.stages else ""
+        response.headers["Server-Timing"] = f"{stages}total;dur={elapsed * 1000:.1f}"
+    return response
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus scrape endpoint"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/health/live")
+def liveness():
+    """Process is up and serving HTTP (restart the container if this fails)"""
+    return {"status": "alive", "uptime": boot.report()["uptime"]}
+
+@app.get("/health/ready")
+def readiness():
+    """Runtime imported, general model loaded and warmed up (send traffic only when 200)"""
+    ready = boot.ready and registry.current() is not None
+    return JSONResponse(
+        {"status": "ready" if ready else "not_ready", "boot": boot.report()},
+        status_code=200 if ready else 503,
+    )
+
 @app.get("/health")
 def health_check():
     """Detailed health check"""
+    handle = registry.current()
     return {
         "status": "healthy",
-        "model_loaded": model is not None,
-        "classes": model.names if model else None,
+        "model_loaded": handle is not None,
+        "model_version": handle.version if handle else None,
+        "classes": handle.names if handle else None,
+        "backend": handle.report if handle else None,
+        "models": registry.available(),
+        "boot": boot.report(),
+    }
+
+@app.get("/models")
+def model_status():
+    """Loaded models, versions, memory use and the last reload error, if any"""
+    return registry.status()
+
+@app.post("/models/reload")
+async def reload_model(name: Optional[str] = None):
+    """Load a checkpoint now instead of waiting for the watcher (default: best)"""
+    await run_in_threadpool(registry.load, name)
+    return registry.status()
+
+async def current_model(crop_type=None):
+    """
+    Handle of the model serving a crop - taken once per request so a swap
+    never mixes versions. Falls back to the general model if the crop
+    model cannot be loaded.
+    """
+    # Never wait on (or trigger) a load while the boot thread is still loading
+    if boot.state in ("starting", "loading"):
+        raise HTTPException(status_code=503, detail="Model is loading", headers={"Retry-After": "5"})
+
+    name = registry.route(crop_type)
+    # Use the handle current() returns - it may be evicted right after, and get() would load on the event loop
+    handle = registry.current(name, touch=True)
+    if handle is not None:
+        MODEL_CACHE.inc(model=name, result="hit")
+    else:
+        MODEL_CACHE.inc(model=name, result="miss")
+        handle = await run_in_threadpool(registry.get, name)
+    if handle is None and name != registry.default:
+        handle = registry.current()  # Already loaded, or None - never load on the event loop
+    if handle is None:
+        raise HTTPException(status_code=503, detail="Model not loaded. Please add best.pt to models/ directory")
+    return handle
+
+def summarize(handle, boxes, scores, classes, image):
+    """Detection response for one image's boxes"""
+    detections = []
+    for box, score, cls in zip(boxes, scores, classes):
+        detection = {
+            "class": handle.names[int(cls)],
+            "confidence": float(score),
+            "bbox": [float(v) for v in box],  # [x1, y1, x2, y2]
+        }
+        detections.append(detection)
+    
+    # Create summary
+    disease_types = list(set([d["class"] for d in detections]))
+    max_confidence = max([d["confidence"] for d in detections]) if detections else 0
+    
+    return {
+        "detected": len(detections) > 0,
+        "diseases": detections,
+        "summary": {
+            "total_detections": len(detections),
+            "disease_types": disease_types,
+            "max_confidence": max_confidence,
+            "healthy": len(detections) == 0
+        },
+        "image_size": {
+            "width": image.width,
+            "height": image.height
+        },
+        "model": handle.name,
+        "model_version": handle.version
     }
 
 @app.post("/detect")
-async def detect_disease(file: UploadFile = File(...)):
+async def detect_disease(
+    request: Request,
+    file: UploadFile = File(...),
+    crop_type: Optional[str] = None,
+    tiled: bool = False,
+    tile_size: int = Query(TILE_SIZE, ge=160, le=4096),
+    overlap: float = Query(TILE_OVERLAP, ge=0, lt=1),
+):
     """
     Detect plant diseases in uploaded image
     
     Args:
         file: Image file (JPG, PNG)
+        crop_type: Field crop (e.g. "tomato") - routes to models/<crop_type>.pt when present
+        tiled: Sliced inference - run overlapping tile_size tiles at native
+            resolution (for drone / wide-angle photos with small lesions)
+        tile_size: Tile edge in pixels
+        overlap: Fraction of a tile shared with its neighbors
         
     Returns:
         {
@@ -77,86 +284,98 @@ async def detect_disease(file: UploadFile = File(...)):
             }
         }
     """
-    if not model:
-        raise HTTPException(status_code=503, detail="Model not loaded. Please add best.pt to models/ directory")
+    timer = request.state.timer = StageTimer(STAGE_SECONDS, "/detect")
+    with timer.stage("model"):
+        handle = await current_model(crop_type)
     
     try:
         # Read image
-        contents = await file.read()
-        image = Image.open(io.BytesIO(contents)).convert("RGB")
-        
-        # Convert to numpy array
-        img_array = np.array(image)
+        with timer.stage("read"):
+            contents = await file.read()
+        with timer.stage("decode"):
+            image = Image.open(io.BytesIO(contents)).convert("RGB")
         
         # Run inference
-        results = model.predict(
-            source=img_array,
-            conf=0.25,  # Confidence threshold
-            iou=0.45,   # NMS IoU threshold
-            verbose=False
-        )
+        if tiled:
+            with timer.stage("predict"):
+                boxes, scores, classes = await run_in_threadpool(
+                    sliced_predict,
+                    handle.predict,
+                    image,
+                    tile_size=tile_size,
+                    overlap=overlap,
+                    batch_size=TILE_BATCH_SIZE,
+                )
+            with timer.stage("parse"):
+                response = summarize(handle, boxes, scores, classes, image)
+            response["tiling"] = {"tile_size": tile_size, "overlap": overlap}
+            return response
         
-        # Parse results
-        detections = []
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                detection = {
-                    "class": model.names[int(box.cls[0])],
-                    "confidence": float(box.conf[0]),
-                    "bbox": box.xyxy[0].tolist(),  # [x1, y1, x2, y2]
-                }
-                detections.append(detection)
-        
-        # Create summary
-        disease_types = list(set([d["class"] for d in detections]))
-        max_confidence = max([d["confidence"] for d in detections]) if detections else 0
-        
-        return {
-            "detected": len(detections) > 0,
-            "diseases": detections,
-            "summary": {
-                "total_detections": len(detections),
-                "disease_types": disease_types,
-                "max_confidence": max_confidence,
-                "healthy": len(detections) == 0
-            },
-            "image_size": {
-                "width": image.width,
-                "height": image.height
-            }
-        }
+        with timer.stage("to_array"):
+            array = np.array(image)
+        with timer.stage("predict"):  # Includes the wait for a batch slot
+            boxes, scores, classes = await batcher.predict(handle, array)
+        with timer.stage("parse"):
+            return summarize(handle, boxes, scores, classes, image)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Detection error: {str(e)}")
 
 @app.post("/batch-detect")
-async def batch_detect(files: List[UploadFile] = File(...)):
+async def batch_detect(request: Request, files: List[UploadFile] = File(...), crop_type: Optional[str] = None):
     """
     Detect diseases in multiple images
     
     Args:
         files: List of image files
+        crop_type: Crop shared by the images, for model routing
         
     Returns:
         List of detection results
     """
-    if not model:
-        raise HTTPException(status_code=503, detail="Model not loaded")
+    timer = request.state.timer = StageTimer(STAGE_SECONDS, "/batch-detect")
+    with timer.stage("model"):
+        handle = await current_model(crop_type)
     
+    # Decode everything first, then run the readable images as one batch
     results = []
+    images = []
+    read_seconds = decode_seconds = 0.0
     for file in files:
         try:
-            result = await detect_disease(file)
-            results.append({
-                "filename": file.filename,
-                "result": result
-            })
+            started = time.perf_counter()
+            contents = await file.read()
+            decoded = time.perf_counter()
+            image = Image.open(io.BytesIO(contents)).convert("RGB")
+            read_seconds += decoded - started
+            decode_seconds += time.perf_counter() - decoded
+            images.append((file.filename, image))
         except Exception as e:
             results.append({
                 "filename": file.filename,
                 "error": str(e)
             })
+    timer.add("read", read_seconds)
+    timer.add("decode", decode_seconds)
+    
+    if images:
+        try:
+            with timer.stage("to_array"):
+                arrays = [np.array(image) for _, image in images]
+            BATCH_SIZE.observe(len(arrays), model=handle.name, source="batch-detect")
+            with timer.stage("predict"):
+                predictions = await run_in_threadpool(handle.predict, arrays)
+            with timer.stage("parse"):
+                for (filename, image), (boxes, scores, classes) in zip(images, predictions):
+                    results.append({
+                        "filename": filename,
+                        "result": summarize(handle, boxes, scores, classes, image)
+                    })
+        except Exception as e:
+            results.extend({
+                "filename": filename,
+                "error": str(e)
+            } for filename, _ in images)
     
     return results
 
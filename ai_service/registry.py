@@ -0,0 +1,315 @@
+"""
+Model registry with hot reload and per-crop models
+
+models/best.pt is the general model. A checkpoint named after a crop
+(models/tomato.pt, models/olives.pt, ... - Field.CROP_CHOICES keys) is a
+specialized model, and requests with that crop_type are routed to it;
+other crops fall back to best.pt.
+
+Crop models are loaded on first use and kept within a memory budget:
+when loading one would exceed it, the least recently used crop models
+are unloaded (the general model stays resident). Requests already
+running on an unloaded model keep their handle and finish normally.
+
+A watcher thread polls the directory. When a loaded checkpoint changes
+(and has stopped changing, so half-copied files are ignored) the new
+version is loaded in the background, warmed up with synthetic inputs and
+then swapped in with a single reference assignment. Requests take a
+handle once at the start, so in-flight requests finish on the model they
+started with and nothing is dropped during a deploy.
+
+Versions are "<file stem>-<first 12 hex of the file's sha256>", so the
+same weights always report the same version.
+"""
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from backends import IMAGE_SIZE, load_backend
+
+DEFAULT_MODEL = "best"
+CHECKPOINT_EXTENSION = ".pt"
+
+
+@dataclass
+class ModelHandle:
+    backend: object
+    name: str
+    version: str
+    path: str
+    report: dict = field(default_factory=dict)
+    memory_mb: float = 0.0
+    timings: dict = field(default_factory=dict)  # Seconds spent loading and warming up
+    loaded_at: float = field(default_factory=time.time)
+
+    @property
+    def names(self):
+        return self.backend.names
+
+    def predict(self, images, conf=0.25, iou=0.45):
+        return self.backend.predict(images, conf=conf, iou=iou)
+
+
+def file_version(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return f"{os.path.splitext(os.path.basename(path))[0]}-{digest.hexdigest()[:12]}"
+
+
+def process_rss_bytes():
+    """Resident memory of this process (Linux /proc; 0 where unavailable)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def warmup(backend, runs=2, batch_sizes=(1,), size=IMAGE_SIZE):
+    """
+    Forward passes on noise at each batch size, so lazy allocations,
+    kernel selection and per-shape caches happen before real traffic
+    """
+    image = np.random.default_rng(0).integers(0, 256, (size, size, 3), dtype=np.uint8)
+    for batch_size in batch_sizes:
+        for _ in range(runs):
+            backend.predict([image] * batch_size)
+
+
+class ModelSlot:
+    """One checkpoint file and the handle loaded from it (if any)"""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.handle = None
+        self.seen = None  # (mtime, size) of the checkpoint last loaded or attempted
+        self.pending = None  # Changed stat waiting to settle
+        self.last_used = 0.0
+        self.last_error = None
+        self.lock = threading.Lock()
+
+    def stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime, stat.st_size
+
+
+class ModelRegistry:
+    def __init__(self, directory, default=DEFAULT_MODEL, memory_budget_mb=2048, poll_interval=5.0,
+                 warmup_runs=2, warmup_batch_sizes=(1,), loader=load_backend, log=print):
+        self.directory = directory
+        self.default = default
+        self.memory_budget_mb = memory_budget_mb
+        self.poll_interval = poll_interval
+        self.warmup_runs = warmup_runs
+        self.warmup_batch_sizes = warmup_batch_sizes
+        self.loader = loader
+        self.log = log
+        self._slots = {}
+        self._slots_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+        # Budget checks and reservations of loads in progress (loads of different slots run concurrently)
+        self._budget = threading.Condition()
+        self._reserved_mb = 0.0
+        self.evictions = 0
+        self._scan()
+
+    # ---- discovery and routing ----
+
+    def _scan(self):
+        """Pick up added/removed checkpoints in the models directory"""
+        try:
+            names = {
+                os.path.splitext(entry)[0]
+                for entry in os.listdir(self.directory)
+                if entry.endswith(CHECKPOINT_EXTENSION)
+            }
+        except FileNotFoundError:
+            names = set()
+        names.add(self.default)
+        with self._slots_lock:
+            for name in names - self._slots.keys():
+                self._slots[name] = ModelSlot(name, os.path.join(self.directory, name + CHECKPOINT_EXTENSION))
+            for name in self._slots.keys() - names:
+                del self._slots[name]
+
+    def available(self):
+        return sorted(name for name, slot in self._slots.items() if slot.stat() is not None)
+
+    def route(self, crop_type=None):
+        """Model name serving a crop: its own checkpoint if there is one, else the general model"""
+        if crop_type:
+            slot = self._slots.get(crop_type.strip().lower())
+            if slot is not None and slot.name != self.default and slot.stat() is not None:
+                return slot.name
+        return self.default
+
+    # ---- loading ----
+
+    def current(self, name=None, touch=False):
+        """Loaded handle of a model (None if it is not loaded); touch marks it used for LRU eviction"""
+        slot = self._slots.get(name or self.default)
+        if slot is None:
+            return None
+        handle = slot.handle
+        if touch and handle is not None:
+            slot.last_used = time.monotonic()
+        return handle
+
+    def get(self, name=None):
+        """Handle of a model, loading it (and evicting idle ones) if needed"""
+        slot = self._slots.get(name or self.default)
+        if slot is None:
+            return None
+        slot.last_used = time.monotonic()
+        return slot.handle or self.load(slot.name)
+
+    def load(self, name=None):
+        """Load, warm up and swap in a checkpoint; returns the new handle (or None on failure)"""
+        slot = self._slots.get(name or self.default)
+        if slot is None:
+            return None
+
+        with slot.lock:
+            slot.seen = slot.stat()
+            if slot.seen is None:
+                slot.last_error = f"{slot.path} not found"
+                self.log(f"⚠️ {slot.last_error}")
+                return None
+
+            current = slot.handle
+            started = time.perf_counter()
+            try:
+                version = file_version(slot.path)
+                if current is not None and current.version == version:
+                    return current
+            except Exception as e:
+                slot.last_error = str(e)
+                self.log(f"❌ Failed to read {slot.path}: {e}")
+                return None
+
+            # Evict and reserve under one lock, so concurrent loads cannot both pass the
+            # budget check; if only loads in progress stand in the way, wait for them
+            reserved_mb = slot.seen[1] / 2 ** 20
+            with self._budget:
+                while not self._make_room(slot, reserved_mb) and self._reserved_mb > 0:
+                    self._budget.wait()
+                self._reserved_mb += reserved_mb
+            try:
+                rss_before = process_rss_bytes()
+                backend, report = self.loader(slot.path)
+                loaded = time.perf_counter()
+                warmup(backend, self.warmup_runs, self.warmup_batch_sizes)
+                # Measured growth, or the checkpoint size where RSS is unavailable/noisy
+                memory_mb = max((process_rss_bytes() - rss_before) / 2 ** 20, reserved_mb)
+            except Exception as e:
+                with self._budget:
+                    self._reserved_mb -= reserved_mb
+                    self._budget.notify_all()
+                slot.last_error = str(e)
+                self.log(f"❌ Failed to load {slot.path}: {e} - keeping {current.version if current else 'no model'}")
+                return None
+
+            handle = ModelHandle(
+                backend=backend, name=slot.name, version=version, path=slot.path,
+                report=report, memory_mb=round(memory_mb, 1),
+                timings={
+                    "load": round(loaded - started, 3),
+                    "warmup": round(time.perf_counter() - loaded, 3),
+                },
+            )
+            with self._budget:
+                slot.handle = handle  # Atomic swap - readers see either the old or the new handle
+                self._reserved_mb -= reserved_mb
+                self._budget.notify_all()
+            slot.last_used = time.monotonic()
+            slot.last_error = None
+            self.log(
+                f"✅ Model {version} live ({report.get('backend')} backend, ~{memory_mb:.0f} MB, "
+                f"loaded in {time.perf_counter() - started:.1f}s)"
+            )
+            return handle
+
+    def loaded_memory_mb(self):
+        return sum(slot.handle.memory_mb for slot in list(self._slots.values()) if slot.handle)
+
+    def _make_room(self, incoming, needed_mb):
+        """
+        Unload least recently used crop models until needed_mb fits in the
+        budget (call holding _budget); returns whether it fits
+        """
+        idle = sorted(
+            (slot for slot in list(self._slots.values())
+             if slot.handle is not None and slot is not incoming and slot.name != self.default),
+            key=lambda slot: slot.last_used,
+        )
+        used = self.loaded_memory_mb() + self._reserved_mb - (incoming.handle.memory_mb if incoming.handle else 0)
+        for slot in idle:
+            if used + needed_mb <= self.memory_budget_mb:
+                break
+            self.log(f"♻️ Unloading {slot.name} (idle {time.monotonic() - slot.last_used:.0f}s) to stay within {self.memory_budget_mb} MB")
+            used -= slot.handle.memory_mb
+            slot.handle = None
+            self.evictions += 1
+        return used + needed_mb <= self.memory_budget_mb
+
+    # ---- watching ----
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            self._scan()
+            for slot in list(self._slots.values()):
+                stat = slot.stat()
+                # Loaded models are reloaded (and the general model loaded once it
+                # appears); crop models load on first request
+                if stat is None or stat == slot.seen or (slot.handle is None and slot.name != self.default):
+                    slot.pending = None
+                    continue
+                # Only load once the file has been unchanged for a full poll interval
+                if stat != slot.pending:
+                    slot.pending = stat
+                    continue
+                self.log(f"🔄 {slot.path} changed - loading in background")
+                self.load(slot.name)
+                slot.pending = None
+
+    def start(self):
+        """Load the general model, then watch for new versions"""
+        self.load(self.default)
+        self._watcher = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        models = {}
+        for name, slot in sorted(self._slots.items()):
+            handle = slot.handle
+            models[name] = {
+                "path": slot.path,
+                "available": slot.stat() is not None,
+                "loaded": handle is not None,
+                "version": handle.version if handle else None,
+                "memory_mb": handle.memory_mb if handle else None,
+                "loaded_at": handle.loaded_at if handle else None,
+                "backend": handle.report if handle else None,
+                "last_error": slot.last_error,
+            }
+        return {
+            "default": self.default,
+            "memory_budget_mb": self.memory_budget_mb,
+            "memory_used_mb": round(self.loaded_memory_mb(), 1),
+            "evictions": self.evictions,
+            "models": models,
+        }
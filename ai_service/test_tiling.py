@@ -0,0 +1,96 @@
+"""
+Tests for sliced inference (run from ai_service/: python -m unittest test_tiling)
+"""
+import unittest
+
+import numpy as np
+from PIL import Image
+
+from tiling import nms, sliced_predict, tile_windows
+
+
+def bright_box_predict(tiles):
+    """Fake model: one class-0 box around the bright pixels of each tile, scored by their count"""
+    outputs = []
+    for tile in tiles:
+        ys, xs = np.nonzero(tile[:, :, 0] > 128)
+        if not len(xs):
+            outputs.append((np.empty((0, 4), np.float32), np.empty(0, np.float32), np.empty(0, np.int64)))
+            continue
+        box = np.array([[xs.min(), ys.min(), xs.max() + 1, ys.max() + 1]], dtype=np.float32)
+        outputs.append((box, np.array([len(xs) / 1e6], np.float32), np.zeros(1, np.int64)))
+    return outputs
+
+
+def image_with_boxes(width, height, boxes):
+    array = np.zeros((height, width, 3), dtype=np.uint8)
+    for x1, y1, x2, y2 in boxes:
+        array[y1:y2, x1:x2] = 255
+    return Image.fromarray(array)
+
+
+class TileWindowsTests(unittest.TestCase):
+    def test_last_tile_is_edge_aligned(self):
+        windows = tile_windows(1000, 700, tile_size=640, overlap=0.2)
+        self.assertEqual(sorted(set(windows[:, 0].tolist())), [0, 360])
+        self.assertEqual(sorted(set(windows[:, 1].tolist())), [0, 60])
+        self.assertTrue(((windows[:, 2] - windows[:, 0]) == 640).all())
+        self.assertTrue(((windows[:, 3] - windows[:, 1]) == 640).all())
+        self.assertEqual(windows[:, 2].max(), 1000)
+        self.assertEqual(windows[:, 3].max(), 700)
+
+    def test_windows_cover_every_pixel(self):
+        covered = np.zeros((1500, 2100), dtype=bool)
+        for x1, y1, x2, y2 in tile_windows(2100, 1500, tile_size=512, overlap=0.25):
+            covered[y1:y2, x1:x2] = True
+        self.assertTrue(covered.all())
+
+    def test_small_image_is_one_clipped_window(self):
+        self.assertEqual(tile_windows(300, 200).tolist(), [[0, 0, 300, 200]])
+
+    def test_invalid_overlap(self):
+        with self.assertRaises(ValueError):
+            tile_windows(1000, 1000, overlap=1.0)
+
+
+class NmsTests(unittest.TestCase):
+    def test_suppresses_same_class_only(self):
+        boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [0, 0, 10, 10]], dtype=np.float32)
+        scores = np.array([0.9, 0.8, 0.7], dtype=np.float32)
+        classes = np.array([0, 0, 1])
+        self.assertEqual(nms(boxes, scores, classes).tolist(), [0, 2])
+
+    def test_ios_removes_partial_box_inside_full_box(self):
+        boxes = np.array([[0, 0, 100, 100], [80, 0, 100, 100]], dtype=np.float32)
+        scores = np.array([0.9, 0.6], dtype=np.float32)
+        classes = np.zeros(2, dtype=np.int64)
+        self.assertEqual(nms(boxes, scores, classes, 0.5, metric="iou").tolist(), [0, 1])
+        self.assertEqual(nms(boxes, scores, classes, 0.5, metric="ios").tolist(), [0])
+
+    def test_empty(self):
+        empty = np.empty((0, 4), np.float32)
+        self.assertEqual(len(nms(empty, np.empty(0), np.empty(0, np.int64))), 0)
+
+
+class SlicedPredictTests(unittest.TestCase):
+    def test_box_cut_by_tile_border_is_merged(self):
+        # Tiles start at x=0 and x=360; the object crosses the first tile's right edge (640)
+        image = image_with_boxes(1000, 640, [(600, 100, 700, 150)])
+        boxes, scores, classes = sliced_predict(
+            bright_box_predict, image, tile_size=640, overlap=0.2, include_full=False,
+        )
+        self.assertEqual(boxes.tolist(), [[600, 100, 700, 150]])
+        self.assertEqual(classes.tolist(), [0])
+
+    def test_object_in_edge_aligned_last_tile(self):
+        image = image_with_boxes(1000, 700, [(950, 660, 1000, 700)])
+        boxes, _, _ = sliced_predict(bright_box_predict, image, tile_size=640, overlap=0.2, include_full=False)
+        self.assertEqual(boxes.tolist(), [[950, 660, 1000, 700]])
+
+    def test_no_detections(self):
+        boxes, scores, classes = sliced_predict(bright_box_predict, image_with_boxes(1000, 700, []))
+        self.assertEqual((len(boxes), len(scores), len(classes)), (0, 0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+Sliced inference for high-resolution images
+
+Small lesions disappear when a 4000x3000 drone photo is resized to the
+model's 640 px input. Instead the image is cut into overlapping tiles at
+native resolution, the tiles are run through the model in batches (one
+forward pass per batch) and the per-tile boxes are shifted back to image
+coordinates and merged with class-aware NMS.
+
+Only one batch of tiles is held in memory at a time.
+"""
+import numpy as np
+
+
+def tile_windows(width, height, tile_size=640, overlap=0.2):
+    """
+    Tile boxes (x1, y1, x2, y2) covering the image, neighbors overlapping
+    by `overlap` of a tile; the last row/column is aligned to the edge
+
+    Returns:
+        numpy array: (n, 4) int windows
+    """
+    if not 0 <= overlap < 1:
+        raise ValueError("overlap must be in [0, 1)")
+    stride = max(1, int(tile_size * (1 - overlap)))
+
+    def starts(length):
+        if length <= tile_size:
+            return np.array([0])
+        positions = np.arange(0, length - tile_size, stride)
+        return np.append(positions, length - tile_size)
+
+    xs, ys = np.meshgrid(starts(width), starts(height))
+    x1, y1 = xs.ravel(), ys.ravel()
+    return np.stack([
+        x1, y1,
+        np.minimum(x1 + tile_size, width), np.minimum(y1 + tile_size, height),
+    ], axis=1)
+
+
+def iter_tile_batches(image, windows, batch_size=8):
+    """Yield (windows, tiles as HxWx3 uint8 arrays) one batch at a time"""
+    for start in range(0, len(windows), batch_size):
+        batch = windows[start:start + batch_size]
+        yield batch, [np.asarray(image.crop(tuple(int(v) for v in window))) for window in batch]
+
+
+def nms(boxes, scores, classes, iou_threshold=0.45, metric="iou"):
+    """
+    Class-aware greedy non-maximum suppression
+
+    metric "ios" (intersection over the smaller box) also removes the
+    partial boxes a lesion cut by a tile border leaves inside the tile.
+
+    Returns:
+        numpy array: indices of kept boxes, by descending score
+    """
+    if len(boxes) == 0:
+        return np.empty(0, dtype=np.int64)
+
+    # Offset each class into its own coordinate range so classes never overlap
+    offset = classes.astype(np.float64)[:, None] * (boxes.max() + 1)
+    shifted = boxes + offset
+    x1, y1, x2, y2 = shifted.T
+    areas = (x2 - x1) * (y2 - y1)
+
+    order = np.argsort(-scores, kind="stable")
+    keep = []
+    while len(order):
+        best, rest = order[0], order[1:]
+        keep.append(best)
+        if not len(rest):
+            break
+        width = np.clip(np.minimum(x2[best], x2[rest]) - np.maximum(x1[best], x1[rest]), 0, None)
+        height = np.clip(np.minimum(y2[best], y2[rest]) - np.maximum(y1[best], y1[rest]), 0, None)
+        inter = width * height
+        if metric == "ios":
+            overlap = inter / np.maximum(np.minimum(areas[best], areas[rest]), 1e-9)
+        else:
+            overlap = inter / np.maximum(areas[best] + areas[rest] - inter, 1e-9)
+        order = rest[overlap <= iou_threshold]
+    return np.array(keep, dtype=np.int64)
+
+
+def sliced_predict(predict, image, tile_size=640, overlap=0.2, batch_size=8,
+                   include_full=True, merge_threshold=0.5):
+    """
+    Run `predict` over overlapping tiles of a PIL image
+
+    Args:
+        predict: callable(list of HxWx3 arrays) -> list of
+            (boxes (n, 4), scores (n,), classes (n,)) numpy tuples
+        include_full: also run the whole image once, so objects larger
+            than a tile are still found in one piece
+
+    Returns:
+        tuple: (boxes, scores, classes) in image coordinates, merged
+    """
+    width, height = image.size
+    windows = tile_windows(width, height, tile_size, overlap)
+    boxes, scores, classes = [], [], []
+
+    def collect(outputs, origins):
+        for (tile_boxes, tile_scores, tile_classes), (x, y) in zip(outputs, origins):
+            if len(tile_boxes):
+                boxes.append(tile_boxes + np.array([x, y, x, y], dtype=tile_boxes.dtype))
+                scores.append(tile_scores)
+                classes.append(tile_classes)
+
+    for batch, tiles in iter_tile_batches(image, windows, batch_size):
+        collect(predict(tiles), batch[:, :2])
+    if include_full and len(windows) > 1:
+        collect(predict([np.asarray(image)]), [(0, 0)])
+
+    if not boxes:
+        return np.empty((0, 4), dtype=np.float32), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+
+    boxes, scores, classes = np.concatenate(boxes), np.concatenate(scores), np.concatenate(classes)
+    keep = nms(boxes, scores, classes, merge_threshold, metric="ios")
+    return boxes[keep], scores[keep], classes[keep]
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import DiseaseDetection, TreatmentRecommendation
+from .models import DiseaseDetection, Outbreak, TreatmentRecommendation
 
 
 @admin.register(DiseaseDetection)
@@ -7,11 +7,11 @@ class DiseaseDetectionAdmin(admin.ModelAdmin):
     list_display = ['id', 'user', 'disease_name', 'confidence', 'severity', 'status', 'field', 'detection_date']
     list_filter = ['severity', 'status', 'detection_date']
     search_fields = ['disease_name', 'user__username', 'field__name']
-    readonly_fields = ['detection_date', 'confidence', 'bbox']
+    readonly_fields = ['detection_date', 'confidence', 'bbox', 'model_version']
     
     fieldsets = (
         ('Detection Info', {
-            'fields': ('user', 'field', 'disease_name', 'confidence', 'severity', 'detection_date')
+            'fields': ('user', 'field', 'disease_name', 'confidence', 'severity', 'detection_date', 'model_version')
         }),
         ('Image & Location', {
             'fields': ('image', 'bbox')
@@ -22,6 +22,14 @@ class DiseaseDetectionAdmin(admin.ModelAdmin):
     )
 
 
+@admin.register(Outbreak)
+class OutbreakAdmin(admin.ModelAdmin):
+    list_display = ['id', 'disease_name', 'status', 'farm_count', 'detection_count', 'radius_km', 'last_detected']
+    list_filter = ['status', 'disease_name']
+    readonly_fields = ['created_at', 'updated_at']
+    filter_horizontal = ['notified_users']
+
+
 @admin.register(TreatmentRecommendation)
 class TreatmentRecommendationAdmin(admin.ModelAdmin):
     list_display = ['disease_name', 'estimated_recovery_days']
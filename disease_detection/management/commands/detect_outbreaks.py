@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from novaterra.services.outbreak_clusters import detect_outbreaks
+
+
+class Command(BaseCommand):
+    help = (
+        "Cluster recent disease detections in space and time, record outbreaks "
+        "spanning several farms and alert nearby farmers (run from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=14, help="Look-back window in days")
+        parser.add_argument('--eps-km', type=float, default=5.0, help="Neighbor distance in km")
+        parser.add_argument('--eps-days', type=float, default=7, help="Neighbor time gap in days")
+        parser.add_argument('--min-samples', type=int, default=5, help="Detections needed around a core point")
+        parser.add_argument('--min-farms', type=int, default=2, help="Distinct farms needed for an outbreak")
+        parser.add_argument('--alert-radius-km', type=float, default=15.0,
+                            help="Alert farms this far beyond the outbreak edge (0 disables alerts)")
+        parser.add_argument('--no-sms', action='store_true', help="Create in-app alerts only")
+
+    def handle(self, *args, **options):
+        summary = detect_outbreaks(
+            days=options['days'],
+            eps_km=options['eps_km'],
+            eps_days=options['eps_days'],
+            min_samples=options['min_samples'],
+            min_farms=options['min_farms'],
+            alert_radius_km=options['alert_radius_km'],
+            send_sms=not options['no_sms'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {summary['clusters']} clusters, {summary['created']} new outbreaks, "
+            f"{summary['updated']} updated, {summary['resolved']} resolved, "
+            f"{summary['alerted']} farmers alerted"
+        ))
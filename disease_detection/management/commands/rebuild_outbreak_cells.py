@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+
+from disease_detection.models import DiseaseDetection, OutbreakCell, detection_cell
+from novaterra.services import geohash as geohash_codec
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the outbreak map cells from the detection table (run once after "
+        "migrating, or to repair drifted counts)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows per bulk write")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+
+        # Detections saved before cells existed have no geohash yet
+        pending = []
+        for detection in DiseaseDetection.objects.filter(geohash='').iterator(chunk_size=batch_size):
+            detection.geohash = detection_cell(detection)
+            if detection.geohash:
+                pending.append(detection)
+            if len(pending) >= batch_size:
+                DiseaseDetection.objects.bulk_update(pending, ['geohash'])
+                pending = []
+        if pending:
+            DiseaseDetection.objects.bulk_update(pending, ['geohash'])
+
+        totals = DiseaseDetection.objects.exclude(geohash='') \
+            .annotate(bucket=TruncDate('detection_date')) \
+            .values('geohash', 'disease_name', 'bucket') \
+            .annotate(n=Count('id')) \
+            .order_by()
+
+        cells = []
+        for row in totals:
+            latitude, longitude = geohash_codec.center(row['geohash'])
+            cells.append(OutbreakCell(
+                geohash=row['geohash'],
+                disease_name=row['disease_name'],
+                bucket=row['bucket'],
+                count=row['n'],
+                latitude=latitude,
+                longitude=longitude,
+            ))
+
+        with transaction.atomic():
+            OutbreakCell.objects.all().delete()
+            OutbreakCell.objects.bulk_create(cells, batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {len(cells)} outbreak cells"))
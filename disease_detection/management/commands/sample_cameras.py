@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from novaterra.services.frame_sampler import (
+    DEFAULT_HASH_THRESHOLD, FileFrameSource, FrameSampler, Go2rtcFrameSource,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Sample frames from active cameras and run disease detection on the "
+        "ones that changed. Use --fake-dir to replay local images instead of go2rtc."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=60, help="Seconds between frames per camera")
+        parser.add_argument('--batch-size', type=int, default=8, help="Frames per AI service request")
+        parser.add_argument('--hash-threshold', type=int, default=DEFAULT_HASH_THRESHOLD,
+                            help="Max dHash bit difference treated as a duplicate frame (0-64)")
+        parser.add_argument('--camera', type=int, action='append', dest='cameras',
+                            help="Only sample this camera id (repeatable)")
+        parser.add_argument('--cycles', type=int, default=None, help="Stop after this many cycles")
+        parser.add_argument('--fake-dir', default=None,
+                            help="Replay images from <dir>/<camera name>/ (or <dir>/) instead of go2rtc")
+
+    def handle(self, *args, **options):
+        if not 0 <= options['hash_threshold'] <= 64:
+            raise CommandError('--hash-threshold must be between 0 and 64')
+
+        source = FileFrameSource(options['fake_dir']) if options['fake_dir'] else Go2rtcFrameSource()
+        sampler = FrameSampler(
+            source,
+            interval=options['interval'],
+            batch_size=options['batch_size'],
+            hash_threshold=options['hash_threshold'],
+            cameras=options['cameras'],
+            log=self.stdout.write,
+        )
+        try:
+            stats = sampler.run(cycles=options['cycles'])
+        except KeyboardInterrupt:
+            sampler.flush()
+            stats = sampler.stats
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {stats['frames']} frames, {stats['duplicates']} duplicates skipped, "
+            f"{stats['submitted']} submitted, {stats['detections']} detections"
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.14 on 2026-10-19 16:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disease_detection', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diseasedetection',
+            name='latitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='diseasedetection',
+            name='longitude',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
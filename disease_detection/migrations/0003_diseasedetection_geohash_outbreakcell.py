@@ -0,0 +1,35 @@
+# Generated by Django 5.1.14 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disease_detection', '0002_diseasedetection_latitude_diseasedetection_longitude'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diseasedetection',
+            name='geohash',
+            field=models.CharField(blank=True, max_length=12),
+        ),
+        migrations.CreateModel(
+            name='OutbreakCell',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('geohash', models.CharField(max_length=12)),
+                ('disease_name', models.CharField(max_length=200)),
+                ('bucket', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('latitude', models.FloatField(db_index=True)),
+                ('longitude', models.FloatField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['bucket', 'disease_name'], name='disease_det_bucket_efa61a_idx')],
+                'unique_together': {('geohash', 'disease_name', 'bucket')},
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.14 on 2026-10-19 17:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disease_detection', '0003_diseasedetection_geohash_outbreakcell'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Outbreak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('disease_name', models.CharField(max_length=200)),
+                ('status', models.CharField(choices=[('active', 'Active'), ('resolved', 'Resolved')], default='active', max_length=20)),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('radius_km', models.FloatField(default=0)),
+                ('detection_count', models.PositiveIntegerField(default=0)),
+                ('farm_count', models.PositiveIntegerField(default=0)),
+                ('first_detected', models.DateTimeField()),
+                ('last_detected', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('notified_users', models.ManyToManyField(blank=True, related_name='outbreak_alerts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-last_detected'],
+                'indexes': [models.Index(fields=['status', 'disease_name'], name='disease_det_status_4412eb_idx')],
+            },
+        ),
+    ]
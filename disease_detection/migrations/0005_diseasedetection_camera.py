@@ -0,0 +1,20 @@
+# Generated by Django 5.1.14 on 2026-10-19 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disease_detection', '0004_outbreak'),
+        ('novaterra', '0013_alter_recommendation_source'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diseasedetection',
+            name='camera',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='disease_detections', to='novaterra.camera'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.14 on 2026-10-19 19:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('disease_detection', '0005_diseasedetection_camera'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='diseasedetection',
+            name='model_version',
+            field=models.CharField(blank=True, help_text='AI model version that produced the result', max_length=64),
+        ),
+    ]
@@ -1,6 +1,14 @@
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
 from django.contrib.auth.models import User
-from novaterra.models import Field
+from novaterra.models import Camera, Field, UserProfile
+from novaterra.services import geohash as geohash_codec
+
+# Geohash length of stored outbreak cells (~1.2 km x 0.6 km); coarser maps group by prefix
+OUTBREAK_CELL_PRECISION = 6
 
 
 class DiseaseDetection(models.Model):
@@ -21,6 +29,8 @@ class DiseaseDetection(models.Model):
     
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='disease_detections')
     field = models.ForeignKey(Field, on_delete=models.SET_NULL, null=True, blank=True, related_name='disease_detections')
+    # Set when the frame came from a camera (frame sampler) rather than an upload
+    camera = models.ForeignKey(Camera, on_delete=models.SET_NULL, null=True, blank=True, related_name='disease_detections')
     
     # Detection details
     disease_name = models.CharField(max_length=200)
@@ -32,6 +42,13 @@ class DiseaseDetection(models.Model):
     image = models.ImageField(upload_to='disease_detections/%Y/%m/%d/')
     detection_date = models.DateTimeField(auto_now_add=True)
     bbox = models.JSONField(null=True, blank=True, help_text="Bounding box coordinates [x1, y1, x2, y2]")
+    model_version = models.CharField(max_length=64, blank=True, help_text="AI model version that produced the result")
+    
+    # Where the photo was taken (EXIF GPS or client-reported), used to attribute it to a field
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Outbreak map cell (photo position, else the field's position), set on insert
+    geohash = models.CharField(max_length=12, blank=True)
     
     # Treatment tracking
     treatment_notes = models.TextField(blank=True)
@@ -47,6 +64,144 @@ class DiseaseDetection(models.Model):
         return f"{self.disease_name} - {self.user.username} ({self.detection_date.strftime('%Y-%m-%d')})"
 
 
+# Keep UserProfile.detection_count in sync (shown as total_scans)
+@receiver(post_save, sender=DiseaseDetection)
+def increment_detection_count(sender, instance, created, **kwargs):
+    if created:
+        UserProfile.objects.filter(user_id=instance.user_id).update(
+            detection_count=F('detection_count') + 1,
+            data_version=F('data_version') + 1,
+        )
+    else:
+        # Status/treatment changes still invalidate the analytics cache
+        UserProfile.objects.filter(user_id=instance.user_id).update(
+            data_version=F('data_version') + 1
+        )
+
+
+@receiver(post_delete, sender=DiseaseDetection)
+def decrement_detection_count(sender, instance, **kwargs):
+    UserProfile.objects.filter(user_id=instance.user_id).update(
+        detection_count=Greatest(F('detection_count') - 1, 0),
+        data_version=F('data_version') + 1,
+    )
+
+
+# ============================================
+# OUTBREAK MAP (incremental per-cell counts)
+# ============================================
+class OutbreakCell(models.Model):
+    """Detections per geohash cell, disease and day - maintained by the signals below"""
+    geohash = models.CharField(max_length=12)
+    disease_name = models.CharField(max_length=200)
+    bucket = models.DateField()  # Detection day
+    count = models.PositiveIntegerField(default=0)
+    
+    # Cell center, for bounding box queries
+    latitude = models.FloatField(db_index=True)
+    longitude = models.FloatField()
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['geohash', 'disease_name', 'bucket']
+        indexes = [
+            models.Index(fields=['bucket', 'disease_name']),
+        ]
+    
+    def __str__(self):
+        return f"{self.geohash} {self.disease_name} {self.bucket}: {self.count}"
+    
+    @classmethod
+    def add(cls, cell, disease_name, bucket, delta=1):
+        """Atomically add delta to a cell's count (creating the row on first use)"""
+        cells = cls.objects.filter(geohash=cell, disease_name=disease_name, bucket=bucket)
+        if delta < 0:
+            cells.update(count=Greatest(F('count') + delta, 0))
+            return
+        if cells.update(count=F('count') + delta):
+            return
+        latitude, longitude = geohash_codec.center(cell)
+        try:
+            with transaction.atomic():
+                cls.objects.create(
+                    geohash=cell,
+                    disease_name=disease_name,
+                    bucket=bucket,
+                    count=delta,
+                    latitude=latitude,
+                    longitude=longitude,
+                )
+        except IntegrityError:
+            # Created concurrently - fall back to the increment
+            cells.update(count=F('count') + delta)
+
+
+def detection_cell(detection):
+    """Geohash of where a detection happened, '' if unknown"""
+    if detection.latitude is not None and detection.longitude is not None:
+        return geohash_codec.encode(detection.latitude, detection.longitude, OUTBREAK_CELL_PRECISION)
+    if detection.field_id:
+        point = Field.objects.filter(id=detection.field_id).values_list('location__point', flat=True).first()
+        if point:
+            return geohash_codec.encode(point.y, point.x, OUTBREAK_CELL_PRECISION)
+    return ''
+
+
+@receiver(pre_save, sender=DiseaseDetection)
+def assign_outbreak_cell(sender, instance, **kwargs):
+    if instance._state.adding and not instance.geohash:
+        instance.geohash = detection_cell(instance)
+
+
+@receiver(post_save, sender=DiseaseDetection)
+def add_to_outbreak_cell(sender, instance, created, **kwargs):
+    if created and instance.geohash:
+        OutbreakCell.add(instance.geohash, instance.disease_name, instance.detection_date.date())
+
+
+@receiver(post_delete, sender=DiseaseDetection)
+def remove_from_outbreak_cell(sender, instance, **kwargs):
+    if instance.geohash:
+        OutbreakCell.add(instance.geohash, instance.disease_name, instance.detection_date.date(), delta=-1)
+
+
+class Outbreak(models.Model):
+    """A space-time cluster of one disease across farms - written by the detect_outbreaks job"""
+    STATUS_CHOICES = [
+        ('active', 'Active'),
+        ('resolved', 'Resolved'),
+    ]
+    
+    disease_name = models.CharField(max_length=200)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='active')
+    
+    # Cluster center and the distance to its farthest detection
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    radius_km = models.FloatField(default=0)
+    
+    detection_count = models.PositiveIntegerField(default=0)
+    farm_count = models.PositiveIntegerField(default=0)
+    first_detected = models.DateTimeField()
+    last_detected = models.DateTimeField()
+    
+    # Farmers already alerted, so reruns only alert newly affected neighbors
+    notified_users = models.ManyToManyField(User, blank=True, related_name='outbreak_alerts')
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-last_detected']
+        indexes = [
+            models.Index(fields=['status', 'disease_name']),
+        ]
+    
+    def __str__(self):
+        return f"{self.disease_name} outbreak ({self.farm_count} farms, {self.status})"
+
+
 class TreatmentRecommendation(models.Model):
     """Store treatment recommendations for different diseases"""
     disease_name = models.CharField(max_length=200, unique=True)
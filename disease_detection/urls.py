@@ -10,4 +10,10 @@ urlpatterns = [
     # Detection detail and management
     path('<int:detection_id>/', views.get_detection_detail, name='detection-detail'),
     path('<int:detection_id>/update/', views.update_detection_status, name='update-detection'),
+    
+    # Regional outbreak map
+    path('outbreaks/', views.get_outbreaks, name='outbreaks'),
+    path('outbreaks/heatmap/', views.get_outbreak_heatmap, name='outbreak-heatmap'),
+    path('outbreaks/tiles/<int:z>/<int:x>/<int:y>/', views.get_outbreak_tile, name='outbreak-tile'),
+    path('outbreaks/timeline/', views.get_outbreak_timeline, name='outbreak-timeline'),
 ]
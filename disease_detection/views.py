@@ -1,4 +1,5 @@
 import requests
+from django.conf import settings
 from django.core.files.storage import default_storage
 from django.core.files.base import ContentFile
 from django.utils import timezone
@@ -7,11 +8,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import DiseaseDetection, TreatmentRecommendation
+from .models import DiseaseDetection, Outbreak, TreatmentRecommendation
 from novaterra.models import Field
 from novaterra.services.sms_service import SMSService
+from novaterra.services.event_bus import get_event_bus
+from novaterra.services.field_index import resolve_field
+from novaterra.services.geotag import read_gps_coordinates
+from novaterra.services.outbreaks import TIMELINE_INTERVALS, heatmap, parse_bbox, precision_for_zoom, tile_bbox, timeline
 
-AI_SERVICE_URL = "http://localhost:5000"
+AI_SERVICE_URL = getattr(settings, 'AI_SERVICE_URL', 'http://localhost:5000')
 
 
 @api_view(['POST'])
@@ -24,6 +29,10 @@ def detect_disease(request):
     Form data:
         - image: Image file
         - field_id: (optional) ID of field where photo was taken
+        - latitude, longitude: (optional) where the photo was taken, used
+          when the image has no EXIF GPS tags
+    
+    Without field_id, the field is resolved from the photo's position.
     """
     try:
         if 'image' not in request.FILES:
@@ -36,14 +45,34 @@ def detect_disease(request):
         
         # Validate field ownership if provided
         field = None
+        field_source = None
         if field_id:
             try:
-                field = Field.objects.get(id=field_id, location__farm__user=request.user)
+                field = Field.objects.select_related('location').get(id=field_id, owner=request.user)
+                field_source = 'field_id'
             except Field.DoesNotExist:
                 return Response({
                     'error': 'Field not found or access denied'
                 }, status=status.HTTP_404_NOT_FOUND)
         
+        # Photo position: EXIF GPS first, then client-reported coordinates
+        position = read_gps_coordinates(image_file)
+        position_source = 'exif' if position else None
+        if position is None and request.data.get('latitude') and request.data.get('longitude'):
+            try:
+                position = (float(request.data['latitude']), float(request.data['longitude']))
+                position_source = 'client'
+            except ValueError:
+                return Response({
+                    'error': 'latitude and longitude must be numbers'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Attribute the photo to the field it was taken in
+        if field is None and position:
+            field = resolve_field(request.user, *position)
+            if field:
+                field_source = 'gps'
+        
         # Send image to AI service
         image_file.seek(0)  # Reset file pointer
         files = {'file': (image_file.name, image_file.read(), image_file.content_type)}
@@ -52,6 +81,7 @@ def detect_disease(request):
             response = requests.post(
                 f"{AI_SERVICE_URL}/detect",
                 files=files,
+                params={'crop_type': field.crop_type} if field else None,  # Routes to a crop-specific model
                 timeout=30
             )
             response.raise_for_status()
@@ -91,7 +121,10 @@ def detect_disease(request):
                     confidence=disease['confidence'],
                     severity=severity,
                     image=image_file,
-                    bbox=disease.get('bbox')
+                    bbox=disease.get('bbox'),
+                    model_version=detection_result.get('model_version', ''),
+                    latitude=position[0] if position else None,
+                    longitude=position[1] if position else None,
                 )
                 
                 # Send SMS alert if phone number exists and severity is medium or higher
@@ -99,7 +132,7 @@ def detect_disease(request):
                     phone_number = request.user.profile.phone_number
                     if phone_number:
                         sms_service = SMSService()
-                        field_name = field.name if field else 'Your field'
+                        field_name = field.location.name if field else 'Your field'
                         sms_result = sms_service.send_disease_alert(
                             phone_number=phone_number,
                             disease_name=detection.disease_name,
@@ -114,10 +147,26 @@ def detect_disease(request):
                     'confidence': detection.confidence,
                     'severity': detection.severity
                 })
+            
+            if saved_detections:
+                get_event_bus().publish(request.user.id, 'detection.created', {
+                    'field_id': field.id if field else None,
+                    'detections': saved_detections,
+                })
         
         return Response({
             'success': True,
             'detection': detection_result,
+            'field': {
+                'id': field.id,
+                'name': field.location.name,
+                'matched_by': field_source,
+            } if field else None,
+            'position': {
+                'latitude': position[0],
+                'longitude': position[1],
+                'source': position_source,
+            } if position else None,
             'saved_detections': saved_detections,
             'total_saved': len(saved_detections),
             'sms_sent': sms_sent
@@ -143,7 +192,7 @@ def get_disease_history(request):
         limit = int(request.query_params.get('limit', 50))
         
         # Base query
-        detections = DiseaseDetection.objects.filter(user=request.user)
+        detections = DiseaseDetection.objects.filter(user=request.user).select_related('field__location')
         
         # Filter by field if provided
         if field_id:
@@ -163,8 +212,9 @@ def get_disease_history(request):
                 'detection_date': detection.detection_date.isoformat(),
                 'field': {
                     'id': detection.field.id,
-                    'name': detection.field.name
+                    'name': detection.field.location.name
                 } if detection.field else None,
+                'camera_id': detection.camera_id,
                 'image_url': detection.image.url if detection.image else None,
                 'has_treatment': bool(detection.treatment_notes)
             })
@@ -212,11 +262,15 @@ def get_detection_detail(request, detection_id):
                 'detection_date': detection.detection_date.isoformat(),
                 'field': {
                     'id': detection.field.id,
-                    'name': detection.field.name,
+                    'name': detection.field.location.name,
                     'crop_type': detection.field.crop_type
                 } if detection.field else None,
                 'image_url': detection.image.url if detection.image else None,
                 'bbox': detection.bbox,
+                'model_version': detection.model_version,
+                'camera_id': detection.camera_id,
+                'latitude': detection.latitude,
+                'longitude': detection.longitude,
                 'treatment_notes': detection.treatment_notes,
                 'treatment_date': detection.treatment_date.isoformat() if detection.treatment_date else None,
                 'resolved_date': detection.resolved_date.isoformat() if detection.resolved_date else None
@@ -318,3 +372,171 @@ def get_disease_statistics(request):
         return Response({
             'error': str(e)
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+# ============================================
+# OUTBREAK MAP (region-wide, aggregated counts only)
+# ============================================
+
+def _outbreak_filters(request, default_days):
+    """bbox, days and disease query params (ValueError on bad input)"""
+    bbox = request.query_params.get('bbox')
+    days = int(request.query_params.get('days', default_days))
+    if not 1 <= days <= 366:
+        raise ValueError('days must be between 1 and 366')
+    return (
+        parse_bbox(bbox) if bbox else None,
+        days,
+        request.query_params.get('disease') or None,
+    )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_outbreak_heatmap(request):
+    """
+    Disease detection heatmap across all farms
+    
+    GET /api/disease/outbreaks/heatmap/
+    Query params:
+        - bbox: min_lon,min_lat,max_lon,max_lat (optional)
+        - precision: geohash length 2-6 (default 5, ~5 km cells)
+        - days: look-back window (default 30)
+        - disease: filter by disease name (optional)
+    """
+    try:
+        bbox, days, disease = _outbreak_filters(request, 30)
+        precision = int(request.query_params.get('precision', 5))
+    except ValueError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        return Response(heatmap(bbox, precision, days, disease), status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_outbreak_tile(request, z, x, y):
+    """
+    Heatmap cells for one XYZ map tile (cell size follows the zoom level)
+    
+    GET /api/disease/outbreaks/tiles/<z>/<x>/<y>/
+    Query params:
+        - days, disease: as for the heatmap
+    """
+    if z > 22 or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+        return Response({
+            'error': 'Invalid tile coordinates'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        _, days, disease = _outbreak_filters(request, 30)
+    except ValueError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        data = heatmap(tile_bbox(z, x, y), precision_for_zoom(z), days, disease)
+        data['tile'] = [z, x, y]
+        return Response(data, status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_outbreak_timeline(request):
+    """
+    Detections over time, per disease
+    
+    GET /api/disease/outbreaks/timeline/
+    Query params:
+        - bbox, disease: as for the heatmap
+        - days: look-back window (default 90)
+        - interval: day, week or month (default week)
+    """
+    interval = request.query_params.get('interval', 'week')
+    if interval not in TIMELINE_INTERVALS:
+        return Response({
+            'error': f"interval must be one of: {', '.join(TIMELINE_INTERVALS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        bbox, days, disease = _outbreak_filters(request, 90)
+    except ValueError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        return Response(timeline(bbox, days, disease, interval), status=status.HTTP_200_OK)
+    except Exception as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_outbreaks(request):
+    """
+    Disease outbreaks found by the clustering job
+    
+    GET /api/disease/outbreaks/
+    Query params:
+        - status: active or resolved (default active)
+        - bbox: min_lon,min_lat,max_lon,max_lat (optional)
+        - disease: filter by disease name (optional)
+    """
+    outbreak_status = request.query_params.get('status', 'active')
+    if outbreak_status not in dict(Outbreak.STATUS_CHOICES):
+        return Response({
+            'error': 'status must be active or resolved'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    outbreaks = Outbreak.objects.filter(status=outbreak_status)
+    try:
+        bbox = request.query_params.get('bbox')
+        if bbox:
+            min_lon, min_lat, max_lon, max_lat = parse_bbox(bbox)
+            outbreaks = outbreaks.filter(
+                latitude__gte=min_lat, latitude__lte=max_lat,
+                longitude__gte=min_lon, longitude__lte=max_lon,
+            )
+    except ValueError as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    disease = request.query_params.get('disease')
+    if disease:
+        outbreaks = outbreaks.filter(disease_name=disease)
+    
+    alerted = set(request.user.outbreak_alerts.values_list('id', flat=True))
+    data = [{
+        'id': outbreak.id,
+        'disease_name': outbreak.disease_name,
+        'status': outbreak.status,
+        'latitude': outbreak.latitude,
+        'longitude': outbreak.longitude,
+        'radius_km': round(outbreak.radius_km, 2),
+        'detection_count': outbreak.detection_count,
+        'farm_count': outbreak.farm_count,
+        'first_detected': outbreak.first_detected.isoformat(),
+        'last_detected': outbreak.last_detected.isoformat(),
+        'alerted': outbreak.id in alerted,
+    } for outbreak in outbreaks[:200]]
+    
+    return Response({
+        'count': len(data),
+        'outbreaks': data
+    }, status=status.HTTP_200_OK)
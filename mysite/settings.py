@@ -76,6 +76,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'mysite.wsgi.application'
+ASGI_APPLICATION = 'mysite.asgi.application'
 CORS_ALLOW_ALL_ORIGINS = True  # For development
 
 
@@ -158,7 +159,7 @@ CORS_ALLOW_CREDENTIALS = True
 # REST Framework Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'novaterra.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -190,6 +191,27 @@ SIMPLE_JWT = {
     'TOKEN_TYPE_CLAIM': 'token_type',
 }
 
+# Per-process cache of authenticated users (novaterra.authentication)
+# Revocations reach other processes within this many seconds
+JWT_USER_CACHE_TTL = 60
+JWT_USER_CACHE_SIZE = 10000
+
+# Per-process cache of field polygon indexes used to place geotagged photos
+# (novaterra.services.field_index)
+FIELD_INDEX_CACHE_TTL = 300
+FIELD_INDEX_CACHE_SIZE = 1000
+
+# Farm analytics (novaterra.services.analytics) are cached per user and data version
+# Uses the default cache (local memory unless CACHES is configured)
+ANALYTICS_CACHE_TTL = 60 * 60
+
+# Live event stream pub/sub (novaterra.services.event_bus)
+# The in-process backend only fans out within one ASGI worker
+EVENT_BUS = {
+    'BACKEND': 'novaterra.services.event_bus.InProcessBackend',
+    'OPTIONS': {},
+}
+
 # OpenWeather API Configuration
 from decouple import config
 OPENWEATHER_API_KEY = config('OPENWEATHER_API_KEY', default='')
@@ -200,6 +222,11 @@ TWILIO_ACCOUNT_SID = config('TWILIO_ACCOUNT_SID', default='')
 TWILIO_AUTH_TOKEN = config('TWILIO_AUTH_TOKEN', default='')
 TWILIO_PHONE_NUMBER = config('TWILIO_PHONE_NUMBER', default='')  # e.g., +1234567890
 
+# AI detection service and go2rtc streaming server
+# (disease_detection views, camera URLs and the frame sampler)
+AI_SERVICE_URL = config('AI_SERVICE_URL', default='http://localhost:5000')
+GO2RTC_URL = config('GO2RTC_URL', default='http://localhost:1984')
+
 # Media files (uploaded images)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
@@ -0,0 +1,130 @@
+# novaterra/authentication.py
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+# Claim carrying UserProfile.token_version (bumped to revoke all of a user's tokens)
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+class UserCache:
+    """
+    Small per-process LRU of authenticated users with a TTL
+
+    Entries are keyed by user id and remember the token version they were
+    loaded for; a token with another version is a miss. Other processes
+    only see invalidations once their entry expires, so keep the TTL short.
+    """
+
+    def __init__(self, ttl=60, max_size=10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            cached_version, user, expires_at = entry
+            if cached_version != version or expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+        # Each request gets its own copy so views can't mutate the cached one
+        return copy.copy(user)
+
+    def set(self, user_id, version, user):
+        with self._lock:
+            self._entries[user_id] = (version, user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(
+    ttl=getattr(settings, 'JWT_USER_CACHE_TTL', 60),
+    max_size=getattr(settings, 'JWT_USER_CACHE_SIZE', 10000),
+)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that serves the user from user_cache
+
+    The HS256 signature and expiry are verified on every request (no DB);
+    the User row is only loaded on a cache miss, together with the
+    profile's token_version, which must match the token's "ver" claim.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        version = validated_token.get(TOKEN_VERSION_CLAIM, 0)
+
+        user = user_cache.get(user_id, version)
+        if user is not None:
+            return user
+
+        try:
+            user = User.objects.annotate(
+                token_version=F('profile__token_version')
+            ).get(**{api_settings.USER_ID_FIELD: user_id})
+        except User.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if (user.token_version or 0) != version:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        user_cache.set(user_id, version, user)
+        return copy.copy(user)
+
+
+def issue_tokens(user):
+    """
+    Create a refresh/access token pair carrying the user's token version
+
+    Returns:
+        dict: {"refresh": str, "access": str}
+    """
+    refresh = RefreshToken.for_user(user)
+    refresh[TOKEN_VERSION_CLAIM] = user.profile.token_version
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
+
+
+def revoke_user_tokens(user):
+    """Invalidate every token issued to the user so far (e.g. password change)"""
+    from .models import UserProfile
+
+    UserProfile.objects.filter(user=user).update(token_version=F('token_version') + 1)
+    user.profile.refresh_from_db(fields=['token_version'])
+    user_cache.invalidate(user.id)
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from novaterra.models import Field
+from novaterra.services.agronomy import compute_field_indicators
+
+
+class Command(BaseCommand):
+    help = "Compute daily agronomic indicators (GDD, ET0, leaf wetness, fungal risk) for all fields"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=5, help="Days to compute, starting today")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Fields per vectorized batch")
+        parser.add_argument('--no-forecast', action='store_true', help="Use sensor readings only")
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        fields = Field.objects.select_related('location').order_by('pk')
+
+        total_fields = 0
+        total_rows = 0
+        last_pk = 0
+        while True:
+            chunk = list(fields.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+
+            total_rows += compute_field_indicators(
+                chunk,
+                days=options['days'],
+                use_forecast=not options['no_forecast'],
+            )
+            total_fields += len(chunk)
+            self.stdout.write(f"Processed {total_fields} fields")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {total_rows} indicator rows for {total_fields} fields"
+        ))
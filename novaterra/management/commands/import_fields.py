@@ -0,0 +1,42 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from novaterra.services.field_import import CROP_TYPES, FieldImportError, import_fields
+
+
+class Command(BaseCommand):
+    help = "Import field parcels for a user from GeoJSON, zipped Shapefile or KML."
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="GeoJSON (.geojson/.json), zipped Shapefile (.zip) or KML file")
+        parser.add_argument('--user', required=True, help="Username owning the fields")
+        parser.add_argument('--crop', default='other', choices=sorted(CROP_TYPES), help="Crop for features without a crop attribute")
+        parser.add_argument('--name-field', default=None, help="Feature attribute holding the field name")
+        parser.add_argument('--crop-field', default=None, help="Feature attribute holding the crop type")
+        parser.add_argument('--chunk-size', type=int, default=500, help="Features per chunk/transaction")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' not found")
+
+        try:
+            report = import_fields(
+                options['path'],
+                user,
+                default_crop=options['crop'],
+                name_field=options['name_field'],
+                crop_field=options['crop_field'],
+                chunk_size=options['chunk_size'],
+                log=self.stdout.write,
+            )
+        except FieldImportError as e:
+            raise CommandError(str(e))
+
+        for error in report['errors']:
+            self.stderr.write(f"Feature {error['feature']} ({error['name']}): {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {report['created']} fields created ({report['repaired']} repaired), "
+            f"{len(report['errors'])} skipped"
+        ))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from novaterra.services.onboarding import import_members, read_members
+
+
+class Command(BaseCommand):
+    help = (
+        "Onboard cooperative members from a CSV (header: username,password,email,"
+        "phone_number,farm_name,city) or JSON/JSON Lines file."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Members file")
+        parser.add_argument('--format', choices=['csv', 'json'], default=None, help="File format (default: from extension)")
+        parser.add_argument('--batch-size', type=int, default=500, help="Members per batch/transaction")
+        parser.add_argument('--workers', type=int, default=None, help="Password hashing processes (0 = inline)")
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('json' if path.lower().endswith(('.json', '.jsonl')) else 'csv')
+
+        try:
+            with open(path, encoding='utf-8-sig') as f:
+                data = f.read()
+        except OSError as e:
+            raise CommandError(str(e))
+
+        report = import_members(
+            read_members(data, file_format),
+            batch_size=options['batch_size'],
+            workers=options['workers'],
+            log=self.stdout.write,
+        )
+
+        for error in report['errors']:
+            self.stderr.write(f"Row {error['row']} ({error['username']}): {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {report['created']} members created, {len(report['errors'])} skipped"
+        ))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from novaterra.services.recommendation_pipeline import run_pipeline
+
+
+class Command(BaseCommand):
+    help = (
+        "Precompute advisor recommendations for all fields (run nightly after "
+        "compute_indicators, e.g. cron '30 2 * * *'). Use --resume to continue "
+        "an interrupted run from its last checkpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help="Fields per chunk/transaction")
+        parser.add_argument('--workers', type=int, default=None, help="Process pool size (0 = run inline)")
+        parser.add_argument('--resume', action='store_true', help="Continue from the last checkpoint")
+
+    def handle(self, *args, **options):
+        checkpoint = run_pipeline(
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            resume=options['resume'],
+            log=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {checkpoint.processed} fields processed"
+        ))
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from novaterra.models import Camera
+from novaterra.services.camera_health import DEFAULT_FAILURES_BEFORE_OFFLINE, probe_cameras
+
+
+class Command(BaseCommand):
+    help = "Check every camera's go2rtc stream concurrently and record latency and status"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=50, help="Probes in flight at once")
+        parser.add_argument('--timeout', type=float, default=5.0, help="Seconds before a probe fails")
+        parser.add_argument('--failures', type=int, default=DEFAULT_FAILURES_BEFORE_OFFLINE,
+                            help="Consecutive failures before a camera is marked offline")
+        parser.add_argument('--interval', type=float, default=None,
+                            help="Repeat every N seconds instead of running once")
+
+    def handle(self, *args, **options):
+        while True:
+            summary = probe_cameras(
+                Camera.objects.all(),
+                concurrency=options['concurrency'],
+                timeout=options['timeout'],
+                failures_before_offline=options['failures'],
+                log=self.stdout.write,
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f"Done: {summary['probed']} cameras, {summary['online']} online, "
+                f"{summary['offline']} offline, {summary['changed']} changed"
+            ))
+            if options['interval'] is None:
+                break
+            time.sleep(options['interval'])
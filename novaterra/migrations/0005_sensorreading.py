@@ -0,0 +1,29 @@
+# Generated by Django 5.1.14 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('novaterra', '0004_alter_camera_options_alter_camera_location_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SensorReading',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensor_type', models.CharField(choices=[('temperature', 'Temperature'), ('soil_moisture', 'Soil Moisture'), ('humidity', 'Humidity'), ('ph', 'Soil pH')], max_length=20)),
+                ('value', models.FloatField()),
+                ('recorded_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('field', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sensor_readings', to='novaterra.field')),
+            ],
+            options={
+                'ordering': ['-recorded_at'],
+                'indexes': [models.Index(fields=['field', 'sensor_type', 'recorded_at'], name='novaterra_s_field_i_7685f6_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.1.14 on 2026-10-19 10:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('novaterra', '0005_sensorreading'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FieldThreshold',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sensor_type', models.CharField(choices=[('temperature', 'Temperature'), ('soil_moisture', 'Soil Moisture'), ('humidity', 'Humidity'), ('ph', 'Soil pH')], max_length=20)),
+                ('min_value', models.FloatField(blank=True, null=True)),
+                ('max_value', models.FloatField(blank=True, null=True)),
+                ('max_rate_per_hour', models.FloatField(blank=True, help_text='Largest allowed change per hour', null=True)),
+                ('field', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='thresholds', to='novaterra.field')),
+            ],
+            options={
+                'unique_together': {('field', 'sensor_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Recommendation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('recommendation', 'Recommendation'), ('alert', 'Alert')], default='recommendation', max_length=20)),
+                ('source', models.CharField(choices=[('rules', 'Sensor Rules')], default='rules', max_length=20)),
+                ('category', models.CharField(max_length=50)),
+                ('priority', models.CharField(choices=[('low', 'Low'), ('medium', 'Medium'), ('high', 'High')], default='medium', max_length=10)),
+                ('title', models.CharField(max_length=200)),
+                ('description', models.TextField()),
+                ('confidence', models.FloatField(default=0.5)),
+                ('rule', models.CharField(blank=True, max_length=50)),
+                ('value', models.FloatField(blank=True, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('field', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to='novaterra.field')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recommendations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['user', 'is_active', '-created_at'], name='novaterra_r_user_id_01aeea_idx')],
+            },
+        ),
+    ]
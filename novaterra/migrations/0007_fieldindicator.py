@@ -0,0 +1,33 @@
+# Generated by Django 5.1.14 on 2026-10-19 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('novaterra', '0006_fieldthreshold_recommendation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FieldIndicator',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('tmin', models.FloatField(help_text='°C')),
+                ('tmax', models.FloatField(help_text='°C')),
+                ('gdd', models.FloatField(help_text='Growing degree days')),
+                ('et0', models.FloatField(help_text='Reference evapotranspiration (mm/day)')),
+                ('leaf_wetness_hours', models.FloatField()),
+                ('fungal_risk', models.FloatField(help_text='0-1')),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('field', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indicators', to='novaterra.field')),
+            ],
+            options={
+                'ordering': ['date'],
+                'unique_together': {('field', 'date')},
+            },
+        ),
+    ]
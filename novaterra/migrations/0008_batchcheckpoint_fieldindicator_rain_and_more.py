@@ -0,0 +1,37 @@
+# Generated by Django 5.1.14 on 2026-10-19 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('novaterra', '0007_fieldindicator'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BatchCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_name', models.CharField(max_length=100, unique=True)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('completed', 'Completed'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('last_pk', models.BigIntegerField(default=0, help_text='Last processed primary key')),
+                ('processed', models.IntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('started_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='fieldindicator',
+            name='rain',
+            field=models.FloatField(default=0, help_text='Forecast rain (mm/day)'),
+        ),
+        migrations.AlterField(
+            model_name='recommendation',
+            name='source',
+            field=models.CharField(choices=[('rules', 'Sensor Rules'), ('batch', 'Batch Advisor')], default='rules', max_length=20),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.14 on 2026-10-19 14:25
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_summary(apps, schema_editor):
+    UserProfile = apps.get_model('novaterra', 'UserProfile')
+    Field = apps.get_model('novaterra', 'Field')
+    Location = apps.get_model('novaterra', 'Location')
+    DiseaseDetection = apps.get_model('disease_detection', 'DiseaseDetection')
+
+    field_totals = {
+        row['owner_id']: row
+        for row in Field.objects.order_by().values('owner_id').annotate(n=Count('id'), area=Sum('area_size'))
+    }
+    detection_totals = dict(
+        DiseaseDetection.objects.order_by().values('user_id').annotate(n=Count('id')).values_list('user_id', 'n')
+    )
+    farm_cities = {}
+    for user_id, city in Location.objects.filter(location_type='farm').order_by('created_at').values_list('user_id', 'city'):
+        farm_cities[user_id] = city  # latest farm wins
+
+    profiles = list(UserProfile.objects.all())
+    for profile in profiles:
+        totals = field_totals.get(profile.user_id, {})
+        profile.field_count = totals.get('n') or 0
+        profile.total_area = totals.get('area') or 0
+        profile.detection_count = detection_totals.get(profile.user_id, 0)
+        profile.primary_city = farm_cities.get(profile.user_id, '')
+
+    UserProfile.objects.bulk_update(
+        profiles,
+        ['field_count', 'total_area', 'detection_count', 'primary_city'],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('novaterra', '0009_userprofile_token_version'),
+        ('disease_detection', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='detection_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='field_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='primary_city',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='total_area',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='in hectares', max_digits=12),
+        ),
+        migrations.RunPython(backfill_summary, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 5.1.14 on 2026-10-19 15:10
+
+from decimal import Decimal
+
+import django.contrib.gis.db.models.fields
+from django.contrib.gis.geos import Point
+from django.db import migrations, models
+from django.db.models import Sum
+
+
+def backfill_shape_metrics(apps, schema_editor):
+    from novaterra.services.geometry import shape_metrics
+
+    Location = apps.get_model('novaterra', 'Location')
+    Field = apps.get_model('novaterra', 'Field')
+    UserProfile = apps.get_model('novaterra', 'UserProfile')
+
+    metric_fields = ['area_m2', 'perimeter_m', 'centroid', 'min_lat', 'min_lon', 'max_lat', 'max_lon']
+    batch = []
+    for location in Location.objects.filter(shape__isnull=False).iterator(chunk_size=1000):
+        metrics = shape_metrics(location.shape)
+        lon, lat = metrics.pop('centroid')
+        location.centroid = Point(lon, lat, srid=4326)
+        for name, value in metrics.items():
+            setattr(location, name, value)
+        batch.append(location)
+        if len(batch) >= 1000:
+            Location.objects.bulk_update(batch, metric_fields)
+            batch = []
+    if batch:
+        Location.objects.bulk_update(batch, metric_fields)
+
+    # Areas auto-filled by the old Field.save were square degrees (far below 1 m²)
+    fields = list(
+        Field.objects.filter(area_size__lt=Decimal('0.0001'), location__area_m2__isnull=False)
+        .select_related('location')
+    )
+    for field in fields:
+        field.area_size = Decimal(field.location.area_m2 / 10000).quantize(Decimal('0.01'))
+    Field.objects.bulk_update(fields, ['area_size'], batch_size=1000)
+
+    for owner_id in {field.owner_id for field in fields}:
+        total = Field.objects.filter(owner_id=owner_id).aggregate(total=Sum('area_size'))['total']
+        UserProfile.objects.filter(user_id=owner_id).update(total_area=total or 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('novaterra', '0010_userprofile_summary_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='area_m2',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='centroid',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, geography=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='max_lat',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='max_lon',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='min_lat',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='min_lon',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='perimeter_m',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.RunPython(backfill_shape_metrics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.14 on 2026-10-19 15:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('novaterra', '0011_location_shape_metrics'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
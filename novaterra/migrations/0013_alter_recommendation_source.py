@@ -0,0 +1,18 @@
+# Generated by Django 5.1.14 on 2026-10-19 17:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('novaterra', '0012_userprofile_data_version'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recommendation',
+            name='source',
+            field=models.CharField(choices=[('rules', 'Sensor Rules'), ('batch', 'Batch Advisor'), ('outbreak', 'Outbreak Detection')], default='rules', max_length=20),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.14 on 2026-10-19 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('novaterra', '0013_alter_recommendation_source'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camera',
+            name='failure_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='last_checked',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='last_error',
+            field=models.CharField(blank=True, max_length=200),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='last_seen',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='latency_ms',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='status',
+            field=models.CharField(choices=[('unknown', 'Not Checked'), ('online', 'Online'), ('offline', 'Offline')], default='unknown', max_length=10),
+        ),
+    ]
@@ -1,8 +1,13 @@
 # novaterra/models.py
 
+from decimal import Decimal
+
+from django.conf import settings
 from django.contrib.gis.db import models as geomodels
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models import Count, F, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.contrib.gis.geos import Point
 
@@ -18,19 +23,58 @@ class UserProfile(geomodels.Model):
     farm_name = geomodels.CharField(max_length=200, default="My Farm")
     phone_number = geomodels.CharField(max_length=20, blank=True)
     
+    # Bumped to revoke every JWT issued so far (see novaterra/authentication.py)
+    token_version = geomodels.PositiveIntegerField(default=0)
+    
+    # Denormalized summary, maintained by the signals below (served by /api/user/)
+    field_count = geomodels.PositiveIntegerField(default=0)
+    total_area = geomodels.DecimalField(max_digits=12, decimal_places=2, default=0, help_text="in hectares")
+    detection_count = geomodels.PositiveIntegerField(default=0)
+    primary_city = geomodels.CharField(max_length=100, blank=True)
+    
+    # Bumped whenever fields, field geometries or detections change (analytics cache key)
+    data_version = geomodels.PositiveIntegerField(default=0)
+    
     # Metadata
     created_at = geomodels.DateTimeField(auto_now_add=True)
     updated_at = geomodels.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.user.username}'s Profile"
+    
+    @classmethod
+    def bump_data_version(cls, user_id):
+        """Invalidate cached analytics after a change the summary signals do not see"""
+        cls.objects.filter(user_id=user_id).update(data_version=F('data_version') + 1)
+    
+    @classmethod
+    def refresh_field_summary(cls, user_id):
+        """Recount fields and total area in a single UPDATE (atomic in the DB)"""
+        user_fields = Field.objects.filter(owner_id=user_id).order_by().values('owner_id')
+        cls.objects.filter(user_id=user_id).update(
+            data_version=F('data_version') + 1,
+            field_count=Coalesce(Subquery(user_fields.annotate(n=Count('id')).values('n')), 0),
+            total_area=Coalesce(
+                Subquery(user_fields.annotate(area=Sum('area_size')).values('area')),
+                Value(Decimal('0')),
+                output_field=geomodels.DecimalField(max_digits=12, decimal_places=2),
+            ),
+        )
+    
+    @classmethod
+    def refresh_primary_city(cls, user_id):
+        """Primary city is the city of the user's (latest) farm headquarters"""
+        farm_city = Location.objects.filter(user_id=user_id, location_type='farm').values('city')[:1]
+        cls.objects.filter(user_id=user_id).update(
+            primary_city=Coalesce(Subquery(farm_city), Value(''))
+        )
 
 
-# Auto-create profile when user registers
+# Auto-create profile when user registers (unless it was created explicitly)
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
     if created:
-        UserProfile.objects.create(user=instance)
+        UserProfile.objects.get_or_create(user=instance)
 
 
 # ============================================
@@ -58,16 +102,75 @@ class Location(geomodels.Model):
     region = geomodels.CharField(max_length=100, blank=True)  # "Nabeul Governorate"
     address = geomodels.TextField(blank=True)
     
+    # Shape derivatives (geodesic, computed on save when the shape changes)
+    area_m2 = geomodels.FloatField(null=True, blank=True)
+    perimeter_m = geomodels.FloatField(null=True, blank=True)
+    centroid = geomodels.PointField(geography=True, null=True, blank=True)
+    min_lat = geomodels.FloatField(null=True, blank=True, db_index=True)
+    min_lon = geomodels.FloatField(null=True, blank=True, db_index=True)
+    max_lat = geomodels.FloatField(null=True, blank=True, db_index=True)
+    max_lon = geomodels.FloatField(null=True, blank=True, db_index=True)
+    
     # Metadata
     created_at = geomodels.DateTimeField(auto_now_add=True)
     updated_at = geomodels.DateTimeField(auto_now=True)
     
+    SHAPE_METRIC_FIELDS = ['area_m2', 'perimeter_m', 'centroid', 'min_lat', 'min_lon', 'max_lat', 'max_lon']
+    
     class Meta:
         ordering = ['-created_at']
     
     def __str__(self):
         return f"{self.user.username} - {self.name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Keep a reference to the loaded geometry (no serialization); assigning
+        # a new shape replaces the object, which save() detects by identity
+        instance._loaded_shape = instance.shape if 'shape' in field_names else None
+        return instance
+    
+    def update_shape_metrics(self):
+        """Recompute area, perimeter, centroid and bbox from the current shape"""
+        from .services.geometry import shape_metrics
+        
+        if self.shape is None:
+            for name in self.SHAPE_METRIC_FIELDS:
+                setattr(self, name, None)
+            return
+        metrics = shape_metrics(self.shape)
+        lon, lat = metrics.pop('centroid')
+        self.centroid = Point(lon, lat, srid=4326)
+        for name, value in metrics.items():
+            setattr(self, name, value)
+    
+    def save(self, *args, **kwargs):
+        """
+        Recompute shape metrics when the shape changed: new instance, shape
+        reassigned, or 'shape' in update_fields (use that after editing the
+        geometry in place); an existing location's change bumps the owner's
+        data_version so cached analytics (mapped area) are recomputed
+        """
+        geometry_changed = False
+        if 'shape' not in self.get_deferred_fields():
+            update_fields = kwargs.get('update_fields')
+            shape_saved = update_fields is not None and 'shape' in update_fields
+            if (
+                self._state.adding
+                or shape_saved
+                or self.shape is not getattr(self, '_loaded_shape', None)
+                or (self.shape is not None and self.min_lat is None)
+            ):
+                geometry_changed = not self._state.adding
+                self.update_shape_metrics()
+                if shape_saved:
+                    kwargs['update_fields'] = set(update_fields) | set(self.SHAPE_METRIC_FIELDS)
+            self._loaded_shape = self.shape
+        super().save(*args, **kwargs)
+        if geometry_changed:
+            UserProfile.bump_data_version(self.user_id)
+    
     @property
     def latitude(self):
         """Helper property to get latitude from point"""
@@ -130,13 +233,27 @@ class Field(geomodels.Model):
         return f"{self.location.name} - {self.crop_type}"
     
     def save(self, *args, **kwargs):
-        """Auto-calculate area from shape if available"""
-        if self.location.shape and not self.area_size:
+        """Auto-calculate area from the location's geodesic shape area if not given"""
+        if not self.area_size and self.location.area_m2:
             # Calculate area in hectares (1 hectare = 10,000 m²)
-            self.area_size = self.location.shape.area / 10000
+            self.area_size = Decimal(self.location.area_m2 / 10000).quantize(Decimal('0.01'))
         super().save(*args, **kwargs)
 
 
+# Keep UserProfile summary counters in sync
+@receiver([post_save, post_delete], sender=Field)
+def update_field_summary(sender, instance, **kwargs):
+    UserProfile.refresh_field_summary(instance.owner_id)
+
+
+@receiver([post_save, post_delete], sender=Location)
+def update_primary_city(sender, instance, **kwargs):
+    if getattr(instance, '_summary_synced', False):
+        return
+    if instance.location_type == 'farm':
+        UserProfile.refresh_primary_city(instance.user_id)
+
+
 # ============================================
 # STOCK / INVENTORY
 # ============================================
@@ -192,8 +309,18 @@ class Stock(geomodels.Model):
 # ============================================
 # CAMERA (Surveillance cameras for novaterra app)
 # ============================================
+# go2rtc server the camera URLs point at
+GO2RTC_URL = getattr(settings, 'GO2RTC_URL', 'http://localhost:1984')
+
+
 class Camera(geomodels.Model):
     """Surveillance cameras"""
+    STATUS_CHOICES = [
+        ('unknown', 'Not Checked'),
+        ('online', 'Online'),
+        ('offline', 'Offline'),
+    ]
+    
     owner = geomodels.ForeignKey(User, on_delete=geomodels.CASCADE, related_name='novaterra_cameras')
     location = geomodels.ForeignKey(Location, on_delete=geomodels.CASCADE, related_name='novaterra_cameras')
     
@@ -201,6 +328,14 @@ class Camera(geomodels.Model):
     stream_url = geomodels.URLField(blank=True)
     is_active = geomodels.BooleanField(default=True)
     
+    # Stream health, written by the probe_cameras job (services/camera_health.py)
+    status = geomodels.CharField(max_length=10, choices=STATUS_CHOICES, default='unknown')
+    latency_ms = geomodels.FloatField(null=True, blank=True)
+    last_seen = geomodels.DateTimeField(null=True, blank=True)
+    last_checked = geomodels.DateTimeField(null=True, blank=True)
+    failure_count = geomodels.PositiveIntegerField(default=0)  # Consecutive failed probes
+    last_error = geomodels.CharField(max_length=200, blank=True)
+    
     created_at = geomodels.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -217,20 +352,185 @@ class Camera(geomodels.Model):
     
     def get_stream_url(self):
         """Get go2rtc web player URL"""
-        return f"http://localhost:1984/stream.html?src={self.get_camera_id()}"
+        return f"{GO2RTC_URL}/stream.html?src={self.get_camera_id()}"
     
     def get_go2rtc_url(self):
         """Get go2rtc API URL"""
-        return f"http://localhost:1984/api/streams/{self.get_camera_id()}"
+        return f"{GO2RTC_URL}/api/streams/{self.get_camera_id()}"
     
     def get_go2rtc_iframe_url(self):
         """Get go2rtc iframe embed URL"""
-        return f"http://localhost:1984/streams/{self.get_camera_id()}"
+        return f"{GO2RTC_URL}/streams/{self.get_camera_id()}"
     
     def get_hls_url(self):
         """Get HLS stream URL for video.js"""
-        return f"http://localhost:1984/api/streams/{self.get_camera_id()}.m3u8"
+        return f"{GO2RTC_URL}/api/streams/{self.get_camera_id()}.m3u8"
     
     def get_webrtc_url(self):
         """Get WebRTC stream URL"""
-        return f"http://localhost:1984/api/webrtc?src={self.get_camera_id()}"
+        return f"{GO2RTC_URL}/api/webrtc?src={self.get_camera_id()}"
+    
+    def get_frame_url(self):
+        """Get current JPEG snapshot URL (used by the frame sampler)"""
+        return f"{GO2RTC_URL}/api/frame.jpeg?src={self.get_camera_id()}"
+    
+    def get_probe_url(self):
+        """Lightweight go2rtc stream info URL for health probes (no snapshot encode)"""
+        return f"{GO2RTC_URL}/api/streams?src={self.get_camera_id()}"
+    
+    def health(self):
+        """Stream health as served by the camera and farm-data APIs"""
+        return {
+            'status': self.status,
+            'latency_ms': self.latency_ms,
+            'last_seen': self.last_seen.isoformat() if self.last_seen else None,
+            'last_checked': self.last_checked.isoformat() if self.last_checked else None,
+            'failure_count': self.failure_count,
+            'last_error': self.last_error,
+        }
+
+
+# ============================================
+# SENSOR READINGS (IoT time series)
+# ============================================
+class SensorReading(geomodels.Model):
+    """Single IoT sensor measurement for a field"""
+    SENSOR_TYPE_CHOICES = [
+        ('temperature', 'Temperature'),
+        ('soil_moisture', 'Soil Moisture'),
+        ('humidity', 'Humidity'),
+        ('ph', 'Soil pH'),
+    ]
+    
+    field = geomodels.ForeignKey(Field, on_delete=geomodels.CASCADE, related_name='sensor_readings')
+    sensor_type = geomodels.CharField(max_length=20, choices=SENSOR_TYPE_CHOICES)
+    value = geomodels.FloatField()
+    recorded_at = geomodels.DateTimeField()
+    
+    created_at = geomodels.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-recorded_at']
+        indexes = [
+            geomodels.Index(fields=['field', 'sensor_type', 'recorded_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.field_id} - {self.sensor_type}: {self.value}"
+
+
+# ============================================
+# AGRONOMIC INDICATORS (daily, per field)
+# ============================================
+class FieldIndicator(geomodels.Model):
+    """Precomputed daily agronomic indicators (see services/agronomy.py)"""
+    field = geomodels.ForeignKey(Field, on_delete=geomodels.CASCADE, related_name='indicators')
+    date = geomodels.DateField()
+    
+    tmin = geomodels.FloatField(help_text="°C")
+    tmax = geomodels.FloatField(help_text="°C")
+    gdd = geomodels.FloatField(help_text="Growing degree days")
+    et0 = geomodels.FloatField(help_text="Reference evapotranspiration (mm/day)")
+    rain = geomodels.FloatField(default=0, help_text="Forecast rain (mm/day)")
+    leaf_wetness_hours = geomodels.FloatField()
+    fungal_risk = geomodels.FloatField(help_text="0-1")
+    
+    computed_at = geomodels.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['date']
+        unique_together = ['field', 'date']
+    
+    def __str__(self):
+        return f"{self.field_id} - {self.date}"
+
+
+# ============================================
+# ADVISOR (Thresholds & Recommendations)
+# ============================================
+class FieldThreshold(geomodels.Model):
+    """Per-field sensor limits used by the rule engine (overrides defaults)"""
+    field = geomodels.ForeignKey(Field, on_delete=geomodels.CASCADE, related_name='thresholds')
+    sensor_type = geomodels.CharField(max_length=20, choices=SensorReading.SENSOR_TYPE_CHOICES)
+    
+    min_value = geomodels.FloatField(null=True, blank=True)
+    max_value = geomodels.FloatField(null=True, blank=True)
+    max_rate_per_hour = geomodels.FloatField(null=True, blank=True, help_text="Largest allowed change per hour")
+    
+    class Meta:
+        unique_together = ['field', 'sensor_type']
+    
+    def __str__(self):
+        return f"{self.field_id} - {self.sensor_type} [{self.min_value}, {self.max_value}]"
+
+
+class Recommendation(geomodels.Model):
+    """Advisor output (recommendations and alerts) served by /api/advisor/recommendations/"""
+    KIND_CHOICES = [
+        ('recommendation', 'Recommendation'),
+        ('alert', 'Alert'),
+    ]
+    
+    PRIORITY_CHOICES = [
+        ('low', 'Low'),
+        ('medium', 'Medium'),
+        ('high', 'High'),
+    ]
+    
+    SOURCE_CHOICES = [
+        ('rules', 'Sensor Rules'),
+        ('batch', 'Batch Advisor'),
+        ('outbreak', 'Outbreak Detection'),
+    ]
+    
+    user = geomodels.ForeignKey(User, on_delete=geomodels.CASCADE, related_name='recommendations')
+    field = geomodels.ForeignKey(Field, on_delete=geomodels.CASCADE, null=True, blank=True, related_name='recommendations')
+    
+    kind = geomodels.CharField(max_length=20, choices=KIND_CHOICES, default='recommendation')
+    source = geomodels.CharField(max_length=20, choices=SOURCE_CHOICES, default='rules')
+    category = geomodels.CharField(max_length=50)  # "irrigation", "disease_prevention"...
+    priority = geomodels.CharField(max_length=10, choices=PRIORITY_CHOICES, default='medium')
+    title = geomodels.CharField(max_length=200)
+    description = geomodels.TextField()
+    confidence = geomodels.FloatField(default=0.5)
+    
+    # Rule that produced it (e.g. "soil_moisture:low") and the triggering value
+    rule = geomodels.CharField(max_length=50, blank=True)
+    value = geomodels.FloatField(null=True, blank=True)
+    
+    is_active = geomodels.BooleanField(default=True)
+    created_at = geomodels.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            geomodels.Index(fields=['user', 'is_active', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.title}"
+
+
+# ============================================
+# BATCH JOBS
+# ============================================
+class BatchCheckpoint(geomodels.Model):
+    """Progress of a resumable batch job (e.g. precompute_recommendations)"""
+    STATUS_CHOICES = [
+        ('running', 'Running'),
+        ('completed', 'Completed'),
+        ('failed', 'Failed'),
+    ]
+    
+    job_name = geomodels.CharField(max_length=100, unique=True)
+    status = geomodels.CharField(max_length=20, choices=STATUS_CHOICES, default='running')
+    last_pk = geomodels.BigIntegerField(default=0, help_text="Last processed primary key")
+    processed = geomodels.IntegerField(default=0)
+    error = geomodels.TextField(blank=True)
+    
+    started_at = geomodels.DateTimeField()
+    updated_at = geomodels.DateTimeField(auto_now=True)
+    finished_at = geomodels.DateTimeField(null=True, blank=True)
+    
+    def __str__(self):
+        return f"{self.job_name} ({self.status}, {self.processed} processed)"
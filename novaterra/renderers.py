@@ -0,0 +1,122 @@
+# novaterra/renderers.py
+
+import json
+import struct
+import sys
+from array import array
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+
+# Units for each sensor type reported by the IoT endpoints
+SENSOR_UNITS = {
+    'temperature': '°C',
+    'soil_moisture': '%',
+    'humidity': '%',
+    'ph': 'pH',
+}
+
+
+def build_columnar_series(timestamps, series):
+    """
+    Build the columnar payload for a sensor series
+
+    Args:
+        timestamps (list): Aware datetimes shared by every series, ascending
+        series (dict): sensor_type -> list of values (same length as timestamps)
+
+    Returns:
+        dict: {"timestamps": {"start": epoch, "deltas": [...]}, "series": {...}}
+              deltas[i] is the number of seconds since timestamps[i - 1]
+              (deltas[0] is always 0)
+    """
+    epochs = [int(ts.timestamp()) for ts in timestamps]
+    start = epochs[0] if epochs else 0
+    deltas = [0] + [curr - prev for prev, curr in zip(epochs, epochs[1:])] if epochs else []
+
+    return {
+        'timestamps': {
+            'start': start,
+            'deltas': deltas,
+        },
+        'series': {
+            sensor_type: {
+                'unit': SENSOR_UNITS.get(sensor_type, ''),
+                'values': values,
+            }
+            for sensor_type, values in series.items()
+        },
+    }
+
+
+class ColumnarJSONRenderer(JSONRenderer):
+    """
+    Columnar sensor series as JSON
+
+    Accept: application/vnd.novaterra.columnar+json  (or ?format=columnar)
+    """
+    media_type = 'application/vnd.novaterra.columnar+json'
+    format = 'columnar'
+
+
+class PackedSeriesRenderer(BaseRenderer):
+    """
+    Columnar sensor series packed as little-endian binary
+
+    Accept: application/vnd.novaterra.columnar+binary  (or ?format=packed)
+
+    Layout:
+        header   '<4sBBIq'  magic b'NTSC', version, series count, point count, start epoch
+        deltas   int32[point count]
+        for each series:
+            uint8 name length, name (utf-8), uint8 unit length, unit (utf-8)
+            float32[point count] values
+    """
+    media_type = 'application/vnd.novaterra.columnar+binary'
+    format = 'packed'
+    charset = None
+    render_style = 'binary'
+
+    MAGIC = b'NTSC'
+    VERSION = 1
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        # Errors (404, 500...) have no series to pack - send them as plain JSON
+        if 'timestamps' not in data or 'series' not in data:
+            response = (renderer_context or {}).get('response')
+            if response is not None:
+                response['Content-Type'] = 'application/json'
+            return json.dumps(data).encode('utf-8')
+
+        deltas = data['timestamps']['deltas']
+        series = data['series']
+
+        chunks = [struct.pack(
+            '<4sBBIq',
+            self.MAGIC,
+            self.VERSION,
+            len(series),
+            len(deltas),
+            data['timestamps']['start'],
+        )]
+        chunks.append(self._pack('i', deltas))
+
+        for sensor_type, column in series.items():
+            name = sensor_type.encode('utf-8')
+            unit = column.get('unit', '').encode('utf-8')
+            chunks.append(struct.pack('<B', len(name)) + name)
+            chunks.append(struct.pack('<B', len(unit)) + unit)
+            chunks.append(self._pack('f', column['values']))
+
+        return b''.join(chunks)
+
+    @staticmethod
+    def _pack(typecode, values):
+        """Pack a list of numbers as a little-endian typed array"""
+        packed = array(typecode, values)
+        if sys.byteorder == 'big':
+            packed.byteswap()
+        return packed.tobytes()
@@ -0,0 +1,324 @@
+# novaterra/services/agronomy.py
+
+import warnings
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.utils import timezone
+
+from ..models import FieldIndicator, SensorReading
+from .weather_service import WeatherService
+
+
+# Base temperature (°C) for growing degree days per Field.crop_type
+GDD_BASE_TEMPERATURE = {
+    'tomato': 10.0,
+    'olives': 10.0,
+    'wheat': 0.0,
+    'potato': 7.0,
+    'citrus': 13.0,
+    'dates': 18.0,
+    'grapes': 10.0,
+    'vegetables': 10.0,
+    'other': 10.0,
+}
+
+# Relative humidity (%) above which foliage is counted as wet
+LEAF_WETNESS_RH = 90.0
+
+# FAO-56 constants
+STEFAN_BOLTZMANN = 4.903e-9      # MJ K-4 m-2 day-1
+SOLAR_CONSTANT = 0.0820          # MJ m-2 min-1
+WIND_10M_TO_2M = 4.87 / np.log(67.8 * 10 - 5.42)
+
+# Fallbacks when a series has no wind / cloud / pressure / humidity data (e.g. sensors only)
+DEFAULT_WIND_SPEED = 2.0         # m/s at 2 m (FAO-56 recommendation)
+DEFAULT_CLOUDS = 30.0            # %
+DEFAULT_PRESSURE = 101.3         # kPa
+DEFAULT_HUMIDITY = 60.0          # % mean relative humidity
+
+
+def _nan_reduce(func, values, axis):
+    """nanmean/nanmax/... without the all-NaN RuntimeWarning"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        return func(values, axis=axis)
+
+
+def daily_aggregate(values, day_index, n_days, func):
+    """
+    Reduce (n_fields, n_steps) samples to (n_fields, n_days)
+
+    Args:
+        values (ndarray): samples, NaN where missing
+        day_index (ndarray): day of each sample (same shape), -1 to ignore
+        n_days (int): number of days
+        func: NaN-aware reducer (np.nanmean, np.nanmax, np.nansum...)
+    """
+    out = np.full((values.shape[0], n_days), np.nan)
+    for day in range(n_days):
+        out[:, day] = _nan_reduce(func, np.where(day_index == day, values, np.nan), axis=1)
+    return out
+
+
+def growing_degree_days(tmin, tmax, base):
+    """
+    Daily growing degree days (averaging method)
+
+    Args:
+        tmin, tmax (ndarray): (n_fields, n_days) daily extremes in °C
+        base (ndarray): (n_fields,) base temperature per field
+    """
+    return np.clip((tmin + tmax) / 2 - base[:, None], 0, None)
+
+
+def saturation_vapour_pressure(temperature):
+    """e°(T) in kPa (FAO-56 eq. 11)"""
+    return 0.6108 * np.exp(17.27 * temperature / (temperature + 237.3))
+
+
+def extraterrestrial_radiation(latitude, day_of_year):
+    """
+    Ra in MJ m-2 day-1 and daylight hours N (FAO-56 eq. 21, 34)
+
+    Args:
+        latitude (ndarray): (n_fields,) degrees
+        day_of_year (ndarray): (n_days,) 1-366
+    """
+    phi = np.radians(latitude)[:, None]
+    j = day_of_year[None, :]
+    dr = 1 + 0.033 * np.cos(2 * np.pi * j / 365)
+    delta = 0.409 * np.sin(2 * np.pi * j / 365 - 1.39)
+    ws = np.arccos(np.clip(-np.tan(phi) * np.tan(delta), -1, 1))
+    ra = (24 * 60 / np.pi) * SOLAR_CONSTANT * dr * (
+        ws * np.sin(phi) * np.sin(delta) + np.cos(phi) * np.cos(delta) * np.sin(ws)
+    )
+    return ra, 24 / np.pi * ws
+
+
+def reference_evapotranspiration(tmin, tmax, rh_mean, wind_2m, clouds, pressure, latitude, day_of_year):
+    """
+    FAO-56 Penman-Monteith reference evapotranspiration ET0 (mm/day)
+
+    Solar radiation is estimated from cloud cover (Angstrom, n/N = 1 - clouds)
+    since the forecast does not report it. All inputs are (n_fields, n_days)
+    except latitude (n_fields,) and day_of_year (n_days,).
+    """
+    tmean = (tmin + tmax) / 2
+    delta = 4098 * saturation_vapour_pressure(tmean) / (tmean + 237.3) ** 2
+    gamma = 0.000665 * pressure
+
+    es = (saturation_vapour_pressure(tmax) + saturation_vapour_pressure(tmin)) / 2
+    ea = es * np.clip(rh_mean, 0, 100) / 100
+
+    ra, daylight_hours = extraterrestrial_radiation(latitude, day_of_year)
+    sunshine_ratio = np.clip(1 - clouds / 100, 0, 1)
+    rs = (0.25 + 0.50 * sunshine_ratio) * ra
+    rso = 0.75 * ra
+    rns = (1 - 0.23) * rs
+    rnl = STEFAN_BOLTZMANN * ((tmax + 273.16) ** 4 + (tmin + 273.16) ** 4) / 2 \
+        * (0.34 - 0.14 * np.sqrt(ea)) \
+        * (1.35 * np.clip(rs / np.where(rso > 0, rso, np.nan), 0, 1) - 0.35)
+    rn = rns - rnl
+
+    et0 = (0.408 * delta * rn + gamma * (900 / (tmean + 273)) * wind_2m * (es - ea)) \
+        / (delta + gamma * (1 + 0.34 * wind_2m))
+    return np.clip(et0, 0, None)
+
+
+def leaf_wetness_hours(humidity, step_hours, day_index, n_days):
+    """Hours per day with relative humidity at or above LEAF_WETNESS_RH"""
+    wet = np.where(np.isnan(humidity), np.nan, (humidity >= LEAF_WETNESS_RH) * step_hours)
+    return daily_aggregate(wet, day_index, n_days, np.nansum)
+
+
+def fungal_risk_index(wetness_hours, wet_temperature):
+    """
+    Fungal infection risk (0-1) from daily leaf wetness duration and the
+    mean temperature during wet hours: most foliar pathogens need 6-12 h of
+    wetness and are favoured around 15-25 °C.
+    """
+    wetness_factor = np.clip((wetness_hours - 2) / 10, 0, 1)
+    temperature_factor = np.exp(-(((wet_temperature - 20) / 7) ** 2))
+    return np.nan_to_num(wetness_factor * temperature_factor)
+
+
+def compute_indicators(series, latitude, gdd_base, start_date, n_days):
+    """
+    Compute daily indicators for many fields in one vectorized pass
+
+    Args:
+        series (dict): (n_fields, n_steps) arrays 'timestamp' (epoch seconds),
+            'temperature' (°C), 'humidity' (%), 'wind_speed' (m/s at 10 m),
+            'clouds' (%), 'pressure' (kPa), 'rain' (mm per sample),
+            'step_hours'; NaN where missing
+        latitude (ndarray): (n_fields,)
+        gdd_base (ndarray): (n_fields,)
+        start_date (date): first day
+        n_days (int): number of days
+
+    Returns:
+        dict: (n_fields, n_days) arrays tmin, tmax, gdd, et0, rain,
+              leaf_wetness_hours, fungal_risk
+    """
+    start_epoch = datetime(start_date.year, start_date.month, start_date.day, tzinfo=dt_timezone.utc).timestamp()
+    day_index = np.floor((series['timestamp'] - start_epoch) / 86400)
+    day_index = np.where(np.isnan(day_index) | (day_index < 0) | (day_index >= n_days), -1, day_index).astype(int)
+
+    temperature = series['temperature']
+    humidity = series['humidity']
+
+    tmin = daily_aggregate(temperature, day_index, n_days, np.nanmin)
+    tmax = daily_aggregate(temperature, day_index, n_days, np.nanmax)
+    rh_mean = np.nan_to_num(daily_aggregate(humidity, day_index, n_days, np.nanmean), nan=DEFAULT_HUMIDITY)
+    wind_2m = np.nan_to_num(daily_aggregate(series['wind_speed'], day_index, n_days, np.nanmean), nan=DEFAULT_WIND_SPEED / WIND_10M_TO_2M) * WIND_10M_TO_2M
+    clouds = np.nan_to_num(daily_aggregate(series['clouds'], day_index, n_days, np.nanmean), nan=DEFAULT_CLOUDS)
+    pressure = np.nan_to_num(daily_aggregate(series['pressure'], day_index, n_days, np.nanmean), nan=DEFAULT_PRESSURE)
+
+    day_of_year = np.array([(start_date + timedelta(days=d)).timetuple().tm_yday for d in range(n_days)])
+
+    wetness = leaf_wetness_hours(humidity, series['step_hours'], day_index, n_days)
+    wet_temperature = daily_aggregate(
+        np.where(humidity >= LEAF_WETNESS_RH, temperature, np.nan), day_index, n_days, np.nanmean
+    )
+
+    return {
+        'tmin': tmin,
+        'tmax': tmax,
+        'gdd': growing_degree_days(tmin, tmax, gdd_base),
+        'et0': reference_evapotranspiration(tmin, tmax, rh_mean, wind_2m, clouds, pressure, latitude, day_of_year),
+        'rain': daily_aggregate(series['rain'], day_index, n_days, np.nansum),
+        'leaf_wetness_hours': wetness,
+        'fungal_risk': fungal_risk_index(wetness, wet_temperature),
+    }
+
+
+# ============================================
+# Batch job: fields -> FieldIndicator cache
+# ============================================
+
+def _forecast_samples(forecast):
+    """WeatherService forecast -> list of sample tuples"""
+    return [
+        (
+            item['date'],
+            item['temperature'],
+            item['humidity'],
+            item['wind_speed'] / 3.6 if item.get('wind_speed') is not None else np.nan,  # km/h -> m/s
+            item.get('clouds', np.nan),
+            item['pressure'] / 10 if item.get('pressure') else np.nan,  # hPa -> kPa
+            item.get('rain', np.nan),
+            3.0,
+        )
+        for item in forecast
+    ]
+
+
+def _sensor_samples(field_ids, since):
+    """Hourly temperature/humidity samples from SensorReading, per field"""
+    buckets = defaultdict(lambda: defaultdict(dict))
+    readings = SensorReading.objects.filter(
+        field_id__in=field_ids,
+        sensor_type__in=['temperature', 'humidity'],
+        recorded_at__gte=since,
+    ).values_list('field_id', 'sensor_type', 'value', 'recorded_at')
+
+    for field_id, sensor_type, value, recorded_at in readings.iterator(chunk_size=5000):
+        hour = int(recorded_at.timestamp()) // 3600 * 3600
+        buckets[field_id][hour].setdefault(sensor_type, []).append(value)
+
+    samples = {}
+    for field_id, hours in buckets.items():
+        samples[field_id] = [
+            (
+                hour,
+                float(np.mean(values['temperature'])) if 'temperature' in values else np.nan,
+                float(np.mean(values['humidity'])) if 'humidity' in values else np.nan,
+                np.nan, np.nan, np.nan, np.nan,
+                1.0,
+            )
+            for hour, values in sorted(hours.items())
+        ]
+    return samples
+
+
+def compute_field_indicators(fields, days=5, use_forecast=True):
+    """
+    Compute and cache indicators (today + following days) for a batch of fields
+
+    Sensor readings since midnight are combined with the forecast; fields
+    sharing a ~1 km forecast cell share one WeatherService call.
+
+    Args:
+        fields (list): Field instances (with location selected)
+        days (int): number of days starting today
+        use_forecast (bool): fetch WeatherService forecasts
+
+    Returns:
+        int: number of FieldIndicator rows written
+    """
+    fields = [f for f in fields if f.location.point]
+    if not fields:
+        return 0
+
+    today = timezone.now().date()
+    since = datetime(today.year, today.month, today.day, tzinfo=dt_timezone.utc)
+
+    samples = {f.id: [] for f in fields}
+
+    if use_forecast:
+        forecasts = {}
+        for field in fields:
+            cell = (round(field.location.latitude, 2), round(field.location.longitude, 2))
+            if cell not in forecasts:
+                forecasts[cell] = WeatherService.get_5day_forecast(latitude=cell[0], longitude=cell[1]) or []
+            samples[field.id].extend(_forecast_samples(forecasts[cell]))
+
+    for field_id, sensor_samples in _sensor_samples(list(samples), since).items():
+        samples[field_id].extend(sensor_samples)
+
+    # Pad to a (n_fields, n_steps) matrix
+    n_steps = max(len(s) for s in samples.values())
+    if n_steps == 0:
+        return 0
+    keys = ['timestamp', 'temperature', 'humidity', 'wind_speed', 'clouds', 'pressure', 'rain', 'step_hours']
+    matrix = np.full((len(fields), n_steps, len(keys)), np.nan)
+    for row, field in enumerate(fields):
+        if samples[field.id]:
+            matrix[row, :len(samples[field.id])] = np.array(samples[field.id], dtype=float)
+
+    series = {key: matrix[:, :, i] for i, key in enumerate(keys)}
+
+    results = compute_indicators(
+        series,
+        latitude=np.array([f.location.latitude for f in fields]),
+        gdd_base=np.array([GDD_BASE_TEMPERATURE.get(f.crop_type, 10.0) for f in fields]),
+        start_date=today,
+        n_days=days,
+    )
+
+    rows = []
+    for row, field in enumerate(fields):
+        for day in range(days):
+            if np.isnan(results['tmin'][row, day]):
+                continue
+            rows.append(FieldIndicator(
+                field=field,
+                date=today + timedelta(days=day),
+                tmin=round(float(results['tmin'][row, day]), 2),
+                tmax=round(float(results['tmax'][row, day]), 2),
+                gdd=round(float(results['gdd'][row, day]), 2),
+                et0=round(float(results['et0'][row, day]), 2),
+                rain=round(float(results['rain'][row, day]), 1),
+                leaf_wetness_hours=round(float(results['leaf_wetness_hours'][row, day]), 1),
+                fungal_risk=round(float(results['fungal_risk'][row, day]), 3),
+            ))
+
+    FieldIndicator.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['field', 'date'],
+        update_fields=['tmin', 'tmax', 'gdd', 'et0', 'rain', 'leaf_wetness_hours', 'fungal_risk', 'computed_at'],
+    )
+    return len(rows)
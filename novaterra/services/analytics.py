@@ -0,0 +1,144 @@
+# novaterra/services/analytics.py
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.utils import timezone
+
+from ..models import Field, UserProfile
+
+# Cached results are keyed by UserProfile.data_version, so the TTL only
+# bounds how long an unused entry lingers
+ANALYTICS_CACHE_TTL = getattr(settings, 'ANALYTICS_CACHE_TTL', 60 * 60)
+
+ACTIVE_DISEASE_STATUSES = ['detected', 'treating']
+
+
+def _number(value):
+    return float(value) if value is not None else 0.0
+
+
+def _harvest_windows(fields, today):
+    """Field count and area per expected-harvest window (one conditional aggregate)"""
+    windows = {
+        'overdue': Q(expected_harvest__lt=today, status='active'),
+        'next_30_days': Q(expected_harvest__gte=today, expected_harvest__lt=today + timedelta(days=30)),
+        'days_30_to_90': Q(expected_harvest__gte=today + timedelta(days=30), expected_harvest__lt=today + timedelta(days=90)),
+        'later': Q(expected_harvest__gte=today + timedelta(days=90)),
+        'unscheduled': Q(expected_harvest__isnull=True),
+    }
+    aggregates = {}
+    for name, condition in windows.items():
+        aggregates[f'{name}__count'] = Count('id', filter=condition)
+        aggregates[f'{name}__area'] = Sum('area_size', filter=condition)
+    totals = fields.aggregate(**aggregates)
+
+    return [
+        {
+            'window': name,
+            'field_count': totals[f'{name}__count'],
+            'area': _number(totals[f'{name}__area']),
+        }
+        for name in windows
+    ]
+
+
+def compute_farm_analytics(user, today=None):
+    """
+    Area and counts by crop, status, planting month and harvest window,
+    plus disease incidence per crop - all as grouped SQL aggregates
+    """
+    from disease_detection.models import DiseaseDetection
+
+    today = today or timezone.now().date()
+    fields = Field.objects.filter(owner=user).order_by()
+
+    totals = fields.aggregate(
+        field_count=Count('id'),
+        total_area=Sum('area_size'),
+        mapped_area_m2=Sum('location__area_m2'),
+    )
+
+    by_crop = fields.values('crop_type').annotate(
+        field_count=Count('id'),
+        area=Sum('area_size'),
+        active_count=Count('id', filter=Q(status='active')),
+    ).order_by('crop_type')
+
+    by_status = fields.values('status').annotate(
+        field_count=Count('id'),
+        area=Sum('area_size'),
+    ).order_by('status')
+
+    by_planting_month = fields.filter(planting_date__isnull=False) \
+        .annotate(month=TruncMonth('planting_date')) \
+        .values('month') \
+        .annotate(field_count=Count('id'), area=Sum('area_size')) \
+        .order_by('month')
+
+    diseases = DiseaseDetection.objects.filter(user=user, field__isnull=False) \
+        .order_by() \
+        .values(crop_type=F('field__crop_type')) \
+        .annotate(
+            detections=Count('id'),
+            active_detections=Count('id', filter=Q(status__in=ACTIVE_DISEASE_STATUSES)),
+            affected_fields=Count('field', distinct=True),
+        )
+    disease_by_crop = {row['crop_type']: row for row in diseases}
+
+    crops = []
+    for row in by_crop:
+        disease = disease_by_crop.get(row['crop_type'], {})
+        affected = disease.get('affected_fields', 0)
+        crops.append({
+            'crop_type': row['crop_type'],
+            'field_count': row['field_count'],
+            'active_count': row['active_count'],
+            'area': _number(row['area']),
+            'detections': disease.get('detections', 0),
+            'active_detections': disease.get('active_detections', 0),
+            'affected_fields': affected,
+            'incidence': round(affected / row['field_count'], 3) if row['field_count'] else 0.0,
+        })
+
+    return {
+        'totals': {
+            'field_count': totals['field_count'],
+            'total_area': _number(totals['total_area']),
+            'mapped_area_ha': round(_number(totals['mapped_area_m2']) / 10000, 2),
+            'detections': sum(c['detections'] for c in crops),
+        },
+        'by_crop': crops,
+        'by_status': [
+            {'status': row['status'], 'field_count': row['field_count'], 'area': _number(row['area'])}
+            for row in by_status
+        ],
+        'by_planting_month': [
+            {'month': row['month'].strftime('%Y-%m'), 'field_count': row['field_count'], 'area': _number(row['area'])}
+            for row in by_planting_month
+        ],
+        'harvest_windows': _harvest_windows(fields, today),
+        'as_of': today.isoformat(),
+    }
+
+
+def get_farm_analytics(user):
+    """
+    Cached farm analytics
+
+    The key includes the profile's data_version (bumped by the field and
+    detection signals) and the date (harvest windows are relative to today),
+    so any change produces a fresh key instead of needing an invalidation.
+    """
+    version = UserProfile.objects.filter(user=user).values_list('data_version', flat=True).first() or 0
+    today = timezone.now().date()
+    key = f'farm-analytics:{user.id}:{version}:{today.isoformat()}'
+
+    analytics = cache.get(key)
+    if analytics is None:
+        analytics = compute_farm_analytics(user, today)
+        cache.set(key, analytics, ANALYTICS_CACHE_TTL)
+    return analytics
@@ -0,0 +1,151 @@
+# novaterra/services/camera_health.py
+
+import asyncio
+import time
+from urllib.parse import quote, urlsplit
+
+from django.utils import timezone
+
+from ..models import Camera
+from .event_bus import get_event_bus
+
+# Consecutive failed probes before a camera is reported offline (avoids flapping)
+DEFAULT_FAILURES_BEFORE_OFFLINE = 2
+
+HEALTH_FIELDS = ['status', 'latency_ms', 'last_seen', 'last_checked', 'failure_count', 'last_error']
+
+
+# ============================================
+# Async probing (stdlib streams, no thread per camera)
+# ============================================
+
+async def _http_status(url, timeout):
+    """Status code of a GET, reading only the status line"""
+    parts = urlsplit(url)
+    https = parts.scheme == 'https'
+    port = parts.port or (443 if https else 80)
+    target = quote(parts.path or '/', safe='/%') + (f'?{quote(parts.query, safe="=&%")}' if parts.query else '')
+
+    async def request():
+        reader, writer = await asyncio.open_connection(parts.hostname, port, ssl=True if https else None)
+        try:
+            writer.write(
+                f'GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\n'
+                f'User-Agent: novaterra-camera-probe\r\nConnection: close\r\n\r\n'.encode()
+            )
+            await writer.drain()
+            status_line = await reader.readline()
+        finally:
+            writer.close()
+        try:
+            return int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise ConnectionError('Malformed HTTP response')
+
+    return await asyncio.wait_for(request(), timeout)
+
+
+async def probe(camera_id, url, semaphore, timeout):
+    """
+    Returns:
+        tuple: (camera_id, ok, latency in ms or None, error message)
+    """
+    async with semaphore:
+        started = time.perf_counter()
+        try:
+            code = await _http_status(url, timeout)
+        except asyncio.TimeoutError:
+            return camera_id, False, None, f'Timed out after {timeout:g}s'
+        except (OSError, ConnectionError) as e:
+            return camera_id, False, None, str(e) or e.__class__.__name__
+        latency = (time.perf_counter() - started) * 1000
+        if code != 200:
+            return camera_id, False, latency, f'HTTP {code}'
+        return camera_id, True, latency, ''
+
+
+async def probe_all(targets, concurrency=50, timeout=5.0):
+    """Probe (camera_id, url) pairs concurrently, at most `concurrency` at a time"""
+    semaphore = asyncio.Semaphore(concurrency)
+    return await asyncio.gather(*(probe(camera_id, url, semaphore, timeout) for camera_id, url in targets))
+
+
+# ============================================
+# Recording results
+# ============================================
+
+def apply_result(camera, ok, latency, error, now, failures_before_offline=DEFAULT_FAILURES_BEFORE_OFFLINE):
+    """Update a camera's health fields in memory; returns True if its status changed"""
+    previous = camera.status
+    camera.last_checked = now
+    if ok:
+        camera.status = 'online'
+        camera.latency_ms = round(latency, 1)
+        camera.last_seen = now
+        camera.failure_count = 0
+        camera.last_error = ''
+    else:
+        camera.failure_count += 1
+        camera.latency_ms = None
+        camera.last_error = error[:200]
+        if camera.failure_count >= failures_before_offline:
+            camera.status = 'offline'
+    return camera.status != previous
+
+
+def probe_cameras(cameras=None, concurrency=50, timeout=5.0,
+                  failures_before_offline=DEFAULT_FAILURES_BEFORE_OFFLINE, batch_size=500, log=print):
+    """
+    Probe every camera's go2rtc stream info endpoint and store the results
+
+    The stream info endpoint only answers a status line, unlike
+    api/frame.jpeg which makes go2rtc grab and encode a snapshot.
+
+    All probes run concurrently on one event loop (bounded by concurrency);
+    results are written with bulk_update and status changes are published
+    as camera.status events.
+
+    Returns:
+        dict: {"probed", "online", "offline", "changed"}
+    """
+    if cameras is None:
+        cameras = Camera.objects.all()
+    cameras = list(cameras)
+    if not cameras:
+        return {'probed': 0, 'online': 0, 'offline': 0, 'changed': 0}
+
+    started = time.perf_counter()
+    results = asyncio.run(probe_all(
+        [(camera.id, camera.get_probe_url()) for camera in cameras],
+        concurrency=concurrency,
+        timeout=timeout,
+    ))
+    log(f'Probed {len(cameras)} cameras in {time.perf_counter() - started:.1f}s')
+
+    now = timezone.now()
+    by_id = {camera.id: camera for camera in cameras}
+    changed = []
+    for camera_id, ok, latency, error in results:
+        camera = by_id[camera_id]
+        if apply_result(camera, ok, latency, error, now, failures_before_offline):
+            changed.append(camera)
+
+    Camera.objects.bulk_update(cameras, HEALTH_FIELDS, batch_size=batch_size)
+
+    bus = get_event_bus()
+    for camera in changed:
+        bus.publish(camera.owner_id, 'camera.status', {
+            'camera_id': camera.id,
+            'name': camera.name,
+            'is_active': camera.is_active,
+            'change': 'health',
+            **camera.health(),
+        })
+
+    online = sum(1 for camera in cameras if camera.status == 'online')
+    return {
+        'probed': len(cameras),
+        'online': online,
+        'offline': sum(1 for camera in cameras if camera.status == 'offline'),
+        'changed': len(changed),
+    }
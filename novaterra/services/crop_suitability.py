@@ -0,0 +1,305 @@
+# novaterra/services/crop_suitability.py
+
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+
+SEASONS = ['winter', 'spring', 'summer', 'fall']
+SOIL_TYPES = ['sandy', 'loam', 'clay']
+
+# Approximate climate normals for Tunisian stations:
+# (name, latitude, longitude, mean temperature °C per season [winter, spring, summer, fall], annual rain mm)
+STATION_NORMALS = [
+    ('Bizerte', 37.27, 9.87, (12.0, 16.5, 25.5, 20.5), 620),
+    ('Tunis', 36.81, 10.18, (12.0, 16.5, 26.5, 21.0), 460),
+    ('Beja', 36.73, 9.18, (10.5, 15.5, 26.0, 19.5), 600),
+    ('Jendouba', 36.50, 8.78, (10.5, 15.5, 27.0, 20.0), 500),
+    ('Nabeul', 36.45, 10.74, (12.5, 16.0, 25.5, 21.0), 450),
+    ('Le Kef', 36.17, 8.70, (8.0, 13.0, 25.0, 17.5), 500),
+    ('Sousse', 35.83, 10.64, (12.0, 16.5, 26.0, 21.5), 330),
+    ('Monastir', 35.78, 10.83, (12.5, 16.5, 25.5, 21.5), 350),
+    ('Kairouan', 35.68, 10.10, (11.5, 17.0, 28.5, 21.5), 300),
+    ('Kasserine', 35.17, 8.84, (7.5, 13.5, 26.0, 17.5), 330),
+    ('Sfax', 34.74, 10.76, (12.0, 17.0, 26.0, 21.5), 210),
+    ('Gafsa', 34.42, 8.78, (10.0, 17.0, 29.0, 20.5), 160),
+    ('Gabes', 33.88, 10.10, (12.5, 18.0, 27.0, 22.0), 180),
+    ('Tozeur', 33.92, 8.13, (12.0, 20.0, 32.0, 23.0), 90),
+    ('Kebili', 33.70, 8.97, (11.5, 19.5, 31.5, 22.5), 90),
+    ('Medenine', 33.35, 10.50, (12.5, 19.0, 29.0, 22.5), 160),
+    ('Tataouine', 32.93, 10.45, (12.0, 19.5, 30.0, 22.5), 110),
+]
+
+# Grid covering Tunisia (cell size in degrees)
+GRID_BOUNDS = (30.0, 7.4, 37.6, 11.8)  # min_lat, min_lon, max_lat, max_lon
+GRID_RESOLUTION = 0.1
+
+# Agronomic profile per Field.CROP_CHOICES crop ('other' is never suggested)
+CROP_PROFILES = {
+    'tomato': {
+        'label': 'Tomato',
+        'temperature': (10, 18, 27, 35),  # absolute min, optimal min, optimal max, absolute max (°C)
+        'water_need': 600,                # mm per growing season
+        'soil': {'sandy': 0.7, 'loam': 1.0, 'clay': 0.6},
+        'season': {'winter': 0.2, 'spring': 1.0, 'summer': 0.8, 'fall': 0.5},
+        'estimated_yield': '45-55 tons/hectare',
+        'growing_season': '90-120 days',
+        'water_requirements': 'Medium-High',
+        'market_price': 'High',
+    },
+    'olives': {
+        'label': 'Olives',
+        'temperature': (2, 14, 28, 40),
+        'water_need': 250,
+        'soil': {'sandy': 0.9, 'loam': 1.0, 'clay': 0.6},
+        'season': {'winter': 0.9, 'spring': 1.0, 'summer': 0.5, 'fall': 0.9},
+        'estimated_yield': '2-3 tons/hectare',
+        'growing_season': 'Perennial',
+        'water_requirements': 'Low',
+        'market_price': 'High',
+    },
+    'wheat': {
+        'label': 'Wheat',
+        'temperature': (0, 10, 20, 30),
+        'water_need': 400,
+        'soil': {'sandy': 0.5, 'loam': 1.0, 'clay': 0.9},
+        'season': {'winter': 0.9, 'spring': 0.4, 'summer': 0.0, 'fall': 1.0},
+        'estimated_yield': '3-4 tons/hectare',
+        'growing_season': '120-150 days',
+        'water_requirements': 'Low-Medium',
+        'market_price': 'Stable',
+    },
+    'potato': {
+        'label': 'Potato',
+        'temperature': (5, 14, 22, 30),
+        'water_need': 500,
+        'soil': {'sandy': 1.0, 'loam': 0.9, 'clay': 0.4},
+        'season': {'winter': 0.8, 'spring': 0.9, 'summer': 0.3, 'fall': 0.9},
+        'estimated_yield': '25-35 tons/hectare',
+        'growing_season': '90-120 days',
+        'water_requirements': 'Medium',
+        'market_price': 'Medium',
+    },
+    'citrus': {
+        'label': 'Citrus Fruits',
+        'temperature': (5, 15, 30, 38),
+        'water_need': 900,
+        'soil': {'sandy': 0.8, 'loam': 1.0, 'clay': 0.5},
+        'season': {'winter': 0.6, 'spring': 1.0, 'summer': 0.6, 'fall': 0.8},
+        'estimated_yield': '20-30 tons/hectare',
+        'growing_season': 'Perennial',
+        'water_requirements': 'High',
+        'market_price': 'High',
+    },
+    'dates': {
+        'label': 'Dates',
+        'temperature': (8, 20, 38, 48),
+        'water_need': 1500,
+        'soil': {'sandy': 1.0, 'loam': 0.8, 'clay': 0.5},
+        'season': {'winter': 0.3, 'spring': 1.0, 'summer': 0.8, 'fall': 0.5},
+        'estimated_yield': '5-10 tons/hectare',
+        'growing_season': 'Perennial',
+        'water_requirements': 'High (oasis irrigation)',
+        'market_price': 'High',
+    },
+    'grapes': {
+        'label': 'Grapes',
+        'temperature': (5, 16, 28, 38),
+        'water_need': 450,
+        'soil': {'sandy': 0.8, 'loam': 1.0, 'clay': 0.6},
+        'season': {'winter': 0.9, 'spring': 0.8, 'summer': 0.2, 'fall': 0.6},
+        'estimated_yield': '10-15 tons/hectare',
+        'growing_season': 'Perennial',
+        'water_requirements': 'Medium',
+        'market_price': 'Medium-High',
+    },
+    'vegetables': {
+        'label': 'Mixed Vegetables',
+        'temperature': (7, 15, 25, 33),
+        'water_need': 500,
+        'soil': {'sandy': 0.7, 'loam': 1.0, 'clay': 0.7},
+        'season': {'winter': 0.6, 'spring': 1.0, 'summer': 0.7, 'fall': 0.9},
+        'estimated_yield': 'Varies by crop',
+        'growing_season': '60-100 days',
+        'water_requirements': 'Medium',
+        'market_price': 'Medium',
+    },
+}
+
+# Weights of each component in the (geometric) suitability score
+SCORE_WEIGHTS = {'temperature': 0.4, 'water': 0.25, 'soil': 0.2, 'season': 0.15}
+
+CROP_KEYS = list(CROP_PROFILES)
+_TEMPERATURE = np.array([CROP_PROFILES[c]['temperature'] for c in CROP_KEYS], dtype=float)  # (n_crops, 4)
+_WATER_NEED = np.array([CROP_PROFILES[c]['water_need'] for c in CROP_KEYS], dtype=float)
+_SOIL = np.array([[CROP_PROFILES[c]['soil'][s] for s in SOIL_TYPES] for c in CROP_KEYS])
+_SEASON = np.array([[CROP_PROFILES[c]['season'][s] for s in SEASONS] for c in CROP_KEYS])
+
+
+class ClimateGrid:
+    """
+    Regional climate normals rasterized on a regular lat/lon grid
+    (inverse-distance weighting of STATION_NORMALS), built once per process
+    """
+
+    def __init__(self, bounds=GRID_BOUNDS, resolution=GRID_RESOLUTION, power=2):
+        self.min_lat, self.min_lon, max_lat, max_lon = bounds
+        self.resolution = resolution
+        self.n_rows = int(round((max_lat - self.min_lat) / resolution)) + 1
+        self.n_cols = int(round((max_lon - self.min_lon) / resolution)) + 1
+
+        lats = self.min_lat + np.arange(self.n_rows) * resolution
+        lons = self.min_lon + np.arange(self.n_cols) * resolution
+        cell_lat, cell_lon = np.meshgrid(lats, lons, indexing='ij')
+
+        station_lat = np.array([s[1] for s in STATION_NORMALS])
+        station_lon = np.array([s[2] for s in STATION_NORMALS])
+        station_values = np.array([list(s[3]) + [s[4]] for s in STATION_NORMALS], dtype=float)  # (n_stations, 5)
+
+        # Planar distances are fine at this scale (cos(lat) corrects longitude)
+        dlat = cell_lat.ravel()[:, None] - station_lat[None, :]
+        dlon = (cell_lon.ravel()[:, None] - station_lon[None, :]) * np.cos(np.radians(cell_lat.ravel()))[:, None]
+        weights = 1 / np.maximum(np.hypot(dlat, dlon), 1e-6) ** power
+        weights /= weights.sum(axis=1, keepdims=True)
+
+        # (n_cells, 5): seasonal temperatures then annual rain
+        self.values = weights @ station_values
+
+    def cell_index(self, latitude, longitude):
+        """Index of the cell containing a point (clamped to the grid)"""
+        row = min(max(int(round((latitude - self.min_lat) / self.resolution)), 0), self.n_rows - 1)
+        col = min(max(int(round((longitude - self.min_lon) / self.resolution)), 0), self.n_cols - 1)
+        return row * self.n_cols + col
+
+    def climate(self, cell):
+        values = self.values[cell]
+        return {
+            'temperature': dict(zip(SEASONS, np.round(values[:4], 1).tolist())),
+            'annual_rain': round(float(values[4])),
+        }
+
+
+_grid = None
+_grid_lock = threading.Lock()
+
+
+def get_climate_grid():
+    global _grid
+    if _grid is None:
+        with _grid_lock:
+            if _grid is None:
+                _grid = ClimateGrid()
+    return _grid
+
+
+def _trapezoid(value, limits):
+    """Membership 0-1: 1 inside the optimal range, linear down to 0 at the absolute limits"""
+    low_abs, low_opt, high_opt, high_abs = limits.T
+    rising = (value - low_abs) / np.maximum(low_opt - low_abs, 1e-6)
+    falling = (high_abs - value) / np.maximum(high_abs - high_opt, 1e-6)
+    return np.clip(np.minimum(rising, falling), 0, 1)
+
+
+def _reasons(crop, temperature, water, soil, season, soil_type, season_name):
+    profile = CROP_PROFILES[crop]
+    reasons = []
+    if temperature >= 0.9:
+        reasons.append('Optimal temperature range')
+    elif temperature < 0.5:
+        reasons.append('Temperatures outside the ideal range')
+    if water >= 0.9:
+        reasons.append('Rainfall covers most water needs')
+    elif water < 0.5:
+        reasons.append('Needs reliable irrigation')
+    if profile['water_requirements'] == 'Low':
+        reasons.append('Drought resistant')
+    if soil >= 0.9:
+        reasons.append(f'Well suited to {soil_type} soil')
+    elif soil < 0.6:
+        reasons.append(f'{soil_type.capitalize()} soil is not ideal')
+    if season >= 0.9:
+        reasons.append(f'Good {season_name} planting')
+    if profile['growing_season'] == 'Perennial':
+        reasons.append('Long-term investment')
+    return reasons
+
+
+@lru_cache(maxsize=4096)
+def score_cell(cell, soil_type, season):
+    """
+    Score every crop for a grid cell in one vectorized pass (memoized)
+
+    Returns:
+        tuple: (crop_type, suitability_score, reasons tuple) records sorted
+        by score - immutable, since the cached value is shared by all callers
+    """
+    grid = get_climate_grid()
+    values = grid.values[cell]
+    season_index = SEASONS.index(season)
+
+    temperature = _trapezoid(values[season_index], _TEMPERATURE)
+    # Irrigation can make up part of the deficit, so rain alone never scores below 0.3
+    water = np.clip(values[4] / _WATER_NEED, 0.3, 1)
+    soil = _SOIL[:, SOIL_TYPES.index(soil_type)]
+    season_fit = _SEASON[:, season_index]
+
+    total = np.exp(
+        SCORE_WEIGHTS['temperature'] * np.log(np.maximum(temperature, 1e-3))
+        + SCORE_WEIGHTS['water'] * np.log(water)
+        + SCORE_WEIGHTS['soil'] * np.log(np.maximum(soil, 1e-3))
+        + SCORE_WEIGHTS['season'] * np.log(np.maximum(season_fit, 1e-3))
+    )
+
+    return tuple(
+        (
+            CROP_KEYS[i],
+            round(float(total[i]), 2),
+            tuple(_reasons(CROP_KEYS[i], temperature[i], water[i], soil[i], season_fit[i], soil_type, season)),
+        )
+        for i in np.argsort(-total)
+    )
+
+
+def _suggestion(crop, score, reasons):
+    """Response dict for one cached score record (built per call)"""
+    profile = CROP_PROFILES[crop]
+    return {
+        'crop': profile['label'],
+        'crop_type': crop,
+        'suitability_score': score,
+        'estimated_yield': profile['estimated_yield'],
+        'growing_season': profile['growing_season'],
+        'water_requirements': profile['water_requirements'],
+        'market_price': profile['market_price'],
+        'reasons': list(reasons),
+    }
+
+
+def suggest_crops(latitude, longitude, soil_type='loam', season='spring', limit=5):
+    """
+    Rank Field.CROP_CHOICES crops for a location
+
+    Args:
+        latitude, longitude (float): Field centroid
+        soil_type (str): sandy, loam or clay
+        season (str): winter, spring, summer or fall
+        limit (int): number of suggestions
+
+    Returns:
+        tuple: (suggestions list, climate dict of the grid cell)
+
+    Raises:
+        ValueError: unknown soil_type or season, or limit below 1
+    """
+    if soil_type not in SOIL_TYPES:
+        raise ValueError(f"soil_type must be one of {', '.join(SOIL_TYPES)}")
+    if season not in SEASONS:
+        raise ValueError(f"season must be one of {', '.join(SEASONS)}")
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+
+    grid = get_climate_grid()
+    cell = grid.cell_index(latitude, longitude)
+    suggestions = [_suggestion(*record) for record in score_cell(cell, soil_type, season)[:limit]]
+    return suggestions, grid.climate(cell)
@@ -0,0 +1,140 @@
+# novaterra/services/event_bus.py
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+class InProcessBackend:
+    """
+    Default pub/sub backend - delivers messages to subscribers living in
+    the same process. Good enough for a single ASGI worker; run a shared
+    backend (Redis, Postgres LISTEN/NOTIFY...) when scaling out.
+
+    A backend only needs subscribe(channel, callback) -> unsubscribe
+    and publish(channel, message).
+    """
+
+    def __init__(self, **options):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel, callback):
+        with self._lock:
+            self._subscribers[channel].add(callback)
+        return lambda: self._unsubscribe(channel, callback)
+
+    def _unsubscribe(self, channel, callback):
+        with self._lock:
+            callbacks = self._subscribers.get(channel)
+            if callbacks is not None:
+                callbacks.discard(callback)
+                if not callbacks:
+                    del self._subscribers[channel]
+
+    def publish(self, channel, message):
+        with self._lock:
+            callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            # One broken subscriber must not stop delivery to the others
+            try:
+                callback(message)
+            except Exception as e:
+                print(f"Event bus: dropping subscriber on {channel}: {e}")
+                self._unsubscribe(channel, callback)
+
+
+class Subscription:
+    """
+    Async view over a channel - buffers messages in an asyncio.Queue owned
+    by the subscriber's event loop. Publishing is thread-safe, so sync views
+    (running in a worker thread) can publish to async streams.
+    """
+
+    def __init__(self, backend, channel, max_queue=100):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self._unsubscribe = backend.subscribe(channel, self._deliver)
+
+    def _deliver(self, message):
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            # Event loop closed without close() being called (stream torn down)
+            self.close()
+
+    def _put(self, message):
+        # Slow consumer: drop the oldest event rather than block publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self._unsubscribe()
+
+
+class EventBus:
+    """Per-user event fan-out (sensor readings, detections, camera status)"""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def user_channel(user_id):
+        return f'user:{user_id}'
+
+    def subscribe(self, user_id):
+        """Subscribe the running event loop to a user's events"""
+        return Subscription(self.backend, self.user_channel(user_id))
+
+    def publish(self, user_id, event_type, data):
+        """
+        Publish an event to a user's subscribers once the current
+        transaction commits (immediately when not in a transaction)
+
+        Args:
+            user_id (int): Owner of the data
+            event_type (str): e.g. "sensor.reading", "detection.created", "camera.status"
+            data (dict): JSON-serializable payload
+        """
+        message = {
+            'type': event_type,
+            'data': data,
+            'timestamp': timezone.now().isoformat(),
+        }
+        transaction.on_commit(
+            lambda: self._publish(self.user_channel(user_id), message)
+        )
+
+    def _publish(self, channel, message):
+        # Runs inline when not in a transaction - never fail the request that published
+        try:
+            self.backend.publish(channel, message)
+        except Exception as e:
+            print(f"Event bus publish error on {channel}: {e}")
+
+
+_event_bus = None
+_event_bus_lock = threading.Lock()
+
+
+def get_event_bus():
+    """Return the process-wide event bus configured by settings.EVENT_BUS"""
+    global _event_bus
+    if _event_bus is None:
+        with _event_bus_lock:
+            if _event_bus is None:
+                config = getattr(settings, 'EVENT_BUS', {})
+                backend_class = import_string(
+                    config.get('BACKEND', 'novaterra.services.event_bus.InProcessBackend')
+                )
+                _event_bus = EventBus(backend_class(**config.get('OPTIONS', {})))
+    return _event_bus
@@ -0,0 +1,263 @@
+# novaterra/services/export.py
+
+import csv
+import json
+import os
+import sqlite3
+import struct
+import tempfile
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.contrib.gis.db.models.functions import AsGeoJSON, AsWKB, AsWKT
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+from ..models import Camera, Field, Location, Stock
+
+EXPORT_FORMATS = ('geojsonl', 'csv', 'gpkg')
+
+# Rows fetched per round trip (server-side cursor on PostgreSQL)
+CHUNK_SIZE = 2000
+
+
+def _layers():
+    """
+    Exportable layers: model, owner lookup, columns (name or (name, lookup))
+    and geometry lookups in order of preference
+    """
+    from disease_detection.models import DiseaseDetection
+
+    return {
+        'locations': {
+            'model': Location,
+            'owner': 'user',
+            'columns': ['id', 'name', 'location_type', 'city', 'region', 'address', 'created_at'],
+            'geometry': ['shape', 'point'],
+            'geometry_type': 'GEOMETRY',
+        },
+        'fields': {
+            'model': Field,
+            'owner': 'owner',
+            'columns': ['id', ('name', 'location__name'), 'crop_type', 'status', 'area_size',
+                        'planting_date', 'expected_harvest', 'notes', 'created_at'],
+            'geometry': ['location__shape', 'location__point'],
+            'geometry_type': 'GEOMETRY',
+        },
+        'cameras': {
+            'model': Camera,
+            'owner': 'owner',
+            'columns': ['id', 'name', ('location_name', 'location__name'), 'stream_url', 'is_active', 'created_at'],
+            'geometry': ['location__point'],
+            'geometry_type': 'POINT',
+        },
+        'stock': {
+            'model': Stock,
+            'owner': 'owner',
+            'columns': ['id', 'item_name', 'category', 'quantity', 'unit', 'cost_per_unit', 'total_cost',
+                        'purchase_date', 'expiry_date', ('location_name', 'location__name')],
+            'geometry': ['location__point'],
+            'geometry_type': 'POINT',
+        },
+        'detections': {
+            'model': DiseaseDetection,
+            'owner': 'user',
+            'columns': ['id', ('field_name', 'field__location__name'), 'disease_name', 'confidence',
+                        'severity', 'status', 'detection_date', 'treatment_notes'],
+            'geometry': ['field__location__point'],
+            'geometry_type': 'POINT',
+        },
+    }
+
+
+LAYER_NAMES = ('locations', 'fields', 'cameras', 'stock', 'detections')
+
+
+def _column_names(layer):
+    return [c if isinstance(c, str) else c[0] for c in layer['columns']]
+
+
+def _rows(layer, user, geometry_function):
+    """
+    Stream (properties, geometry) pairs for one layer
+
+    Geometry is serialized by the database (GeoJSON/WKT/WKB) so no GEOS
+    objects are built; rows come through .iterator() in chunks.
+    """
+    plain = [c for c in layer['columns'] if isinstance(c, str)]
+    renamed = {c[0]: F(c[1]) for c in layer['columns'] if not isinstance(c, str)}
+    geometry_aliases = [f'geometry_{i}' for i in range(len(layer['geometry']))]
+    annotations = {
+        alias: geometry_function(lookup)
+        for alias, lookup in zip(geometry_aliases, layer['geometry'])
+    }
+
+    queryset = layer['model'].objects.filter(**{layer['owner']: user}) \
+        .order_by('pk') \
+        .values(*plain, **renamed, **annotations)
+
+    names = _column_names(layer)
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        geometry = next((row[a] for a in geometry_aliases if row[a] is not None), None)
+        yield {name: row[name] for name in names}, geometry
+
+
+# ============================================
+# GeoJSON Lines / CSV (streamed)
+# ============================================
+
+def geojsonl_lines(user, layer_names):
+    """One GeoJSON Feature per line (RFC 8142 style, without record separators)"""
+    layers = _layers()
+    encoder = DjangoJSONEncoder()
+    for layer_name in layer_names:
+        for properties, geometry in _rows(layers[layer_name], user, AsGeoJSON):
+            yield encoder.encode({
+                'type': 'Feature',
+                'id': f"{layer_name}.{properties['id']}",
+                'geometry': json.loads(geometry) if geometry else None,
+                'properties': {'layer': layer_name, **properties},
+            }) + '\n'
+
+
+class _Echo:
+    """File-like object whose write() returns the value, for csv.writer streaming"""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(user, layer_name):
+    """CSV rows of a single layer with the geometry as WKT"""
+    layer = _layers()[layer_name]
+    writer = csv.writer(_Echo())
+    yield writer.writerow(_column_names(layer) + ['geometry_wkt'])
+    for properties, geometry in _rows(layer, user, AsWKT):
+        yield writer.writerow(list(properties.values()) + [geometry or ''])
+
+
+# ============================================
+# GeoPackage (written to a temporary file)
+# ============================================
+
+GPKG_APPLICATION_ID = 0x47504B47  # "GPKG"
+GPKG_USER_VERSION = 10300  # 1.3.0
+
+GPKG_COLUMN_TYPES = {
+    'AutoField': 'INTEGER', 'BigAutoField': 'INTEGER', 'IntegerField': 'INTEGER',
+    'PositiveIntegerField': 'INTEGER', 'BooleanField': 'BOOLEAN',
+    'FloatField': 'DOUBLE', 'DecimalField': 'DOUBLE',
+    'DateField': 'DATE', 'DateTimeField': 'DATETIME',
+}
+
+GPKG_METADATA_SQL = """
+CREATE TABLE gpkg_spatial_ref_sys (
+    srs_name TEXT NOT NULL, srs_id INTEGER PRIMARY KEY, organization TEXT NOT NULL,
+    organization_coordsys_id INTEGER NOT NULL, definition TEXT NOT NULL, description TEXT
+);
+CREATE TABLE gpkg_contents (
+    table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL, identifier TEXT UNIQUE,
+    description TEXT DEFAULT '', last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+    min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE,
+    srs_id INTEGER REFERENCES gpkg_spatial_ref_sys(srs_id)
+);
+CREATE TABLE gpkg_geometry_columns (
+    table_name TEXT NOT NULL REFERENCES gpkg_contents(table_name), column_name TEXT NOT NULL,
+    geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL REFERENCES gpkg_spatial_ref_sys(srs_id),
+    z TINYINT NOT NULL, m TINYINT NOT NULL,
+    CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name)
+);
+INSERT INTO gpkg_spatial_ref_sys VALUES
+    ('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined', NULL),
+    ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined', NULL),
+    ('WGS 84 geodetic', 4326, 'EPSG', 4326,
+     'GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]]',
+     'longitude/latitude coordinates in decimal degrees on the WGS 84 spheroid');
+"""
+
+
+def _gpkg_geometry(wkb, srid=4326):
+    """GeoPackageBinary: "GP" header (version 0, little endian, no envelope) + WKB"""
+    if wkb is None:
+        return None
+    return b'GP' + struct.pack('<BBi', 0, 0b00000001, srid) + bytes(wkb)
+
+
+def _gpkg_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def _field_type(model, lookup):
+    field = None
+    for part in lookup.split('__'):
+        field = model._meta.get_field(part)
+        model = field.related_model or model
+    return GPKG_COLUMN_TYPES.get(field.get_internal_type(), 'TEXT')
+
+
+def write_geopackage(user, layer_names):
+    """
+    Write the layers to a GeoPackage in a temporary file
+
+    Rows are inserted chunk by chunk, so memory use does not grow with
+    the export size.
+
+    Returns:
+        file: open binary file positioned at the start (already unlinked
+        from the filesystem; closing it frees the space)
+    """
+    layers = _layers()
+    handle, path = tempfile.mkstemp(suffix='.gpkg')
+    os.close(handle)
+    try:
+        connection = sqlite3.connect(path)
+        connection.execute(f'PRAGMA application_id = {GPKG_APPLICATION_ID}')
+        connection.execute(f'PRAGMA user_version = {GPKG_USER_VERSION}')
+        connection.executescript(GPKG_METADATA_SQL)
+
+        for layer_name in layer_names:
+            layer = layers[layer_name]
+            model = layer['model']
+            names = _column_names(layer)
+            columns = [
+                f'"{name}" {_field_type(model, column if isinstance(column, str) else column[1])}'
+                for name, column in zip(names, layer['columns'])
+                if name != 'id'
+            ]
+            connection.execute(
+                f'CREATE TABLE "{layer_name}" (fid INTEGER PRIMARY KEY AUTOINCREMENT, '
+                f'geom {layer["geometry_type"]}, {", ".join(columns)})'
+            )
+            connection.execute(
+                "INSERT INTO gpkg_contents (table_name, data_type, identifier, srs_id) VALUES (?, 'features', ?, 4326)",
+                (layer_name, layer_name),
+            )
+            connection.execute(
+                'INSERT INTO gpkg_geometry_columns VALUES (?, ?, ?, 4326, 0, 0)',
+                (layer_name, 'geom', layer['geometry_type']),
+            )
+
+            quoted = ', '.join(f'"{name}"' for name in names if name != 'id')
+            placeholders = ', '.join('?' * (len(names) + 1))
+            insert = f'INSERT INTO "{layer_name}" (fid, geom, {quoted}) VALUES ({placeholders})'
+            batch = []
+            for properties, geometry in _rows(layer, user, AsWKB):
+                batch.append(
+                    [properties['id'], _gpkg_geometry(geometry)]
+                    + [_gpkg_value(v) for k, v in properties.items() if k != 'id']
+                )
+                if len(batch) >= CHUNK_SIZE:
+                    connection.executemany(insert, batch)
+                    batch = []
+            if batch:
+                connection.executemany(insert, batch)
+            connection.commit()
+
+        connection.close()
+        return open(path, 'rb')
+    finally:
+        os.unlink(path)
@@ -0,0 +1,237 @@
+# novaterra/services/field_import.py
+
+import os
+import zipfile
+from datetime import date
+
+from django.contrib.gis.gdal import DataSource, GDALException
+from django.contrib.gis.geos import GEOSException, GeometryCollection, MultiPolygon, Point
+from django.db import transaction
+
+from ..models import Field, Location, UserProfile
+from .field_index import field_index_cache
+from .gazetteer import fill_address
+from .geometry import polygon_metrics, polygon_perimeters
+
+SUPPORTED_EXTENSIONS = ('.geojson', '.json', '.zip', '.kml')
+
+# Feature attributes tried (in order) for each Field value
+NAME_ATTRIBUTES = ['name', 'Name', 'NAME', 'parcel_id', 'PARCEL_ID', 'id']
+CROP_ATTRIBUTES = ['crop_type', 'crop', 'CROP', 'culture']
+PLANTING_ATTRIBUTES = ['planting_date', 'planted']
+
+CROP_TYPES = {choice for choice, _ in Field.CROP_CHOICES}
+
+
+class FieldImportError(Exception):
+    pass
+
+
+def _datasource_paths(path):
+    """GDAL paths for a file; every Shapefile in a zip is read in place via /vsizip/"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SUPPORTED_EXTENSIONS:
+        raise FieldImportError(f"Unsupported file type '{extension}' (use GeoJSON, zipped Shapefile or KML)")
+
+    if extension == '.zip':
+        try:
+            with zipfile.ZipFile(path) as archive:
+                shapefiles = sorted(n for n in archive.namelist() if n.lower().endswith('.shp'))
+        except zipfile.BadZipFile:
+            raise FieldImportError('Not a valid zip archive')
+        if not shapefiles:
+            raise FieldImportError('Zip archive contains no .shp file')
+        return [f'/vsizip/{os.path.abspath(path)}/{name}' for name in shapefiles]
+    return [path]
+
+
+def _attribute(properties, names):
+    for name in names:
+        value = properties.get(name)
+        if value not in (None, ''):
+            return value
+    return None
+
+
+def _open_sources(path):
+    sources = []
+    for source_path in _datasource_paths(path):
+        try:
+            sources.append(DataSource(source_path))
+        except GDALException as e:
+            raise FieldImportError(f'Could not read {os.path.basename(source_path)}: {e}')
+    return sources
+
+
+def count_features(path):
+    """Number of features in a file (all layers), without reading geometries"""
+    return sum(layer.num_feat for source in _open_sources(path) for layer in source)
+
+
+def read_features(path):
+    """
+    Stream features from GeoJSON, zipped Shapefiles or KML (all layers)
+
+    Yields:
+        tuple: (feature number, properties dict, GEOS geometry in EPSG:4326
+        or None, error message or None)
+    """
+    number = 0
+    for source in _open_sources(path):
+        for layer in source:
+            fields = layer.fields
+            for feature in layer:
+                number += 1
+                properties = {name: feature.get(name) for name in fields}
+                try:
+                    geometry = feature.geom
+                    geometry.coord_dim = 2
+                    if geometry.srs is not None and geometry.srs.srid != 4326:
+                        geometry.transform(4326)
+                    yield number, properties, geometry.geos, None
+                except (GDALException, GEOSException) as e:
+                    yield number, properties, None, f'Unreadable geometry: {e}'
+
+
+def clean_geometry(geometry):
+    """
+    Validate and repair a parcel geometry
+
+    Returns:
+        tuple: (Polygon/MultiPolygon, repaired flag)
+
+    Raises:
+        ValueError: not polygonal, empty after repair or out of range
+    """
+    if geometry.geom_type not in ('Polygon', 'MultiPolygon'):
+        raise ValueError(f'Expected a polygon, got {geometry.geom_type}')
+
+    repaired = False
+    if not geometry.valid:
+        geometry = geometry.make_valid()
+        repaired = True
+        # make_valid may return a collection with lines/points - keep the polygons
+        if isinstance(geometry, GeometryCollection) and geometry.geom_type != 'MultiPolygon':
+            polygons = []
+            for part in geometry:
+                if part.geom_type == 'Polygon':
+                    polygons.append(part)
+                elif part.geom_type == 'MultiPolygon':
+                    polygons.extend(part)
+            geometry = MultiPolygon(polygons, srid=4326) if polygons else None
+
+    if geometry is None or geometry.empty or geometry.geom_type not in ('Polygon', 'MultiPolygon'):
+        raise ValueError('Geometry is empty after repair')
+
+    if geometry.geom_type == 'MultiPolygon' and len(geometry) == 1:
+        geometry = geometry[0]
+
+    min_lon, min_lat, max_lon, max_lat = geometry.extent
+    if not (-180 <= min_lon <= max_lon <= 180 and -90 <= min_lat <= max_lat <= 90):
+        raise ValueError('Coordinates out of range (expected longitude/latitude in EPSG:4326)')
+
+    geometry.srid = 4326
+    return geometry, repaired
+
+
+def _planting_date(value):
+    if value in (None, ''):
+        return None
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(str(value)[:10])
+    except ValueError:
+        return None
+
+
+def import_fields(path, user, default_crop='other', name_field=None, crop_field=None,
+                  chunk_size=500, log=print):
+    """
+    Import parcels as Location + Field pairs
+
+    Features are read lazily and written in chunks, each chunk in its own
+    transaction with two bulk INSERTs; areas and centroids are computed
+    for the whole chunk at once. Invalid features are reported, not fatal.
+
+    Returns:
+        dict: {"created": int, "repaired": int,
+               "errors": [{"feature": int, "name": str, "error": str}]}
+    """
+    report = {'created': 0, 'repaired': 0, 'errors': []}
+    name_attributes = [name_field] if name_field else NAME_ATTRIBUTES
+    crop_attributes = [crop_field] if crop_field else CROP_ATTRIBUTES
+
+    def flush(chunk):
+        geometries = [item['geometry'] for item in chunk]
+        areas, centroid_lon, centroid_lat = polygon_metrics(geometries)
+        perimeters = polygon_perimeters(geometries)
+
+        # bulk_create skips Location.save, so the shape derivatives are set here
+        locations = []
+        for item, area, perimeter, lon, lat in zip(chunk, areas, perimeters, centroid_lon, centroid_lat):
+            min_lon, min_lat, max_lon, max_lat = item['geometry'].extent
+            centroid = Point(float(lon), float(lat), srid=4326)
+            locations.append(fill_address(Location(
+                user=user,
+                name=item['name'],
+                location_type='field',
+                point=centroid,
+                shape=item['geometry'],
+                area_m2=float(area),
+                perimeter_m=float(perimeter),
+                centroid=centroid,
+                min_lat=min_lat,
+                min_lon=min_lon,
+                max_lat=max_lat,
+                max_lon=max_lon,
+            )))
+
+        with transaction.atomic():
+            Location.objects.bulk_create(locations)
+            Field.objects.bulk_create([
+                Field(
+                    owner=user,
+                    location=location,
+                    crop_type=item['crop_type'],
+                    planting_date=item['planting_date'],
+                    area_size=round(float(area) / 10000, 2),  # hectares
+                )
+                for item, location, area in zip(chunk, locations, areas)
+            ])
+
+        report['created'] += len(chunk)
+        log(f"Imported {report['created']} fields")
+
+    chunk = []
+    for number, properties, geometry, error in read_features(path):
+        name = str(_attribute(properties, name_attributes) or f'Parcel {number}')[:100]
+        if error is None:
+            try:
+                geometry, repaired = clean_geometry(geometry)
+                report['repaired'] += repaired
+            except (ValueError, GEOSException) as e:
+                error = str(e)
+        if error is not None:
+            report['errors'].append({'feature': number, 'name': name, 'error': error})
+            continue
+
+        crop = str(_attribute(properties, crop_attributes) or default_crop).strip().lower()
+        chunk.append({
+            'name': name,
+            'geometry': geometry,
+            'crop_type': crop if crop in CROP_TYPES else default_crop,
+            'planting_date': _planting_date(_attribute(properties, PLANTING_ATTRIBUTES)),
+        })
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    # bulk_create skips the Field post_save signal
+    if report['created']:
+        UserProfile.refresh_field_summary(user.id)
+        field_index_cache.invalidate(user.id)
+
+    return report
@@ -0,0 +1,176 @@
+# novaterra/services/field_index.py
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ..models import Field, Location
+
+# Entries per tree node
+NODE_CAPACITY = 16
+
+
+class STRTree:
+    """
+    Static R-tree bulk-loaded with Sort-Tile-Recursive packing
+
+    Items are (min_x, min_y, max_x, max_y, value); query_point returns the
+    values whose bounding box contains the point.
+    """
+
+    def __init__(self, items, capacity=NODE_CAPACITY):
+        self.capacity = capacity
+        self.size = len(items)
+        level = [(item[:4], item[4], True) for item in items]
+        while len(level) > capacity:
+            level = self._pack(level)
+        self.root = (self._union([node[0] for node in level]), level, False) if level else None
+
+    @staticmethod
+    def _union(boxes):
+        return (
+            min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes),
+        )
+
+    def _pack(self, nodes):
+        """Group nodes into parents: vertical slices by x center, runs by y center"""
+        node_count = math.ceil(len(nodes) / self.capacity)
+        slice_size = math.ceil(math.sqrt(node_count)) * self.capacity
+
+        nodes = sorted(nodes, key=lambda n: n[0][0] + n[0][2])
+        parents = []
+        for start in range(0, len(nodes), slice_size):
+            vertical = sorted(nodes[start:start + slice_size], key=lambda n: n[0][1] + n[0][3])
+            for i in range(0, len(vertical), self.capacity):
+                children = vertical[i:i + self.capacity]
+                parents.append((self._union([c[0] for c in children]), children, False))
+        return parents
+
+    def query_point(self, x, y):
+        if self.root is None:
+            return []
+        matches = []
+        stack = [self.root]
+        while stack:
+            box, payload, is_leaf = stack.pop()
+            if not (box[0] <= x <= box[2] and box[1] <= y <= box[3]):
+                continue
+            if is_leaf:
+                matches.append(payload)
+            else:
+                stack.extend(payload)
+        return matches
+
+
+class FieldIndex:
+    """
+    A user's field polygons: STR-tree over the stored bbox, then an exact
+    prepared-geometry test
+
+    GEOS prepared geometries must not be queried from several threads at
+    once, so they are prepared lazily and kept per thread; the shapes and
+    the tree are shared read-only.
+    """
+
+    def __init__(self, fields):
+        items = []
+        for field_id, shape, min_lon, min_lat, max_lon, max_lat, area in fields:
+            items.append((min_lon, min_lat, max_lon, max_lat, (field_id, shape, area or 0)))
+        self.tree = STRTree(items)
+        self._local = threading.local()
+
+    def _prepared(self, field_id, shape):
+        prepared = getattr(self._local, 'prepared', None)
+        if prepared is None:
+            prepared = self._local.prepared = {}
+        if field_id not in prepared:
+            prepared[field_id] = shape.prepared
+        return prepared[field_id]
+
+    @classmethod
+    def for_user(cls, user_id):
+        rows = Field.objects.filter(
+            owner_id=user_id,
+            location__shape__isnull=False,
+            location__min_lat__isnull=False,
+        ).values_list(
+            'id', 'location__shape', 'location__min_lon', 'location__min_lat',
+            'location__max_lon', 'location__max_lat', 'location__area_m2',
+        )
+        return cls(list(rows))
+
+    def locate(self, longitude, latitude):
+        """Id of the field containing the point (smallest one if fields overlap), or None"""
+        point = Point(longitude, latitude, srid=4326)
+        containing = [
+            (area, field_id)
+            for field_id, shape, area in self.tree.query_point(longitude, latitude)
+            if self._prepared(field_id, shape).covers(point)
+        ]
+        return min(containing)[1] if containing else None
+
+
+class FieldIndexCache:
+    """
+    Per-process LRU of FieldIndex by user with a TTL
+
+    Field/location saves in this process invalidate immediately; other
+    processes pick up changes when the entry expires.
+    """
+
+    def __init__(self, ttl=300, max_size=1000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] >= time.monotonic():
+                self._entries.move_to_end(user_id)
+                return entry[0]
+
+        index = FieldIndex.for_user(user_id)
+        with self._lock:
+            self._entries[user_id] = (index, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return index
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+field_index_cache = FieldIndexCache(
+    ttl=getattr(settings, 'FIELD_INDEX_CACHE_TTL', 300),
+    max_size=getattr(settings, 'FIELD_INDEX_CACHE_SIZE', 1000),
+)
+
+
+def resolve_field(user, latitude, longitude):
+    """The user's Field containing (latitude, longitude), or None"""
+    field_id = field_index_cache.get(user.id).locate(longitude, latitude)
+    if field_id is None:
+        return None
+    return Field.objects.select_related('location').filter(id=field_id).first()
+
+
+@receiver([post_save, post_delete], sender=Field)
+def invalidate_field_index(sender, instance, **kwargs):
+    field_index_cache.invalidate(instance.owner_id)
+
+
+@receiver([post_save, post_delete], sender=Location)
+def invalidate_location_index(sender, instance, **kwargs):
+    if instance.location_type == 'field':
+        field_index_cache.invalidate(instance.user_id)
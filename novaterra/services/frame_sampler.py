@@ -0,0 +1,291 @@
+# novaterra/services/frame_sampler.py
+
+import io
+import os
+import time
+from itertools import cycle
+
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections
+from PIL import Image, UnidentifiedImageError
+
+from ..models import Camera, Field
+from .event_bus import get_event_bus
+from .field_index import resolve_field
+
+AI_SERVICE_URL = getattr(settings, 'AI_SERVICE_URL', 'http://localhost:5000')
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+# Frames whose dHash differs from the camera's last submitted frame by at
+# most this many bits (of 64) are treated as the same scene
+DEFAULT_HASH_THRESHOLD = 6
+
+
+class FrameSourceError(Exception):
+    pass
+
+
+# ============================================
+# Frame sources
+# ============================================
+
+class Go2rtcFrameSource:
+    """Current JPEG snapshot of a camera's go2rtc stream (api/frame.jpeg)"""
+
+    def __init__(self, timeout=10):
+        self.session = requests.Session()
+        self.timeout = timeout
+
+    def grab(self, camera):
+        try:
+            response = self.session.get(camera.get_frame_url(), timeout=self.timeout)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            raise FrameSourceError(f'{camera.name}: {e}')
+        return response.content
+
+
+class FileFrameSource:
+    """
+    Fake stream for local testing: replays the images in
+    <directory>/<camera name>/ (or <directory>/ itself) in a loop
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._frames = {}
+
+    def _files(self, camera):
+        folder = os.path.join(self.directory, camera.name)
+        if not os.path.isdir(folder):
+            folder = self.directory
+        return sorted(
+            os.path.join(folder, name) for name in os.listdir(folder)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+
+    def grab(self, camera):
+        if camera.id not in self._frames:
+            files = self._files(camera)
+            if not files:
+                raise FrameSourceError(f'{camera.name}: no images in {self.directory}')
+            self._frames[camera.id] = cycle(files)
+        with open(next(self._frames[camera.id]), 'rb') as f:
+            return f.read()
+
+
+# ============================================
+# Perceptual hashing
+# ============================================
+
+def dhash(image_bytes, size=8):
+    """
+    Difference hash: compare neighboring pixels of a (size+1) x size
+    grayscale thumbnail - robust to compression noise and small lighting changes
+
+    Returns:
+        int: size*size bit hash
+    """
+    with Image.open(io.BytesIO(image_bytes)) as image:
+        image.draft('L', (size * 4, size * 4))  # Fast JPEG downscale while decoding
+        pixels = list(image.convert('L').resize((size + 1, size), Image.BILINEAR).getdata())
+
+    value = 0
+    for row in range(size):
+        offset = row * (size + 1)
+        for col in range(size):
+            value = (value << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return value
+
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+# ============================================
+# Sampler
+# ============================================
+
+class FrameSampler:
+    """
+    Periodically pull a frame from each active camera, drop near-duplicates
+    of the camera's last submitted frame and send the rest to the AI
+    service's /batch-detect in batches
+
+    Detections are stored against the camera's owner, location and field.
+    """
+
+    def __init__(self, source, interval=60, batch_size=8, hash_threshold=DEFAULT_HASH_THRESHOLD,
+                 cameras=None, ai_url=AI_SERVICE_URL, log=print):
+        self.source = source
+        self.interval = interval
+        self.batch_size = batch_size
+        self.hash_threshold = hash_threshold
+        self.camera_ids = cameras
+        self.ai_url = ai_url.rstrip('/')
+        self.log = log
+        self.session = requests.Session()
+        self.last_hash = {}
+        self.pending = []
+        self._fields = {}
+        self.stats = {'frames': 0, 'duplicates': 0, 'errors': 0, 'submitted': 0, 'detections': 0}
+
+    def cameras(self):
+        # Cameras the health probe found offline are skipped until they recover
+        cameras = Camera.objects.filter(is_active=True).exclude(status='offline') \
+            .select_related('owner', 'location')
+        if self.camera_ids:
+            cameras = cameras.filter(id__in=self.camera_ids)
+        return list(cameras)
+
+    def sample(self, camera):
+        """Grab one frame; queue it unless it repeats the last submitted one"""
+        try:
+            frame = self.source.grab(camera)
+            frame_hash = dhash(frame)
+        except (FrameSourceError, UnidentifiedImageError, OSError) as e:
+            self.stats['errors'] += 1
+            self.log(f'Frame error: {e}')
+            return
+
+        self.stats['frames'] += 1
+        previous = self.last_hash.get(camera.id)
+        if previous is not None and hamming(previous, frame_hash) <= self.hash_threshold:
+            self.stats['duplicates'] += 1
+            return
+
+        self.last_hash[camera.id] = frame_hash
+        self.pending.append((camera, frame))
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def camera_field(self, camera):
+        """Field the camera watches: its location's field, else the field containing it (cached per cycle)"""
+        if camera.id not in self._fields:
+            location = camera.location
+            point = location.centroid or location.point
+            field = Field.objects.filter(location=location).first()
+            if field is None and point is not None:
+                field = resolve_field(camera.owner, point.y, point.x)
+            self._fields[camera.id] = field
+        return self._fields[camera.id]
+
+    def flush(self):
+        """Submit queued frames, one /batch-detect request per crop (routes to crop models)"""
+        batch, self.pending = self.pending, []
+        groups = {}
+        for camera, frame in batch:
+            field = self.camera_field(camera)
+            groups.setdefault(field.crop_type if field else None, []).append((camera, frame))
+        for crop_type, frames in groups.items():
+            self.submit(frames, crop_type)
+
+    def submit(self, batch, crop_type=None):
+        """Run one batch of frames through the AI service and store the results"""
+        stamp = int(time.time())
+        names = [f'camera{camera.id}_{stamp}_{i}.jpg' for i, (camera, _) in enumerate(batch)]
+        try:
+            response = self.session.post(
+                f'{self.ai_url}/batch-detect',
+                files=[('files', (name, frame, 'image/jpeg')) for name, (_, frame) in zip(names, batch)],
+                params={'crop_type': crop_type} if crop_type else None,
+                timeout=120,
+            )
+            response.raise_for_status()
+            results = {item['filename']: item for item in response.json()}
+        except (requests.exceptions.RequestException, ValueError, KeyError, TypeError) as e:
+            # Forget the hashes so these scenes are retried next cycle
+            for camera, _ in batch:
+                self.last_hash.pop(camera.id, None)
+            self.stats['errors'] += len(batch)
+            self.log(f'AI service error: {e!r}')
+            return
+
+        self.stats['submitted'] += len(batch)
+        for name, (camera, frame) in zip(names, batch):
+            item = results.get(name, {})
+            if 'error' in item:
+                self.stats['errors'] += 1
+                self.log(f'{camera.name}: {item["error"]}')
+            elif item.get('result', {}).get('detected'):
+                # One bad result (or a DB error) must not lose the rest of the batch
+                try:
+                    self.store(camera, name, frame, item['result'])
+                except Exception as e:
+                    self.stats['errors'] += 1
+                    self.log(f'{camera.name}: could not store detections: {e!r}')
+
+    def store(self, camera, name, frame, result):
+        from disease_detection.models import DiseaseDetection
+
+        location = camera.location
+        point = location.centroid or location.point
+        field = self.camera_field(camera)
+
+        saved = []
+        image = None
+        for disease in result.get('diseases', []):
+            severity = 'high' if disease['confidence'] > 0.8 else 'medium' if disease['confidence'] > 0.5 else 'low'
+            detection = DiseaseDetection(
+                user_id=camera.owner_id,
+                field=field,
+                camera=camera,
+                disease_name=disease['class'],
+                confidence=disease['confidence'],
+                severity=severity,
+                bbox=disease.get('bbox'),
+                model_version=result.get('model_version', ''),
+                latitude=point.y if point else None,
+                longitude=point.x if point else None,
+            )
+            # One stored frame shared by every detection in it
+            if image is None:
+                detection.image.save(name, ContentFile(frame), save=False)
+                image = detection.image.name
+            else:
+                detection.image.name = image
+            detection.save()
+            saved.append({
+                'id': detection.id,
+                'disease_name': detection.disease_name,
+                'confidence': detection.confidence,
+                'severity': detection.severity,
+            })
+
+        self.stats['detections'] += len(saved)
+        get_event_bus().publish(camera.owner_id, 'detection.created', {
+            'field_id': field.id if field else None,
+            'camera_id': camera.id,
+            'detections': saved,
+        })
+
+    def run_cycle(self):
+        self._fields = {}
+        for camera in self.cameras():
+            self.sample(camera)
+        self.flush()
+
+    def run(self, cycles=None):
+        """Sample every interval seconds (forever unless cycles is given)"""
+        done = 0
+        while cycles is None or done < cycles:
+            started = time.monotonic()
+            try:
+                self.run_cycle()
+            except Exception as e:
+                # Keep the daemon alive: drop this cycle's frames and reset stale DB connections
+                self.pending = []
+                self.stats['errors'] += 1
+                self.log(f'Cycle failed: {e!r}')
+                close_old_connections()
+            done += 1
+            self.log(
+                f"Cycle {done}: {self.stats['frames']} frames, {self.stats['duplicates']} duplicates, "
+                f"{self.stats['submitted']} submitted, {self.stats['detections']} detections"
+            )
+            if cycles is None or done < cycles:
+                time.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+        return self.stats
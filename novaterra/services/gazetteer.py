@@ -0,0 +1,178 @@
+# novaterra/services/gazetteer.py
+
+import bisect
+import csv
+import difflib
+import math
+import os
+import re
+import unicodedata
+from collections import namedtuple
+from functools import lru_cache
+
+# Bundled places dataset (governorate capitals and main agricultural towns)
+PLACES_FILE = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'tn_places.csv')
+
+DEFAULT_COORDINATES = (36.8, 10.2)  # Tunisia center
+
+# Nearest-place search radius for reverse geocoding (km)
+REVERSE_MAX_DISTANCE_KM = 60
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.2
+
+Place = namedtuple('Place', ['name', 'governorate', 'latitude', 'longitude', 'population'])
+
+
+def normalize(name):
+    """Lowercase, strip accents and punctuation: "Béja" / "BEJA " -> "beja" """
+    name = unicodedata.normalize('NFKD', name or '')
+    name = ''.join(c for c in name if not unicodedata.combining(c))
+    name = re.sub(r"[^a-z0-9]+", ' ', name.lower())
+    return name.strip()
+
+
+def region_name(place):
+    return f'{place.governorate} Governorate'
+
+
+class Gazetteer:
+    """
+    In-memory place index
+
+    - exact lookup: sorted array of normalized names (bisect)
+    - prefix lookup: trie, each node keeping its places ranked by population
+    - fuzzy lookup: difflib over the normalized names
+    - reverse geocoding: places sorted by latitude, scanned within a band
+    """
+
+    PREFIX_RESULTS = 10
+
+    def __init__(self, places, aliases):
+        self.places = places
+
+        # (normalized name, place index) sorted by name
+        entries = sorted(aliases)
+        self._keys = [key for key, _ in entries]
+        self._key_places = [index for _, index in entries]
+
+        self._trie = {}
+        for key, index in entries:
+            node = self._trie
+            for char in key:
+                node = node.setdefault(char, {})
+                ranked = node.setdefault('', [])
+                if index not in ranked:
+                    ranked.append(index)
+        self._rank_trie(self._trie)
+
+        by_latitude = sorted(range(len(places)), key=lambda i: places[i].latitude)
+        self._latitudes = [places[i].latitude for i in by_latitude]
+        self._latitude_order = by_latitude
+
+    def _rank_trie(self, node):
+        for char, child in node.items():
+            if char == '':
+                child.sort(key=lambda i: -self.places[i].population)
+                del child[self.PREFIX_RESULTS:]
+            else:
+                self._rank_trie(child)
+
+    @classmethod
+    def from_csv(cls, path=PLACES_FILE):
+        places = []
+        aliases = []
+        with open(path, encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                index = len(places)
+                places.append(Place(
+                    name=row['name'],
+                    governorate=row['governorate'],
+                    latitude=float(row['latitude']),
+                    longitude=float(row['longitude']),
+                    population=int(row['population'] or 0),
+                ))
+                names = [row['name']] + [n for n in row['alternate_names'].split('|') if n]
+                for key in {normalize(n) for n in names}:
+                    aliases.append((key, index))
+        return cls(places, aliases)
+
+    def lookup(self, name):
+        """Exact match on the normalized name, or None"""
+        key = normalize(name)
+        i = bisect.bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self.places[self._key_places[i]]
+        return None
+
+    def search(self, prefix, limit=PREFIX_RESULTS):
+        """Places whose name (or alternate name) starts with prefix, most populous first"""
+        node = self._trie
+        for char in normalize(prefix):
+            node = node.get(char)
+            if node is None:
+                return []
+        return [self.places[i] for i in node.get('', [])[:limit]]
+
+    def fuzzy(self, name, cutoff=0.8):
+        """Closest place by spelling ("Kairaouan" -> Kairouan), or None"""
+        matches = difflib.get_close_matches(normalize(name), self._keys, n=1, cutoff=cutoff)
+        return self.lookup(matches[0]) if matches else None
+
+    def geocode(self, name):
+        """Exact then fuzzy lookup"""
+        if not name:
+            return None
+        return self.lookup(name) or self.fuzzy(name)
+
+    def reverse(self, latitude, longitude, max_distance_km=REVERSE_MAX_DISTANCE_KM):
+        """Nearest place within max_distance_km, or None"""
+        band = max_distance_km / KM_PER_DEGREE_LAT
+        lo = bisect.bisect_left(self._latitudes, latitude - band)
+        hi = bisect.bisect_right(self._latitudes, latitude + band)
+
+        nearest, nearest_distance = None, max_distance_km
+        for i in self._latitude_order[lo:hi]:
+            place = self.places[i]
+            distance = haversine_km(latitude, longitude, place.latitude, place.longitude)
+            if distance <= nearest_distance:
+                nearest, nearest_distance = place, distance
+        return nearest
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+@lru_cache(maxsize=1)
+def get_gazetteer():
+    """Process-wide index, loaded on first use"""
+    return Gazetteer.from_csv()
+
+
+def locate_city(city):
+    """
+    Resolve a user-entered city name
+
+    Returns:
+        tuple: (latitude, longitude, city, region) - Tunisia center and the
+        title-cased input when the city is unknown
+    """
+    place = get_gazetteer().geocode(city)
+    if place is None:
+        latitude, longitude = DEFAULT_COORDINATES
+        return latitude, longitude, (city or '').strip().title(), ''
+    return place.latitude, place.longitude, place.name, region_name(place)
+
+
+def fill_address(location):
+    """Set blank city/region on a Location from its point (nearest place)"""
+    if location.point is None or (location.city and location.region):
+        return location
+    place = get_gazetteer().reverse(location.point.y, location.point.x)
+    if place is not None:
+        location.city = location.city or place.name
+        location.region = location.region or region_name(place)
+    return location
@@ -0,0 +1,148 @@
+# novaterra/services/geometry.py
+
+import numpy as np
+
+EARTH_RADIUS_M = 6378137.0  # WGS84 semi-major axis
+
+
+def _flatten_rings(geometries):
+    """
+    Concatenate all rings of (Multi)Polygons into flat lon/lat arrays
+
+    Returns:
+        tuple: (lon, lat, ring_starts, ring_geometry, ring_sign) where
+        ring_sign is +1 for shells and -1 for holes
+    """
+    lon, lat, starts, ring_geometry, ring_sign = [], [], [], [], []
+    offset = 0
+    for index, geometry in enumerate(geometries):
+        polygons = [geometry] if geometry.geom_type == 'Polygon' else list(geometry)
+        for polygon in polygons:
+            for ring_index, ring in enumerate(polygon.coords):
+                coords = np.asarray(ring, dtype=np.float64)[:, :2]
+                lon.append(coords[:, 0])
+                lat.append(coords[:, 1])
+                starts.append(offset)
+                ring_geometry.append(index)
+                ring_sign.append(1.0 if ring_index == 0 else -1.0)
+                offset += len(coords)
+
+    if not starts:
+        empty = np.empty(0)
+        return empty, empty, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), empty
+    return (
+        np.concatenate(lon),
+        np.concatenate(lat),
+        np.asarray(starts, dtype=np.int64),
+        np.asarray(ring_geometry, dtype=np.int64),
+        np.asarray(ring_sign),
+    )
+
+
+def _next_in_ring(values, starts):
+    """values shifted by one position within each (closed) ring"""
+    shifted = np.roll(values, -1)
+    ends = np.append(starts[1:], len(values)) - 1
+    shifted[ends] = values[starts]
+    return shifted
+
+
+def polygon_metrics(geometries):
+    """
+    Geodesic areas and centroids for many lon/lat (Multi)Polygons at once
+
+    Area uses the spherical polygon formula (Chamberlain & Duquette), i.e.
+    square meters on the ground rather than square degrees; centroids are
+    area-weighted in a local equirectangular projection, which is accurate
+    at parcel scale.
+
+    Args:
+        geometries (list): GEOS Polygon/MultiPolygon in EPSG:4326
+
+    Returns:
+        tuple: (area_m2, centroid_lon, centroid_lat) numpy arrays, one entry
+        per geometry
+    """
+    count = len(geometries)
+    lon, lat, starts, ring_geometry, ring_sign = _flatten_rings(geometries)
+    if not len(starts):
+        return np.zeros(count), np.full(count, np.nan), np.full(count, np.nan)
+
+    lam, phi = np.radians(lon), np.radians(lat)
+    lam_next, phi_next = _next_in_ring(lam, starts), _next_in_ring(phi, starts)
+
+    # Spherical area per ring (absolute value, sign from shell/hole)
+    terms = (lam_next - lam) * (2 + np.sin(phi) + np.sin(phi_next))
+    ring_area = np.abs(np.add.reduceat(terms, starts)) * EARTH_RADIUS_M ** 2 / 2
+    area = np.bincount(ring_geometry, weights=ring_sign * ring_area, minlength=count)
+
+    # Planar centroid per ring in a local projection around each geometry
+    ring_lengths = np.diff(np.append(starts, len(lon)))
+    point_geometry = np.repeat(ring_geometry, ring_lengths)
+    reference_lat = np.radians(
+        np.bincount(point_geometry, weights=lat, minlength=count)
+        / np.maximum(np.bincount(point_geometry, minlength=count), 1)
+    )
+    x = lam * np.cos(reference_lat[point_geometry])
+    x_next = lam_next * np.cos(reference_lat[point_geometry])
+    cross = x * phi_next - x_next * phi
+
+    # Ring moments; |A| * centroid == moment * sign(A), holes subtract
+    signed = np.add.reduceat(cross, starts) / 2
+    weight = ring_sign * np.sign(signed)
+    moment_x = np.add.reduceat((x + x_next) * cross, starts) / 6 * weight
+    moment_y = np.add.reduceat((phi + phi_next) * cross, starts) / 6 * weight
+
+    total = np.bincount(ring_geometry, weights=ring_sign * np.abs(signed), minlength=count)
+    total = np.where(total == 0, np.nan, total)
+    centroid_x = np.bincount(ring_geometry, weights=moment_x, minlength=count) / total
+    centroid_y = np.bincount(ring_geometry, weights=moment_y, minlength=count) / total
+
+    centroid_lat = np.degrees(centroid_y)
+    centroid_lon = np.degrees(centroid_x / np.cos(reference_lat))
+    return area, centroid_lon, centroid_lat
+
+
+def polygon_perimeters(geometries):
+    """Geodesic perimeter in meters (shells and holes) for many (Multi)Polygons"""
+    count = len(geometries)
+    lon, lat, starts, ring_geometry, _ = _flatten_rings(geometries)
+    if not len(starts):
+        return np.zeros(count)
+
+    lam, phi = np.radians(lon), np.radians(lat)
+    lam_next, phi_next = _next_in_ring(lam, starts), _next_in_ring(phi, starts)
+
+    # Haversine length of every segment
+    a = (np.sin((phi_next - phi) / 2) ** 2
+         + np.cos(phi) * np.cos(phi_next) * np.sin((lam_next - lam) / 2) ** 2)
+    segments = 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    ring_length = np.add.reduceat(segments, starts)
+    return np.bincount(ring_geometry, weights=ring_length, minlength=count)
+
+
+def shape_metrics(geometry):
+    """
+    Derived values stored on Location for one shape
+
+    Returns:
+        dict: area_m2, perimeter_m, centroid (lon, lat) and the bbox
+        (min_lat, min_lon, max_lat, max_lon); area and perimeter are only
+        set for polygons
+    """
+    min_lon, min_lat, max_lon, max_lat = geometry.extent
+    metrics = {
+        'area_m2': None,
+        'perimeter_m': None,
+        'centroid': (geometry.centroid.x, geometry.centroid.y),
+        'min_lat': min_lat,
+        'min_lon': min_lon,
+        'max_lat': max_lat,
+        'max_lon': max_lon,
+    }
+    if geometry.geom_type in ('Polygon', 'MultiPolygon') and not geometry.empty:
+        area, centroid_lon, centroid_lat = polygon_metrics([geometry])
+        metrics['area_m2'] = float(area[0])
+        metrics['perimeter_m'] = float(polygon_perimeters([geometry])[0])
+        metrics['centroid'] = (float(centroid_lon[0]), float(centroid_lat[0]))
+    return metrics
@@ -0,0 +1,45 @@
+# novaterra/services/geotag.py
+
+from PIL import Image, UnidentifiedImageError
+
+# EXIF tag ids
+GPS_IFD = 0x8825
+GPS_LATITUDE_REF = 1
+GPS_LATITUDE = 2
+GPS_LONGITUDE_REF = 3
+GPS_LONGITUDE = 4
+
+
+def _degrees(value, ref):
+    """(degrees, minutes, seconds) rationals + N/S/E/W reference -> signed decimal degrees"""
+    degrees, minutes, seconds = (float(part) for part in value)
+    decimal = degrees + minutes / 60 + seconds / 3600
+    return -decimal if ref in ('S', 'W') else decimal
+
+
+def read_gps_coordinates(image_file):
+    """
+    GPS position stored in a photo's EXIF metadata
+
+    Only the metadata is parsed (no pixel decoding); the file position is
+    restored afterwards so the upload can still be forwarded and saved.
+
+    Returns:
+        tuple: (latitude, longitude) or None if the image has no usable GPS tags
+    """
+    position = image_file.tell()
+    try:
+        with Image.open(image_file) as image:
+            gps = image.getexif().get_ifd(GPS_IFD)
+        if not gps or GPS_LATITUDE not in gps or GPS_LONGITUDE not in gps:
+            return None
+        latitude = _degrees(gps[GPS_LATITUDE], gps.get(GPS_LATITUDE_REF, 'N'))
+        longitude = _degrees(gps[GPS_LONGITUDE], gps.get(GPS_LONGITUDE_REF, 'E'))
+    except (UnidentifiedImageError, OSError, ValueError, TypeError, ZeroDivisionError):
+        return None
+    finally:
+        image_file.seek(position)
+
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or (latitude == 0 and longitude == 0):
+        return None
+    return latitude, longitude
@@ -0,0 +1,213 @@
+# novaterra/services/onboarding.py
+
+import csv
+import io
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.gis.geos import Point
+from django.db import IntegrityError, transaction
+
+from ..models import Location, UserProfile
+from .gazetteer import locate_city
+
+
+class UsernameTaken(Exception):
+    pass
+
+
+def _is_username_violation(error):
+    """auth_user.username unique violation (SQLite and PostgreSQL messages)"""
+    message = str(error)
+    return 'auth_user' in message and 'username' in message
+
+
+def register_farmer(username, password, city, email='', phone_number='', farm_name='My Farm'):
+    """
+    Create user, profile and farm location as one atomic unit
+
+    Three INSERTs: the user is inserted without the post_save signal and its
+    profile created here with its final values (no follow-up UPDATE), and
+    the farm location is marked as already reflected in profile.primary_city.
+
+    Raises:
+        UsernameTaken: username already exists (unique constraint)
+    """
+    latitude, longitude, city_name, region = locate_city(city)
+
+    user = User(username=username, email=email)
+    user.set_password(password)
+
+    try:
+        with transaction.atomic():
+            # bulk_create skips post_save, so the signal does not create an empty profile first
+            User.objects.bulk_create([user])
+            UserProfile.objects.create(
+                user=user,
+                farm_name=farm_name,
+                phone_number=phone_number,
+                primary_city=city_name,
+            )
+            farm_location = Location(
+                user=user,
+                name=farm_name,
+                location_type='farm',
+                city=city_name,
+                region=region,
+                point=Point(longitude, latitude),  # Point(longitude, latitude)
+            )
+            farm_location._summary_synced = True
+            farm_location.save()
+    except IntegrityError as e:
+        if not _is_username_violation(e):
+            raise
+        raise UsernameTaken(username)
+
+    return user, farm_location
+
+
+# ============================================
+# Bulk import (cooperative members)
+# ============================================
+
+MEMBER_FIELDS = ['username', 'password', 'email', 'phone_number', 'farm_name', 'city']
+
+
+def read_members(data, file_format):
+    """
+    Parse member records from CSV (header row) or JSON (array or JSON Lines)
+
+    Args:
+        data (str): file contents
+        file_format (str): 'csv' or 'json'
+
+    Yields:
+        dict: one member per record
+    """
+    if file_format == 'csv':
+        for row in csv.DictReader(io.StringIO(data)):
+            yield {key: (row.get(key) or '').strip() for key in MEMBER_FIELDS}
+    elif file_format == 'json':
+        stripped = data.lstrip()
+        records = json.loads(stripped) if stripped.startswith('[') else (
+            json.loads(line) for line in stripped.splitlines() if line.strip()
+        )
+        for number, record in enumerate(records, start=1):
+            if not isinstance(record, dict):
+                raise ValueError(f'record {number} is not an object')
+            yield {key: str(record.get(key) or '').strip() for key in MEMBER_FIELDS}
+    else:
+        raise ValueError("file_format must be 'csv' or 'json'")
+
+
+def _init_hasher():
+    """Make sure Django is configured in spawned worker processes"""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+
+
+def _hash_passwords(passwords):
+    return [make_password(p) for p in passwords]
+
+
+def import_members(members, batch_size=500, workers=None, log=print):
+    """
+    Onboard many farmers: hash passwords in a process pool, then insert
+    users, profiles and farm locations with bulk_create (one transaction
+    per batch)
+
+    Args:
+        members (iterable): dicts with MEMBER_FIELDS
+        batch_size (int): members per transaction
+        workers (int): process pool size (None = CPU count, 0 = inline)
+
+    Returns:
+        dict: {"created": int, "errors": [{"row": int, "username": str, "error": str}]}
+    """
+    report = {'created': 0, 'errors': []}
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_hasher) if workers != 0 else None
+
+    def flush(batch):
+        usernames = [m['username'] for _, m in batch]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        valid = []
+        for row, member in batch:
+            if member['username'] in existing:
+                report['errors'].append({'row': row, 'username': member['username'], 'error': 'Username already exists'})
+            else:
+                valid.append(member)
+        if not valid:
+            return
+
+        # PBKDF2 is deliberately slow - spread it over processes in chunks
+        passwords = [m['password'] for m in valid]
+        if pool:
+            chunk = max(1, len(passwords) // (4 * (workers or 4)))
+            chunks = [passwords[i:i + chunk] for i in range(0, len(passwords), chunk)]
+            hashed = [h for part in pool.map(_hash_passwords, chunks) for h in part]
+        else:
+            hashed = _hash_passwords(passwords)
+
+        with transaction.atomic():
+            User.objects.bulk_create([
+                User(username=m['username'], email=m['email'], password=password_hash)
+                for m, password_hash in zip(valid, hashed)
+            ])
+            user_ids = dict(
+                User.objects.filter(username__in=[m['username'] for m in valid]).values_list('username', 'id')
+            )
+
+            # bulk_create skips post_save, so profiles are created here
+            resolved = {m['username']: locate_city(m['city']) for m in valid}
+            UserProfile.objects.bulk_create([
+                UserProfile(
+                    user_id=user_ids[m['username']],
+                    farm_name=m['farm_name'] or 'My Farm',
+                    phone_number=m['phone_number'],
+                    primary_city=resolved[m['username']][2],
+                )
+                for m in valid
+            ])
+
+            locations = []
+            for m in valid:
+                latitude, longitude, city_name, region = resolved[m['username']]
+                locations.append(Location(
+                    user_id=user_ids[m['username']],
+                    name=m['farm_name'] or 'My Farm',
+                    location_type='farm',
+                    city=city_name,
+                    region=region,
+                    point=Point(longitude, latitude),
+                ))
+            Location.objects.bulk_create(locations)
+
+        report['created'] += len(valid)
+        log(f"Imported {report['created']} members")
+
+    try:
+        batch = []
+        seen = set()
+        for row, member in enumerate(members, start=1):
+            if not member['username'] or not member['password'] or not member['city']:
+                report['errors'].append({'row': row, 'username': member['username'], 'error': 'username, password and city are required'})
+                continue
+            if member['username'] in seen:
+                report['errors'].append({'row': row, 'username': member['username'], 'error': 'Duplicate username in file'})
+                continue
+            seen.add(member['username'])
+            batch.append((row, member))
+            if len(batch) >= batch_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return report
@@ -0,0 +1,413 @@
+# novaterra/services/outbreak_clusters.py
+
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Location, Recommendation, UserProfile
+from . import geohash as geohash_codec
+from .sms_service import SMSService
+
+KM_PER_DEGREE_LAT = 110.574
+KM_PER_DEGREE_LON = 111.320  # At the equator, scaled by cos(latitude)
+
+# Candidate point pairs are evaluated in batches of at most BLOCK x BLOCK
+BLOCK = 2048
+
+# Safety cap on union-find passes (clusters converge in a few); hitting it
+# raises rather than silently returning split clusters
+MAX_PASSES = 50
+
+
+# ============================================
+# Loading (chunked, columnar)
+# ============================================
+
+def load_detections(since, chunk_size=50000):
+    """
+    Recent detections with a known position, grouped by disease
+
+    Position is the photo's GPS fix, else the centroid of its field, else
+    the center of its outbreak cell. Rows are streamed in chunks into
+    compact typed arrays.
+
+    Returns:
+        dict: disease_name -> {"id", "user", "lat", "lon", "t"} numpy arrays
+    """
+    from disease_detection.models import DiseaseDetection
+
+    columns = defaultdict(lambda: {
+        'id': array('q'), 'user': array('q'), 'lat': array('d'), 'lon': array('d'), 't': array('d'),
+    })
+    rows = DiseaseDetection.objects.filter(detection_date__gte=since) \
+        .exclude(status='ignored') \
+        .order_by() \
+        .values_list(
+            'id', 'user_id', 'disease_name', 'latitude', 'longitude',
+            'field__location__centroid', 'geohash', 'detection_date',
+        ) \
+        .iterator(chunk_size=chunk_size)
+
+    for detection_id, user_id, disease, lat, lon, centroid, cell, detected_at in rows:
+        if lat is None or lon is None:
+            if centroid is not None:
+                lat, lon = centroid.y, centroid.x
+            elif cell:
+                lat, lon = geohash_codec.center(cell)
+            else:
+                continue
+        data = columns[disease]
+        data['id'].append(detection_id)
+        data['user'].append(user_id)
+        data['lat'].append(lat)
+        data['lon'].append(lon)
+        data['t'].append(detected_at.timestamp())
+
+    return {
+        disease: {
+            name: np.frombuffer(values, dtype=np.int64 if values.typecode == 'q' else np.float64)
+            for name, values in data.items()
+        }
+        for disease, data in columns.items()
+    }
+
+
+# ============================================
+# Clustering (grid-indexed DBSCAN, space + time)
+# ============================================
+
+def _cell_pairs(x, y, eps_km):
+    """
+    Grid spatial index: points sorted by eps-sized cell
+
+    Returns:
+        tuple: (order, row_start, row_count, col_start, col_count) - for
+        every occupied cell and each occupied neighbor cell (including
+        itself), the slices of order holding their points
+    """
+    cx = np.floor(x / eps_km).astype(np.int64)
+    cy = np.floor(y / eps_km).astype(np.int64)
+    cx -= cx.min() - 1
+    cy -= cy.min() - 1
+    width = int(cy.max()) + 2
+    keys = cx * width + cy
+
+    order = np.argsort(keys, kind='stable')
+    cells, starts, counts = np.unique(keys[order], return_index=True, return_counts=True)
+
+    row_cells, col_cells = [], []
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            neighbor = cells + dx * width + dy
+            j = np.minimum(np.searchsorted(cells, neighbor), len(cells) - 1)
+            found = cells[j] == neighbor
+            row_cells.append(np.nonzero(found)[0])
+            col_cells.append(j[found])
+    row_cells = np.concatenate(row_cells)
+    col_cells = np.concatenate(col_cells)
+    return order, starts[row_cells], counts[row_cells], starts[col_cells], counts[col_cells]
+
+
+def _candidate_pairs(index, max_pairs=BLOCK * BLOCK):
+    """
+    Yield (i, j) arrays of all point pairs from neighboring cells, in
+    batches of about max_pairs so memory stays bounded
+    """
+    order, row_start, row_count, col_start, col_count = index
+    sizes = row_count * col_count
+
+    def expand(ids):
+        batch_sizes = sizes[ids]
+        pair = np.repeat(ids, batch_sizes)
+        offset = np.arange(batch_sizes.sum()) - np.repeat(np.cumsum(batch_sizes) - batch_sizes, batch_sizes)
+        return (
+            order[row_start[pair] + offset // col_count[pair]],
+            order[col_start[pair] + offset % col_count[pair]],
+        )
+
+    # Oversized cell pairs are split into BLOCK x BLOCK tiles
+    for k in np.nonzero(sizes > max_pairs)[0]:
+        for rs in range(0, row_count[k], BLOCK):
+            rows = order[row_start[k] + rs:row_start[k] + min(rs + BLOCK, row_count[k])]
+            for cs in range(0, col_count[k], BLOCK):
+                cols = order[col_start[k] + cs:col_start[k] + min(cs + BLOCK, col_count[k])]
+                yield np.repeat(rows, len(cols)), np.tile(cols, len(rows))
+
+    small = np.nonzero(sizes <= max_pairs)[0]
+    boundaries = np.searchsorted(np.cumsum(sizes[small]), np.arange(max_pairs, sizes[small].sum() + max_pairs, max_pairs))
+    for ids in np.split(small, np.unique(boundaries[:-1] + 1)):
+        if len(ids):
+            yield expand(ids)
+
+
+def dbscan(x, y, t, eps_km, eps_seconds, min_samples):
+    """
+    DBSCAN where two detections are neighbors if they are within eps_km
+    (planar km) and eps_seconds of each other
+
+    Only points in the same or adjacent grid cells are compared, in
+    bounded batches of candidate pairs, so memory does not grow with the
+    input. Core points are connected with a vectorized union-find.
+
+    Returns:
+        numpy array: cluster label per point (index of a representative
+        point), -1 for noise
+    """
+    n = len(x)
+    labels = np.full(n, -1, dtype=np.int64)
+    if n == 0:
+        return labels
+
+    index = _cell_pairs(x, y, eps_km)
+    eps_sq = eps_km ** 2
+
+    def neighbor_pairs():
+        for i, j in _candidate_pairs(index):
+            close = ((x[i] - x[j]) ** 2 + (y[i] - y[j]) ** 2 <= eps_sq) & (np.abs(t[i] - t[j]) <= eps_seconds)
+            yield i[close], j[close]
+
+    # Pass 1: neighbor counts (including the point itself) -> core points
+    counts = np.zeros(n, dtype=np.int64)
+    for i, _ in neighbor_pairs():
+        counts += np.bincount(i, minlength=n)
+    core = counts >= min_samples
+    if not core.any():
+        return labels
+
+    # Pass 2..: union-find over core-core links - hook each root onto the
+    # smaller root, then compress paths so parent[] holds roots again
+    parent = np.arange(n)
+    converged = False
+    for _ in range(MAX_PASSES):
+        changed = False
+        for i, j in neighbor_pairs():
+            linked = core[i] & core[j]
+            root_i, root_j = parent[i[linked]], parent[j[linked]]
+            crossing = root_i != root_j
+            if not crossing.any():
+                continue
+            changed = True
+            np.minimum.at(
+                parent,
+                np.maximum(root_i, root_j)[crossing],
+                np.minimum(root_i, root_j)[crossing],
+            )
+            while True:
+                compressed = parent[parent]
+                if np.array_equal(compressed, parent):
+                    break
+                parent = compressed
+        if not changed:
+            converged = True
+            break
+    if not converged:
+        raise RuntimeError(f'DBSCAN union-find did not converge in {MAX_PASSES} passes')
+    label = parent
+    labels[core] = label[core]
+
+    # Border points join the cluster of a core neighbor
+    for i, j in neighbor_pairs():
+        attach = ~core[i] & core[j]
+        border = np.full(n, n)
+        np.minimum.at(border, i[attach], label[j[attach]])
+        hit = border < n
+        labels[hit] = np.where(labels[hit] == -1, border[hit], np.minimum(labels[hit], border[hit]))
+
+    return labels
+
+
+def find_clusters(data, eps_km=5.0, eps_days=7, min_samples=5, min_farms=2):
+    """
+    Clusters of one disease's detections spanning at least min_farms users
+
+    Returns:
+        list: dicts with latitude, longitude, radius_km, detection_ids,
+        user_ids, first/last detection timestamps
+    """
+    if not len(data['id']):
+        return []
+
+    reference_lat = np.radians(np.mean(data['lat']))
+    x = data['lon'] * KM_PER_DEGREE_LON * np.cos(reference_lat)
+    y = data['lat'] * KM_PER_DEGREE_LAT
+    labels = dbscan(x, y, data['t'], eps_km, eps_days * 86400, min_samples)
+
+    clustered = labels >= 0
+    if not clustered.any():
+        return []
+
+    clusters = []
+    cluster_order = np.argsort(labels[clustered], kind='stable')
+    members_all = np.nonzero(clustered)[0][cluster_order]
+    _, starts = np.unique(labels[members_all], return_index=True)
+    for members in np.split(members_all, starts[1:]):
+        users = np.unique(data['user'][members])
+        if len(users) < min_farms:
+            continue
+        cx, cy = x[members].mean(), y[members].mean()
+        clusters.append({
+            'latitude': float(cy / KM_PER_DEGREE_LAT),
+            'longitude': float(cx / (KM_PER_DEGREE_LON * np.cos(reference_lat))),
+            'radius_km': float(np.sqrt(((x[members] - cx) ** 2 + (y[members] - cy) ** 2).max())),
+            'detection_ids': data['id'][members].tolist(),
+            'user_ids': users.tolist(),
+            'first': float(data['t'][members].min()),
+            'last': float(data['t'][members].max()),
+        })
+    return clusters
+
+
+# ============================================
+# Outbreak records and alerts
+# ============================================
+
+def _distance_km(lat1, lon1, lat2, lon2):
+    """Haversine distance, vectorized over the second point"""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    a = (np.sin((phi2 - phi1) / 2) ** 2
+         + np.cos(phi1) * np.cos(phi2) * np.sin(np.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * 6371.0 * np.arcsin(np.sqrt(a))
+
+
+def load_farm_points(chunk_size=10000):
+    """(user ids, latitudes, longitudes) of all farm headquarters"""
+    users, lats, lons = array('q'), array('d'), array('d')
+    farms = Location.objects.filter(location_type='farm', point__isnull=False) \
+        .order_by() \
+        .values_list('user_id', 'point') \
+        .iterator(chunk_size=chunk_size)
+    for user_id, point in farms:
+        users.append(user_id)
+        lats.append(point.y)
+        lons.append(point.x)
+    return (
+        np.frombuffer(users, dtype=np.int64),
+        np.frombuffer(lats, dtype=np.float64),
+        np.frombuffer(lons, dtype=np.float64),
+    )
+
+
+def alert_nearby_farms(outbreak, farms, alert_radius_km, send_sms=True):
+    """
+    Alert farmers within alert_radius_km of the outbreak's edge who were
+    not alerted yet: an advisor alert plus an SMS when a phone is on file
+
+    Returns:
+        int: farmers alerted
+    """
+    users, lats, lons = farms
+    if not len(users):
+        return 0
+
+    distances = _distance_km(outbreak.latitude, outbreak.longitude, lats, lons)
+    nearby = set(np.unique(users[distances <= outbreak.radius_km + alert_radius_km]).tolist())
+    nearby -= set(outbreak.notified_users.values_list('id', flat=True))
+    if not nearby:
+        return 0
+
+    description = (
+        f'{outbreak.disease_name} has been detected on {outbreak.farm_count} farms '
+        f'within {max(outbreak.radius_km, 1):.0f} km of your area '
+        f'({outbreak.detection_count} detections since {outbreak.first_detected:%d %b}). '
+        f'Inspect your crops and consider preventive treatment.'
+    )
+    with transaction.atomic():
+        Recommendation.objects.bulk_create([
+            Recommendation(
+                user_id=user_id,
+                kind='alert',
+                source='outbreak',
+                category='disease_outbreak',
+                priority='high',
+                title=f'{outbreak.disease_name} Outbreak Nearby',
+                description=description,
+                confidence=0.8,
+                rule=f'outbreak:{outbreak.id}',
+                value=outbreak.detection_count,
+            )
+            for user_id in nearby
+        ])
+        outbreak.notified_users.add(*nearby)
+
+    if send_sms:
+        sms_service = SMSService()
+        if sms_service.enabled:
+            phones = UserProfile.objects.filter(user_id__in=nearby).exclude(phone_number='') \
+                .values_list('phone_number', flat=True)
+            message = f'NovaTerra ALERT: {outbreak.disease_name} outbreak reported near your farm. {description}'
+            for phone_number in phones:
+                sms_service.send_custom_alert(phone_number, message[:320])
+
+    return len(nearby)
+
+
+def detect_outbreaks(days=14, eps_km=5.0, eps_days=7, min_samples=5, min_farms=2,
+                     alert_radius_km=15.0, send_sms=True, log=print):
+    """
+    Cluster recent detections per disease, upsert Outbreak records and
+    alert nearby farms
+
+    A cluster continues an active outbreak of the same disease when its
+    center lies within that outbreak's radius plus eps_km; active
+    outbreaks no longer backed by a cluster are resolved.
+
+    Returns:
+        dict: {"clusters", "created", "updated", "resolved", "alerted"}
+    """
+    from disease_detection.models import Outbreak
+
+    now = timezone.now()
+    summary = {'clusters': 0, 'created': 0, 'updated': 0, 'resolved': 0, 'alerted': 0}
+
+    detections = load_detections(now - timedelta(days=days))
+    farms = load_farm_points() if alert_radius_km else None
+    active = defaultdict(list)
+    for outbreak in Outbreak.objects.filter(status='active'):
+        active[outbreak.disease_name].append(outbreak)
+
+    touched = set()
+    for disease, data in detections.items():
+        clusters = find_clusters(data, eps_km, eps_days, min_samples, min_farms)
+        log(f'{disease}: {len(data["id"])} detections, {len(clusters)} clusters')
+        summary['clusters'] += len(clusters)
+
+        for cluster in clusters:
+            outbreak = next((
+                o for o in active[disease]
+                if o.id not in touched and _distance_km(
+                    o.latitude, o.longitude, cluster['latitude'], cluster['longitude']
+                ) <= o.radius_km + eps_km
+            ), None)
+            if outbreak is None:
+                outbreak = Outbreak(disease_name=disease)
+                summary['created'] += 1
+            else:
+                summary['updated'] += 1
+
+            outbreak.latitude = cluster['latitude']
+            outbreak.longitude = cluster['longitude']
+            outbreak.radius_km = cluster['radius_km']
+            outbreak.detection_count = len(cluster['detection_ids'])
+            outbreak.farm_count = len(cluster['user_ids'])
+            outbreak.first_detected = datetime.fromtimestamp(cluster['first'], tz=dt_timezone.utc)
+            outbreak.last_detected = datetime.fromtimestamp(cluster['last'], tz=dt_timezone.utc)
+            outbreak.save()
+            touched.add(outbreak.id)
+
+            if farms is not None:
+                summary['alerted'] += alert_nearby_farms(outbreak, farms, alert_radius_km, send_sms)
+
+    stale = [o.id for outbreaks in active.values() for o in outbreaks if o.id not in touched]
+    with transaction.atomic():
+        summary['resolved'] = Outbreak.objects.filter(id__in=stale).update(status='resolved', updated_at=now)
+        # Resolved outbreaks stop showing up in the advisor
+        Recommendation.objects.filter(
+            source='outbreak',
+            is_active=True,
+            rule__in=[f'outbreak:{outbreak_id}' for outbreak_id in stale],
+        ).update(is_active=False)
+    return summary
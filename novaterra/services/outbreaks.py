@@ -0,0 +1,132 @@
+# novaterra/services/outbreaks.py
+
+import math
+from datetime import timedelta
+
+from django.db.models import Sum
+from django.db.models.functions import Substr, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from . import geohash as geohash_codec
+
+MIN_PRECISION = 2
+MAX_PRECISION = 6  # OUTBREAK_CELL_PRECISION - never finer than stored cells
+
+TIMELINE_INTERVALS = {
+    'day': TruncDay,
+    'week': TruncWeek,
+    'month': TruncMonth,
+}
+
+
+def parse_bbox(value):
+    """"min_lon,min_lat,max_lon,max_lat" -> tuple of floats (ValueError if malformed)"""
+    parts = [float(part) for part in value.split(',')]
+    if len(parts) != 4:
+        raise ValueError('bbox must be min_lon,min_lat,max_lon,max_lat')
+    min_lon, min_lat, max_lon, max_lat = parts
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError('bbox minimum must not exceed maximum')
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def tile_bbox(z, x, y):
+    """Lon/lat bounds of a Web Mercator XYZ tile"""
+    n = 2 ** z
+
+    def latitude(row):
+        return math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * row / n))))
+
+    return x / n * 360 - 180, latitude(y + 1), (x + 1) / n * 360 - 180, latitude(y)
+
+
+def precision_for_zoom(z):
+    """Geohash length giving a few cells per tile at this zoom"""
+    if z <= 4:
+        return 2
+    if z <= 7:
+        return 3
+    if z <= 9:
+        return 4
+    if z <= 12:
+        return 5
+    return 6
+
+
+def _cells(bbox=None, days=30, disease=None):
+    from disease_detection.models import OutbreakCell
+
+    cells = OutbreakCell.objects.filter(
+        bucket__gte=timezone.now().date() - timedelta(days=days),
+        count__gt=0,
+    )
+    if bbox:
+        min_lon, min_lat, max_lon, max_lat = bbox
+        cells = cells.filter(
+            latitude__gte=min_lat, latitude__lte=max_lat,
+            longitude__gte=min_lon, longitude__lte=max_lon,
+        )
+    if disease:
+        cells = cells.filter(disease_name=disease)
+    return cells.order_by()
+
+
+def heatmap(bbox=None, precision=5, days=30, disease=None):
+    """
+    Detection counts per geohash cell of the given precision, with a
+    per-disease breakdown, from the pre-aggregated outbreak cells
+
+    Returns:
+        dict: {"precision", "days", "max_count", "cells": [...]}
+    """
+    precision = max(MIN_PRECISION, min(MAX_PRECISION, precision))
+    rows = _cells(bbox, days, disease) \
+        .annotate(cell=Substr('geohash', 1, precision)) \
+        .values('cell', 'disease_name') \
+        .annotate(total=Sum('count'))
+
+    cells = {}
+    for row in rows:
+        cell = cells.get(row['cell'])
+        if cell is None:
+            min_lat, min_lon, max_lat, max_lon = geohash_codec.bounds(row['cell'])
+            cell = cells[row['cell']] = {
+                'geohash': row['cell'],
+                'latitude': (min_lat + max_lat) / 2,
+                'longitude': (min_lon + max_lon) / 2,
+                'bounds': [min_lon, min_lat, max_lon, max_lat],
+                'count': 0,
+                'diseases': {},
+            }
+        cell['count'] += row['total']
+        cell['diseases'][row['disease_name']] = row['total']
+
+    return {
+        'precision': precision,
+        'days': days,
+        'max_count': max((c['count'] for c in cells.values()), default=0),
+        'cells': sorted(cells.values(), key=lambda c: -c['count']),
+    }
+
+
+def timeline(bbox=None, days=90, disease=None, interval='week'):
+    """Detection counts per time bucket and disease"""
+    trunc = TIMELINE_INTERVALS[interval]
+    rows = _cells(bbox, days, disease) \
+        .annotate(period=trunc('bucket')) \
+        .values('period', 'disease_name') \
+        .annotate(total=Sum('count')) \
+        .order_by('period', 'disease_name')
+
+    periods = {}
+    for row in rows:
+        key = row['period'].isoformat()[:10]
+        period = periods.setdefault(key, {'period': key, 'count': 0, 'diseases': {}})
+        period['count'] += row['total']
+        period['diseases'][row['disease_name']] = row['total']
+
+    return {
+        'interval': interval,
+        'days': days,
+        'periods': list(periods.values()),
+    }
@@ -0,0 +1,276 @@
+# novaterra/services/recommendation_pipeline.py
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Avg, Count
+from django.utils import timezone
+
+from ..models import BatchCheckpoint, Field, FieldIndicator, Recommendation, SensorReading
+
+
+JOB_NAME = 'precompute_recommendations'
+
+# Days of disease history considered when scoring a field
+DISEASE_LOOKBACK_DAYS = 30
+
+
+# ============================================
+# Context loading (parent process, one query per source per chunk)
+# ============================================
+
+def load_chunk_context(fields):
+    """
+    Gather everything the scorer needs for a chunk of fields as plain
+    (picklable) dicts: field info, upcoming indicators (weather-derived),
+    last-24h sensor averages and recent disease history.
+    """
+    from disease_detection.models import DiseaseDetection
+
+    field_ids = [f.id for f in fields]
+    now = timezone.now()
+    today = now.date()
+
+    contexts = {
+        f.id: {
+            'field_id': f.id,
+            'user_id': f.owner_id,
+            'name': f.location.name,
+            'crop_type': f.crop_type,
+            'status': f.status,
+            'expected_harvest': f.expected_harvest,
+            'today': today,
+            'indicators': [],
+            'sensors': {},
+            'diseases': {},
+        }
+        for f in fields
+    }
+
+    indicators = FieldIndicator.objects.filter(
+        field_id__in=field_ids,
+        date__gte=today,
+    ).order_by('field_id', 'date').values(
+        'field_id', 'date', 'tmin', 'tmax', 'et0', 'rain', 'leaf_wetness_hours', 'fungal_risk'
+    )
+    for row in indicators:
+        contexts[row.pop('field_id')]['indicators'].append(row)
+
+    sensors = SensorReading.objects.filter(
+        field_id__in=field_ids,
+        recorded_at__gte=now - timedelta(hours=24),
+    ).values('field_id', 'sensor_type').annotate(avg_value=Avg('value'))
+    for row in sensors:
+        contexts[row['field_id']]['sensors'][row['sensor_type']] = row['avg_value']
+
+    diseases = DiseaseDetection.objects.filter(
+        field_id__in=field_ids,
+        detection_date__gte=now - timedelta(days=DISEASE_LOOKBACK_DAYS),
+        status__in=['detected', 'treating'],
+    ).values('field_id', 'disease_name').annotate(count=Count('id'))
+    for row in diseases:
+        contexts[row['field_id']]['diseases'][row['disease_name']] = row['count']
+
+    return list(contexts.values())
+
+
+# ============================================
+# Scoring (pure function, runs in worker processes)
+# ============================================
+
+def score_field(context):
+    """
+    Turn one field's context into recommendation dicts
+
+    Combines the water balance (ET0 vs. forecast rain and soil moisture),
+    fungal risk and recent detections, temperature extremes and the
+    harvest window.
+    """
+    name = context['name']
+    indicators = context['indicators'][:3]
+    sensors = context['sensors']
+    diseases = context['diseases']
+    results = []
+
+    if context['status'] != 'active':
+        return results
+
+    # Irrigation: 3-day water deficit and current soil moisture
+    if indicators:
+        deficit = sum(i['et0'] - i['rain'] for i in indicators)
+        soil_moisture = sensors.get('soil_moisture')
+        if deficit > 10 or (soil_moisture is not None and soil_moisture < 35):
+            description = f'Expected water deficit in {name} over the next {len(indicators)} days is {deficit:.1f} mm'
+            if soil_moisture is not None:
+                description += f' and soil moisture averaged {soil_moisture:.0f}% over the last 24 hours'
+            results.append({
+                'category': 'irrigation',
+                'priority': 'high' if deficit > 15 or (soil_moisture or 100) < 30 else 'medium',
+                'title': 'Irrigation Recommended',
+                'description': description + '. Consider irrigating within the next 24 hours.',
+                'confidence': round(min(0.95, 0.6 + deficit / 50), 2),
+                'rule': 'batch:water_balance',
+                'value': round(deficit, 1),
+            })
+
+    # Disease prevention: fungal risk, boosted by active detections on the field
+    max_risk = max((i['fungal_risk'] for i in indicators), default=0)
+    active_cases = sum(diseases.values())
+    if max_risk > 0.5 or (active_cases and max_risk > 0.3):
+        description = f'Weather conditions in {name} are favorable for fungal diseases (risk {max_risk:.0%}).'
+        if diseases:
+            description += f" Active detections: {', '.join(sorted(diseases))}."
+        results.append({
+            'category': 'disease_prevention',
+            'priority': 'high' if max_risk > 0.75 or active_cases else 'medium',
+            'title': 'Apply Preventive Fungicide',
+            'description': description + ' Preventive application recommended.',
+            'confidence': round(min(0.95, 0.5 + max_risk / 2 + 0.05 * active_cases), 2),
+            'rule': 'batch:fungal_risk',
+            'value': round(max_risk, 3),
+        })
+
+    # Temperature extremes
+    tmax = max((i['tmax'] for i in indicators), default=None)
+    tmin = min((i['tmin'] for i in indicators), default=None)
+    if tmax is not None and tmax >= 35:
+        results.append({
+            'category': 'heat_stress',
+            'priority': 'high' if tmax >= 40 else 'medium',
+            'title': 'Heat Stress Warning',
+            'description': f'Temperatures up to {tmax:.0f}°C are expected in {name}. Irrigate early morning and avoid midday spraying.',
+            'confidence': 0.8,
+            'rule': 'batch:heat',
+            'value': tmax,
+        })
+    if tmin is not None and tmin <= 2:
+        results.append({
+            'category': 'frost_protection',
+            'priority': 'high',
+            'title': 'Frost Risk',
+            'description': f'Temperatures down to {tmin:.0f}°C are expected in {name}. Protect sensitive crops.',
+            'confidence': 0.8,
+            'rule': 'batch:frost',
+            'value': tmin,
+        })
+
+    # Harvest window: harvest due within 14 days and a dry spell ahead
+    harvest = context['expected_harvest']
+    if harvest and 0 <= (harvest - context['today']).days <= 14 and context['indicators']:
+        dry_days = 0
+        for indicator in context['indicators']:
+            if indicator['rain'] >= 1 or indicator['leaf_wetness_hours'] >= 6:
+                break
+            dry_days += 1
+        if dry_days >= 3:
+            results.append({
+                'category': 'harvest',
+                'priority': 'low',
+                'title': 'Optimal Harvest Window',
+                'description': f'Forecast shows {dry_days} days of dry conditions for {name}. Good window for harvesting.',
+                'confidence': round(min(0.95, 0.6 + 0.07 * dry_days), 2),
+                'rule': 'batch:harvest_window',
+                'value': dry_days,
+            })
+
+    for result in results:
+        result['field_id'] = context['field_id']
+        result['user_id'] = context['user_id']
+    return results
+
+
+# ============================================
+# Pipeline
+# ============================================
+
+def write_recommendations(field_ids, results):
+    """Replace the active batch recommendations of these fields"""
+    Recommendation.objects.filter(
+        field_id__in=field_ids,
+        source='batch',
+        is_active=True,
+    ).update(is_active=False)
+
+    Recommendation.objects.bulk_create([
+        Recommendation(kind='recommendation', source='batch', **result)
+        for result in results
+    ])
+
+
+def run_pipeline(queryset=None, chunk_size=500, workers=None, resume=False, log=print):
+    """
+    Precompute recommendations for all fields in primary key order
+
+    Args:
+        queryset: Fields to process (default: all)
+        chunk_size (int): Fields per chunk (one transaction each)
+        workers (int): Process pool size (None = CPU count, 0 = inline)
+        resume (bool): Continue after the last checkpoint instead of restarting
+        log: Progress callback
+
+    Returns:
+        BatchCheckpoint: final checkpoint
+    """
+    queryset = (queryset if queryset is not None else Field.objects.all()) \
+        .select_related('location').order_by('pk')
+
+    checkpoint, created = BatchCheckpoint.objects.get_or_create(
+        job_name=JOB_NAME,
+        defaults={'started_at': timezone.now()},
+    )
+    if not resume or checkpoint.status == 'completed':
+        checkpoint.last_pk = 0
+        checkpoint.processed = 0
+        checkpoint.started_at = timezone.now()
+    elif not created:
+        log(f'Resuming after field {checkpoint.last_pk} ({checkpoint.processed} already processed)')
+    checkpoint.status = 'running'
+    checkpoint.error = ''
+    checkpoint.finished_at = None
+    checkpoint.save()
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 0 else None
+    try:
+        while True:
+            fields = list(queryset.filter(pk__gt=checkpoint.last_pk)[:chunk_size])
+            if not fields:
+                break
+
+            contexts = load_chunk_context(fields)
+            if pool:
+                scored = pool.map(score_field, contexts, chunksize=max(1, len(contexts) // (4 * (workers or 4))))
+            else:
+                scored = map(score_field, contexts)
+            results = [r for field_results in scored for r in field_results]
+
+            with transaction.atomic():
+                write_recommendations([f.id for f in fields], results)
+                checkpoint.last_pk = fields[-1].pk
+                checkpoint.processed += len(fields)
+                checkpoint.save(update_fields=['last_pk', 'processed', 'updated_at'])
+
+            log(f'Processed {checkpoint.processed} fields ({len(results)} recommendations in last chunk)')
+
+        checkpoint.status = 'completed'
+        checkpoint.finished_at = timezone.now()
+        checkpoint.save(update_fields=['status', 'finished_at', 'updated_at'])
+    except Exception as e:
+        checkpoint.status = 'failed'
+        checkpoint.error = str(e)
+        checkpoint.save(update_fields=['status', 'error', 'updated_at'])
+        raise
+    finally:
+        if pool:
+            pool.shutdown()
+
+    return checkpoint
+
+
+def refresh_user_recommendations(user):
+    """On-demand, inline refresh for one user's fields (no checkpoint)"""
+    fields = list(Field.objects.filter(owner=user).select_related('location'))
+    results = [r for context in load_chunk_context(fields) for r in score_field(context)]
+    with transaction.atomic():
+        write_recommendations([f.id for f in fields], results)
+    return len(results)
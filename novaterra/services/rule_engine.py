@@ -0,0 +1,308 @@
+# novaterra/services/rule_engine.py
+
+import math
+import threading
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ..models import FieldThreshold, Recommendation
+
+
+# Limits used when a field has no FieldThreshold for a sensor type
+DEFAULT_THRESHOLDS = {
+    'temperature': {'min_value': 5.0, 'max_value': 38.0, 'max_rate_per_hour': 8.0},
+    'soil_moisture': {'min_value': 30.0, 'max_value': 85.0, 'max_rate_per_hour': 20.0},
+    'humidity': {'min_value': 20.0, 'max_value': 90.0, 'max_rate_per_hour': 30.0},
+    'ph': {'min_value': 5.5, 'max_value': 8.0, 'max_rate_per_hour': 1.0},
+}
+
+# (sensor_type, direction) -> (category, priority, title, description template)
+THRESHOLD_MESSAGES = {
+    ('soil_moisture', 'low'): (
+        'irrigation', 'high', 'Irrigation Recommended',
+        'Soil moisture in {field} is {value:.1f}%, below the optimal minimum of {limit:.0f}%. '
+        'Consider irrigating within the next 24 hours.'
+    ),
+    ('soil_moisture', 'high'): (
+        'irrigation', 'medium', 'Reduce Irrigation',
+        'Soil moisture in {field} is {value:.1f}%, above {limit:.0f}%. '
+        'Waterlogged soil increases root rot risk - pause irrigation.'
+    ),
+    ('temperature', 'low'): (
+        'frost_protection', 'high', 'Frost Risk',
+        'Temperature in {field} dropped to {value:.1f}°C (below {limit:.0f}°C). '
+        'Protect sensitive crops tonight.'
+    ),
+    ('temperature', 'high'): (
+        'heat_stress', 'high', 'Heat Stress Warning',
+        'Temperature in {field} reached {value:.1f}°C (above {limit:.0f}°C). '
+        'Irrigate early morning and avoid spraying during the day.'
+    ),
+    ('humidity', 'low'): (
+        'irrigation', 'low', 'Dry Air Conditions',
+        'Relative humidity in {field} is {value:.0f}% (below {limit:.0f}%). '
+        'Expect higher evaporation - check soil moisture.'
+    ),
+    ('humidity', 'high'): (
+        'disease_prevention', 'medium', 'Apply Preventive Fungicide',
+        'Relative humidity in {field} is {value:.0f}% (above {limit:.0f}%). '
+        'Conditions are favorable for fungal diseases.'
+    ),
+    ('ph', 'low'): (
+        'soil_management', 'medium', 'Acidic Soil',
+        'Soil pH in {field} is {value:.1f} (below {limit:.1f}). Consider liming.'
+    ),
+    ('ph', 'high'): (
+        'soil_management', 'medium', 'Alkaline Soil',
+        'Soil pH in {field} is {value:.1f} (above {limit:.1f}). Consider sulfur or acidifying fertilizer.'
+    ),
+}
+
+
+class SensorState:
+    """
+    Constant-size running state for one (field, sensor_type) stream:
+    last reading for rate-of-change rules, exponentially weighted mean and
+    variance for the rolling z-score, and the rules currently firing
+    (alerts are edge-triggered so a stuck value does not flood the advisor).
+    """
+    __slots__ = ('last_value', 'last_time', 'mean', 'variance', 'count', 'firing')
+
+    def __init__(self):
+        self.last_value = None
+        self.last_time = None
+        self.mean = 0.0
+        self.variance = 0.0
+        self.count = 0
+        self.firing = set()
+
+    def update_statistics(self, value, alpha):
+        if self.count == 0:
+            self.mean = value
+        else:
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.variance = (1 - alpha) * (self.variance + diff * increment)
+        self.count += 1
+
+
+class RuleEngine:
+    """
+    Streaming evaluation of sensor readings as they are ingested
+
+    Rules (per field and sensor type):
+        - threshold: value outside [min_value, max_value]
+        - rate: |change| per hour above max_rate_per_hour
+        - anomaly: rolling z-score above z_threshold (after a warm-up)
+
+    State is kept in-process and never re-queries reading history, so a
+    restarted worker simply warms up again.
+    """
+
+    def __init__(self, alpha=0.1, z_threshold=3.0, warmup=12):
+        self.alpha = alpha
+        self.z_threshold = z_threshold
+        self.warmup = warmup
+        self._states = {}
+        self._thresholds = {}
+        self._lock = threading.Lock()
+
+    def invalidate_thresholds(self, field_id):
+        """Drop cached limits for a field (call when its thresholds change)"""
+        with self._lock:
+            self._thresholds.pop(field_id, None)
+
+    def get_thresholds(self, field_id):
+        """Effective limits for a field, loaded once and cached"""
+        with self._lock:
+            cached = self._thresholds.get(field_id)
+        if cached is not None:
+            return cached
+
+        thresholds = {
+            sensor_type: dict(limits) for sensor_type, limits in DEFAULT_THRESHOLDS.items()
+        }
+        for override in FieldThreshold.objects.filter(field_id=field_id):
+            limits = thresholds.setdefault(override.sensor_type, {})
+            for key in ['min_value', 'max_value', 'max_rate_per_hour']:
+                if getattr(override, key) is not None:
+                    limits[key] = getattr(override, key)
+
+        with self._lock:
+            self._thresholds[field_id] = thresholds
+        return thresholds
+
+    def evaluate(self, field, sensor_type, value, recorded_at, cleared=None):
+        """
+        Update state with one reading and return the findings it triggers
+
+        Rules that are not firing after this reading are added to the
+        optional cleared set, so their stored alerts can be deactivated.
+
+        Returns:
+            list: dicts with kind, category, priority, title, description,
+                  confidence, rule, value
+        """
+        limits = self.get_thresholds(field.id).get(sensor_type, {})
+        field_name = field.location.name
+        findings = []
+
+        with self._lock:
+            state = self._states.get((field.id, sensor_type))
+            if state is None:
+                state = self._states[(field.id, sensor_type)] = SensorState()
+
+            # Threshold rules
+            direction = None
+            limit = None
+            if limits.get('min_value') is not None and value < limits['min_value']:
+                direction, limit = 'low', limits['min_value']
+            elif limits.get('max_value') is not None and value > limits['max_value']:
+                direction, limit = 'high', limits['max_value']
+
+            for rule_direction in ['low', 'high']:
+                rule = f'{sensor_type}:{rule_direction}'
+                if rule_direction != direction:
+                    self._clear(state, rule, cleared)
+                elif rule not in state.firing:
+                    state.firing.add(rule)
+                    findings.append(self._threshold_finding(
+                        sensor_type, direction, value, limit, limits, field_name
+                    ))
+
+            # Rate-of-change rule
+            rule = f'{sensor_type}:rate'
+            max_rate = limits.get('max_rate_per_hour')
+            if state.last_time is not None and max_rate and recorded_at > state.last_time:
+                hours = (recorded_at - state.last_time).total_seconds() / 3600
+                rate = (value - state.last_value) / max(hours, 1 / 60)
+                if abs(rate) <= max_rate:
+                    self._clear(state, rule, cleared)
+                elif rule not in state.firing:
+                    state.firing.add(rule)
+                    findings.append({
+                        'kind': 'alert',
+                        'category': 'sensor_alert',
+                        'priority': 'medium',
+                        'title': f'Rapid {sensor_type.replace("_", " ")} change',
+                        'description': (
+                            f'{sensor_type.replace("_", " ").capitalize()} in {field_name} changed by '
+                            f'{rate:+.1f}/h (limit {max_rate:.1f}/h). Check the field and sensor.'
+                        ),
+                        'confidence': round(min(0.99, 0.5 + 0.1 * abs(rate) / max_rate), 2),
+                        'rule': rule,
+                        'value': value,
+                    })
+
+            # Rolling z-score anomaly rule (scored against the state before this reading)
+            rule = f'{sensor_type}:anomaly'
+            if state.count >= self.warmup and state.variance > 0:
+                z_score = (value - state.mean) / math.sqrt(state.variance)
+                if abs(z_score) <= self.z_threshold:
+                    self._clear(state, rule, cleared)
+                elif rule not in state.firing:
+                    state.firing.add(rule)
+                    findings.append({
+                        'kind': 'alert',
+                        'category': 'sensor_alert',
+                        'priority': 'high' if abs(z_score) > 2 * self.z_threshold else 'medium',
+                        'title': f'Unusual {sensor_type.replace("_", " ")} reading',
+                        'description': (
+                            f'{sensor_type.replace("_", " ").capitalize()} in {field_name} is {value:.1f}, '
+                            f'{abs(z_score):.1f} standard deviations from its recent average of {state.mean:.1f}. '
+                            f'This may be a sensor fault or a sudden field event.'
+                        ),
+                        'confidence': round(min(0.99, 1 - 1 / abs(z_score)), 2),
+                        'rule': rule,
+                        'value': value,
+                    })
+
+            if state.last_time is None or recorded_at >= state.last_time:
+                state.last_value = value
+                state.last_time = recorded_at
+            state.update_statistics(value, self.alpha)
+
+        return findings
+
+    @staticmethod
+    def _clear(state, rule, cleared):
+        state.firing.discard(rule)
+        if cleared is not None:
+            cleared.add(rule)
+
+    @staticmethod
+    def _threshold_finding(sensor_type, direction, value, limit, limits, field_name):
+        category, priority, title, template = THRESHOLD_MESSAGES.get(
+            (sensor_type, direction),
+            ('sensor_alert', 'medium', f'{sensor_type} out of range', '{field}: {value:.1f} outside limit {limit:.1f}'),
+        )
+
+        # Confidence grows with the distance past the limit, relative to the allowed band
+        band = abs((limits.get('max_value') or 0) - (limits.get('min_value') or 0)) or 1.0
+        confidence = round(min(0.99, 0.6 + 0.4 * abs(value - limit) / band), 2)
+
+        return {
+            'kind': 'recommendation',
+            'category': category,
+            'priority': priority,
+            'title': title,
+            'description': template.format(field=field_name, value=value, limit=limit),
+            'confidence': confidence,
+            'rule': f'{sensor_type}:{direction}',
+            'value': value,
+        }
+
+    def process(self, field, readings):
+        """
+        Evaluate ingested readings (in time order) and store the findings
+
+        Alerts whose rule has cleared are deactivated. Firing state is per
+        process, so a finding that already has an active row for the field
+        and rule (from before a restart or from another worker) is skipped.
+
+        Args:
+            field (Field): Field the readings belong to (owner used for records)
+            readings (list): SensorReading instances
+
+        Returns:
+            list: Created Recommendation instances
+        """
+        findings = {}  # rule -> latest finding
+        cleared = set()
+        for reading in sorted(readings, key=lambda r: r.recorded_at):
+            for finding in self.evaluate(field, reading.sensor_type, reading.value, reading.recorded_at, cleared):
+                findings[finding['rule']] = finding
+                cleared.discard(finding['rule'])
+
+        active_rules = Recommendation.objects.filter(field=field, source='rules', is_active=True)
+        if cleared:
+            active_rules.filter(rule__in=cleared).update(is_active=False)
+
+        # Fired and cleared again within these readings - nothing to show
+        findings = {rule: finding for rule, finding in findings.items() if rule not in cleared}
+        if not findings:
+            return []
+
+        existing = set(active_rules.filter(rule__in=findings).values_list('rule', flat=True))
+        records = [
+            Recommendation(user_id=field.owner_id, field=field, source='rules', **finding)
+            for rule, finding in findings.items() if rule not in existing
+        ]
+        if records:
+            Recommendation.objects.bulk_create(records)
+        return records
+
+
+_rule_engine = RuleEngine()
+
+
+def get_rule_engine():
+    """Return the process-wide rule engine"""
+    return _rule_engine
+
+
+@receiver([post_save, post_delete], sender=FieldThreshold)
+def invalidate_field_thresholds(sender, instance, **kwargs):
+    _rule_engine.invalidate_thresholds(instance.field_id)
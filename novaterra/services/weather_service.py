@@ -122,6 +122,10 @@ class WeatherService:
                     'date': item['dt'],
                     'temperature': round(item['main']['temp']),
                     'humidity': item['main']['humidity'],
+                    'pressure': item['main']['pressure'],
+                    'wind_speed': round(item['wind']['speed'] * 3.6, 1),  # m/s to km/h
+                    'clouds': item['clouds']['all'],
+                    'rain': item.get('rain', {}).get('3h', 0),  # mm over 3 hours
                     'description': item['weather'][0]['description'],
                     'icon': item['weather'][0]['icon'],
                 })
@@ -0,0 +1,113 @@
+# novaterra/streaming.py
+
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError, AuthenticationFailed
+
+from .authentication import CachedJWTAuthentication
+from .services.event_bus import get_event_bus
+
+# Seconds between keep-alive comments on idle streams
+KEEPALIVE_INTERVAL = 15
+
+
+def _authenticate_token(raw_token):
+    """Return the user for a raw JWT access token, or None"""
+    if not raw_token:
+        return None
+    try:
+        authenticator = CachedJWTAuthentication()
+        validated_token = authenticator.get_validated_token(raw_token)
+        return authenticator.get_user(validated_token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+def _format_sse(event):
+    return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+async def event_stream(request):
+    """
+    Server-Sent Events stream of the user's live events
+
+    GET /api/events/stream/?token=<access_token>
+    (EventSource cannot send headers, so the token may be passed as a
+    query param; an Authorization: Bearer header also works)
+
+    Events: sensor.reading, detection.created, camera.status
+    Requires running under ASGI (mysite/asgi.py)
+    """
+    raw_token = request.GET.get('token')
+    auth_header = request.headers.get('Authorization', '')
+    if not raw_token and auth_header.startswith('Bearer '):
+        raw_token = auth_header.split(' ', 1)[1]
+
+    user = await sync_to_async(_authenticate_token)(raw_token)
+    if user is None:
+        return JsonResponse({'error': 'Authentication required'}, status=401)
+
+    subscription = get_event_bus().subscribe(user.id)
+
+    async def stream():
+        try:
+            yield 'retry: 3000\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=KEEPALIVE_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+                    continue
+                yield _format_sse(event)
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # Disable proxy buffering (nginx)
+    return response
+
+
+async def websocket_application(scope, receive, send):
+    """
+    WebSocket variant of the event stream, routed by mysite/asgi.py
+
+    ws://<host>/ws/events/?token=<access_token>
+    Server -> client only; client messages are ignored.
+    """
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+
+    if scope['path'].rstrip('/') != '/ws/events':
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+
+    query = parse_qs(scope.get('query_string', b'').decode())
+    raw_token = query.get('token', [None])[0]
+    user = await sync_to_async(_authenticate_token)(raw_token)
+    if user is None:
+        await send({'type': 'websocket.close', 'code': 4401})
+        return
+
+    await send({'type': 'websocket.accept'})
+    subscription = get_event_bus().subscribe(user.id)
+
+    async def forward_events():
+        while True:
+            event = await subscription.get()
+            await send({'type': 'websocket.send', 'text': json.dumps(event)})
+
+    forward_task = asyncio.create_task(forward_events())
+    try:
+        while True:
+            message = await receive()
+            if message['type'] == 'websocket.disconnect':
+                break
+    finally:
+        forward_task.cancel()
+        subscription.close()
@@ -1,3 +1,106 @@
-from django.test import TestCase
+import numpy as np
+from django.test import SimpleTestCase
 
-# Create your tests here.
+from .services.outbreak_clusters import _candidate_pairs, _cell_pairs, dbscan
+
+DAY = 86400
+
+
+def brute_force_dbscan(x, y, t, eps_km, eps_seconds, min_samples):
+    """Reference DBSCAN over the full distance matrix (cluster ids are arbitrary)"""
+    n = len(x)
+    close = ((x[:, None] - x[None, :]) ** 2 + (y[:, None] - y[None, :]) ** 2 <= eps_km ** 2) \
+        & (np.abs(t[:, None] - t[None, :]) <= eps_seconds)
+    core = close.sum(axis=1) >= min_samples
+    labels = np.full(n, -1)
+    cluster = 0
+    for start in np.nonzero(core)[0]:
+        if labels[start] != -1:
+            continue
+        labels[start] = cluster
+        stack = [start]
+        while stack:
+            i = stack.pop()
+            for j in np.nonzero(close[i] & core & (labels == -1))[0]:
+                labels[j] = cluster
+                stack.append(j)
+        cluster += 1
+    # Border points: any core neighbor's cluster (unique when it has one)
+    for i in np.nonzero(~core)[0]:
+        neighbors = np.nonzero(close[i] & core)[0]
+        if len(neighbors):
+            labels[i] = labels[neighbors[0]]
+    return labels, core
+
+
+def partition(labels):
+    """Labels as a set of member sets (noise excluded), comparable across numberings"""
+    return {frozenset(np.nonzero(labels == label)[0].tolist()) for label in set(labels.tolist()) if label != -1}
+
+
+class DbscanTests(SimpleTestCase):
+    def test_two_clusters_and_noise(self):
+        x = np.array([0, 0.5, 1, 0.5, 0.5, 50, 50.5, 51, 50.5, 50.5, 100], dtype=float)
+        y = np.array([0, 0, 0, 0.5, -0.5, 0, 0, 0, 0.5, -0.5, 100], dtype=float)
+        t = np.zeros(len(x))
+        labels = dbscan(x, y, t, eps_km=1.0, eps_seconds=DAY, min_samples=4)
+        self.assertEqual(partition(labels), {frozenset(range(5)), frozenset(range(5, 10))})
+        self.assertEqual(labels[10], -1)
+
+    def test_border_point_joins_cluster_without_extending_it(self):
+        # Point 5 is within eps of the core point 2 only; point 6 is within eps of 5 only
+        x = np.array([0, 0.3, 0.6, 0.3, 0.3, 1.5, 2.4], dtype=float)
+        y = np.array([0, 0, 0, 0.3, -0.3, 0, 0], dtype=float)
+        t = np.zeros(len(x))
+        labels = dbscan(x, y, t, eps_km=1.0, eps_seconds=DAY, min_samples=4)
+        self.assertEqual(partition(labels), {frozenset(range(6))})
+        self.assertEqual(labels[6], -1)
+
+    def test_chain_across_many_cells_is_one_cluster(self):
+        # Links only between neighbors, so union-find needs several hooks to converge
+        x = np.arange(200) * 0.8
+        y = np.zeros(200)
+        labels = dbscan(x, y, np.zeros(200), eps_km=1.0, eps_seconds=DAY, min_samples=3)
+        self.assertEqual(partition(labels), {frozenset(range(200))})
+
+    def test_time_separates_clusters_at_the_same_place(self):
+        x = np.zeros(10)
+        y = np.zeros(10)
+        t = np.array([0] * 5 + [30 * DAY] * 5, dtype=float)
+        labels = dbscan(x, y, t, eps_km=1.0, eps_seconds=7 * DAY, min_samples=5)
+        self.assertEqual(partition(labels), {frozenset(range(5)), frozenset(range(5, 10))})
+
+    def test_matches_brute_force(self):
+        rng = np.random.default_rng(42)
+        centers = rng.uniform(0, 100, (6, 2))
+        points = np.concatenate([center + rng.normal(0, 1.5, (40, 2)) for center in centers] + [rng.uniform(0, 100, (60, 2))])
+        t = rng.uniform(0, 10 * DAY, len(points))
+        x, y = points[:, 0], points[:, 1]
+
+        labels = dbscan(x, y, t, eps_km=2.0, eps_seconds=5 * DAY, min_samples=4)
+        expected, core = brute_force_dbscan(x, y, t, 2.0, 5 * DAY, 4)
+        # Core points define the clusters exactly; border points may tie between clusters
+        self.assertEqual(partition(np.where(core, labels, -1)), partition(np.where(core, expected, -1)))
+        self.assertTrue(((labels == -1) == (expected == -1)).all())
+
+
+class CandidatePairsTests(SimpleTestCase):
+    def test_batching_yields_the_same_pairs(self):
+        rng = np.random.default_rng(7)
+        x, y = rng.uniform(0, 20, 300), rng.uniform(0, 20, 300)
+        index = _cell_pairs(x, y, 2.0)
+
+        def pairs(max_pairs):
+            found = [list(zip(i.tolist(), j.tolist())) for i, j in _candidate_pairs(index, max_pairs)]
+            flat = [pair for batch in found for pair in batch]
+            return flat, max(len(batch) for batch in found), len(found)
+
+        reference, _, _ = pairs(10 ** 9)
+        batched, largest, batches = pairs(50)
+        self.assertGreater(batches, 1)
+        self.assertEqual(sorted(batched), sorted(reference))
+        self.assertEqual(len(batched), len(set(batched)))
+
+        # Every pair within eps is a candidate
+        close = (x[:, None] - x[None, :]) ** 2 + (y[:, None] - y[None, :]) ** 2 <= 4.0
+        self.assertTrue(set(zip(*np.nonzero(close))) <= set(reference))
@@ -1,5 +1,6 @@
 from django.urls import path
 from . import views
+from . import streaming
 
 urlpatterns = [
     # Legacy views
@@ -12,31 +13,43 @@ urlpatterns = [
     
     # Authentication endpoints
     path('api/register/', views.register, name='register_user'),
+    path('api/register/bulk/', views.bulk_register, name='bulk_register'),
     path('api/login/', views.login_user, name='login_user'),
     path('api/logout/', views.logout_user, name='logout_user'),
     path('api/user/', views.get_current_user, name='get_current_user'),
     path('api/user/update/', views.update_user_profile, name='update_user_profile'),
     path('api/user/change-password/', views.change_password, name='change_password'),
+    path('api/places/', views.search_places, name='search_places'),
     
     
     # Farm data endpoints
     path('api/farm-data/', views.get_user_farm_data, name='get_user_farm_data'),
+    path('api/analytics/', views.get_farm_analytics_view, name='farm_analytics'),
+    path('api/export/<str:export_format>/', views.export_farm_data, name='export_farm_data'),
     
     # Field management endpoints
     path('api/fields/add/', views.add_field, name='add_field'),  # Legacy
     path('api/fields/create/', views.create_field, name='create_field'),
+    path('api/fields/import/', views.import_fields_file, name='import_fields'),
     path('api/fields/<int:field_id>/delete/', views.delete_field, name='delete_field'),
     
     # Camera management endpoints
+    path('api/cameras/', views.list_cameras, name='list_cameras'),
     path('api/cameras/create/', views.create_camera, name='create_camera'),
     path('api/cameras/<int:camera_id>/delete/', views.delete_camera, name='delete_camera'),
+    path('api/cameras/<int:camera_id>/health/', views.camera_health, name='camera_health'),
     
     # IoT monitoring endpoints
     path('api/iot/sensors/', views.get_iot_sensors, name='get_iot_sensors'),
     path('api/iot/sensor-data/<int:field_id>/', views.get_sensor_data, name='get_sensor_data'),
+    path('api/iot/readings/', views.ingest_sensor_readings, name='ingest_sensor_readings'),
+    
+    # Live event stream (SSE, ASGI only - WebSocket variant at /ws/events/)
+    path('api/events/stream/', streaming.event_stream, name='event_stream'),
     
     # AI Advisor endpoints
     path('api/advisor/recommendations/', views.get_ai_recommendations, name='get_ai_recommendations'),
+    path('api/advisor/recommendations/refresh/', views.refresh_ai_recommendations, name='refresh_ai_recommendations'),
     path('api/advisor/crop-suggestions/', views.get_crop_suggestions, name='get_crop_suggestions'),
     path('api/weather/', views.get_weather, name='weather'),
     path('api/weather/forecast/', views.get_forecast, name='forecast'),
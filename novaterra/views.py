@@ -3,25 +3,40 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
 from django.contrib.gis.geos import GEOSGeometry
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, FileResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.core.paginator import Paginator
 from django.db.models import Q
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from datetime import datetime, timedelta
+from itertools import islice
 import json
 import traceback
 from django.conf import settings
 
 from .services.weather_service import WeatherService
+from .services.event_bus import get_event_bus
+from .services.rule_engine import get_rule_engine
+from .services.recommendation_pipeline import refresh_user_recommendations
+from .services.crop_suitability import suggest_crops
+from .services.analytics import get_farm_analytics
+from .services.export import EXPORT_FORMATS, LAYER_NAMES, csv_lines, geojsonl_lines, write_geopackage
+from .services.field_import import CROP_TYPES, FieldImportError, count_features, import_fields
+from .services.gazetteer import DEFAULT_COORDINATES, fill_address, get_gazetteer, locate_city, region_name
+from .services.onboarding import UsernameTaken, import_members, read_members, register_farmer
+from .services.camera_health import probe_cameras
 
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.decorators import api_view, permission_classes, renderer_classes
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
+from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from .models import Location, Field
+from .models import Location, Field, SensorReading, Recommendation, FieldIndicator
+from .authentication import issue_tokens, revoke_user_tokens, user_cache
+from .renderers import SENSOR_UNITS, ColumnarJSONRenderer, PackedSeriesRenderer, build_columnar_series
 
 # ========================
 # Authentication API Views
@@ -65,53 +80,24 @@ def register(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    if User.objects.filter(username=username).exists():
+    # User, profile and farm location in one transaction
+    try:
+        user, farm_location = register_farmer(
+            username=username,
+            password=password,
+            city=city,
+            email=email,
+            phone_number=phone_number,
+            farm_name=farm_name,
+        )
+    except UsernameTaken:
         return Response(
             {'error': 'Username already exists'}, 
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Create user
-    user = User.objects.create_user(
-        username=username,
-        password=password,
-        email=email
-    )
-    
-    # Update profile
-    profile = user.profile
-    profile.farm_name = farm_name
-    profile.phone_number = phone_number
-    profile.save()
-    
-    # Coordinate mapping for Tunisian cities
-    city_coordinates = {
-        'nabeul': (36.4516, 10.7358),
-        'tunis': (36.8065, 10.1815),
-        'sousse': (35.8256, 10.6411),
-        'sfax': (34.7400, 10.7600),
-        'bizerte': (37.2744, 9.8739),
-        'gabes': (33.8815, 10.0982),
-        'kairouan': (35.6781, 10.0963),
-        'monastir': (35.7772, 10.8264),
-        'beja': (36.7256, 9.1817),
-        'ariana': (36.8625, 10.1956),
-    }
-    
-    # Get coordinates
-    coords = city_coordinates.get(city.lower(), (36.8, 10.2))  # Default to Tunisia center
-    
-    # Create main farm location with GeoDjango Point
-    farm_location = Location.objects.create(
-        user=user,
-        name=farm_name,
-        location_type='farm',
-        city=city.title(),
-        point=Point(coords[1], coords[0]),  # Point(longitude, latitude)
-    )
-    
     # Generate JWT tokens
-    refresh = RefreshToken.for_user(user)
+    tokens = issue_tokens(user)
     
     return Response({
         'message': 'Registration successful',
@@ -122,18 +108,120 @@ def register(request):
         },
         'farm': {
             'name': farm_name,
-            'city': city.title(),
+            'city': farm_location.city,
+            'region': farm_location.region,
             'location_id': farm_location.id,
             'latitude': farm_location.latitude,
             'longitude': farm_location.longitude,
         },
-        'tokens': {
-            'access': str(refresh.access_token),
-            'refresh': str(refresh),
-        }
+        'tokens': tokens
     }, status=status.HTTP_201_CREATED)
 
 
+# Synchronous bulk registration limits (each PBKDF2 hash takes a few hundred ms)
+BULK_REGISTER_MAX_MEMBERS = 50
+BULK_REGISTER_MAX_BYTES = 64 * 1024
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def bulk_register(request):
+    """
+    Bulk onboarding of cooperative members (staff only)
+    
+    POST /api/register/bulk/
+    Form data:
+        - file: CSV (header: username,password,email,phone_number,farm_name,city)
+                or JSON (array / JSON Lines of the same keys)
+    
+    Passwords are hashed inline, so uploads are limited to
+    BULK_REGISTER_MAX_MEMBERS; larger files go through
+    `manage.py import_members`.
+    """
+    try:
+        upload = request.FILES.get('file')
+        if not upload:
+            return Response(
+                {'error': 'No file provided'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        if upload.size > BULK_REGISTER_MAX_BYTES:
+            return Response(
+                {'error': f'File too large (max {BULK_REGISTER_MAX_BYTES // 1024} KB) - use manage.py import_members'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        file_format = 'json' if upload.name.lower().endswith(('.json', '.jsonl')) else 'csv'
+        members = list(islice(read_members(upload.read().decode('utf-8-sig'), file_format), BULK_REGISTER_MAX_MEMBERS + 1))
+        if len(members) > BULK_REGISTER_MAX_MEMBERS:
+            return Response(
+                {'error': f'Too many members (max {BULK_REGISTER_MAX_MEMBERS}) - use manage.py import_members'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Inline hashing: no process pool forked from the web server
+        report = import_members(members, workers=0)
+        
+        return Response({
+            'message': f"Imported {report['created']} members",
+            'created': report['created'],
+            'errors': report['errors'],
+        }, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
+        
+    except (ValueError, UnicodeDecodeError) as e:
+        return Response(
+            {'error': f'Invalid file: {str(e)}'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    except Exception as e:
+        traceback.print_exc()
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search_places(request):
+    """
+    City autocomplete / lookup (offline gazetteer)
+    
+    GET /api/places/?q=kair
+    Query params:
+        - q: name or prefix (accents and case ignored)
+        - limit: max results (default 10)
+    """
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': 'q is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        limit = min(int(request.query_params.get('limit', 10)), 50)
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    gazetteer = get_gazetteer()
+    places = gazetteer.search(query, limit)
+    if not places:
+        place = gazetteer.fuzzy(query)
+        places = [place] if place else []
+    
+    return Response({
+        'query': query,
+        'results': [
+            {
+                'name': place.name,
+                'region': region_name(place),
+                'latitude': place.latitude,
+                'longitude': place.longitude,
+            }
+            for place in places
+        ],
+    })
+
+
 @api_view(['GET'])
 def get_user_farm_data(request):
     """Get all user's farm data including locations, fields, cameras, stock"""
@@ -147,13 +235,15 @@ def get_user_farm_data(request):
     
     # Get all fields with polygon data
     fields = []
-    for field in user.fields.all():
+    for field in user.fields.select_related('location'):
         field_data = {
             'id': field.id,
             'name': field.location.name,
             'crop_type': field.crop_type,
             'status': field.status,
             'area_size': float(field.area_size) if field.area_size else None,
+            'area_m2': field.location.area_m2,
+            'perimeter_m': field.location.perimeter_m,
             'planting_date': field.planting_date,
             'latitude': field.location.latitude,
             'longitude': field.location.longitude,
@@ -171,7 +261,7 @@ def get_user_farm_data(request):
     # Get all cameras
     from .models import Camera
     cameras = []
-    for camera in user.novaterra_cameras.all():
+    for camera in user.novaterra_cameras.select_related('location'):
         cameras.append({
             'id': camera.id,
             'name': camera.name,
@@ -180,6 +270,7 @@ def get_user_farm_data(request):
             'stream_url': camera.get_stream_url(),  # Call the method to generate go2rtc URL
             'hls_url': camera.get_hls_url(),
             'is_active': camera.is_active,
+            'health': camera.health(),
         })
     
     # Get stock
@@ -206,6 +297,85 @@ def get_user_farm_data(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_farm_analytics_view(request):
+    """
+    Farm analytics for the dashboard
+    
+    GET /api/analytics/
+    Returns area and field counts by crop, status, planting month and
+    expected harvest window, and disease incidence per crop
+    """
+    try:
+        return Response(get_farm_analytics(request.user))
+    except Exception as e:
+        traceback.print_exc()
+        return Response(
+            {'error': str(e)},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_farm_data(request, export_format):
+    """
+    Streaming export of the user's farm data
+    
+    GET /api/export/<geojsonl|csv|gpkg>/
+    Query params:
+        - layers: comma-separated subset of locations,fields,cameras,stock,detections
+                  (default: all; csv exports exactly one layer, default fields)
+    """
+    if export_format not in EXPORT_FORMATS:
+        return Response(
+            {'error': f"Unsupported format. Use one of: {', '.join(EXPORT_FORMATS)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    requested = request.query_params.get('layers')
+    if requested:
+        layer_names = [name.strip() for name in requested.split(',') if name.strip()]
+    else:
+        layer_names = ['fields'] if export_format == 'csv' else list(LAYER_NAMES)
+    
+    unknown = [name for name in layer_names if name not in LAYER_NAMES]
+    if unknown:
+        return Response(
+            {'error': f"Unknown layers: {', '.join(unknown)}"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if export_format == 'csv' and len(layer_names) != 1:
+        return Response(
+            {'error': 'CSV export supports exactly one layer'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    filename = f"novaterra-{request.user.username}-{timezone.now():%Y%m%d}"
+    try:
+        if export_format == 'gpkg':
+            response = FileResponse(
+                write_geopackage(request.user, layer_names),
+                content_type='application/geopackage+sqlite3',
+                as_attachment=True,
+                filename=f'{filename}.gpkg',
+            )
+        elif export_format == 'csv':
+            response = StreamingHttpResponse(csv_lines(request.user, layer_names[0]), content_type='text/csv')
+            response['Content-Disposition'] = f'attachment; filename="{filename}-{layer_names[0]}.csv"'
+        else:
+            response = StreamingHttpResponse(geojsonl_lines(request.user, layer_names), content_type='application/x-ndjson')
+            response['Content-Disposition'] = f'attachment; filename="{filename}.geojsonl"'
+        return response
+    except Exception as e:
+        traceback.print_exc()
+        return Response(
+            {'error': f'Export failed: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_field(request):
@@ -252,14 +422,15 @@ def create_field(request):
         centroid = geom_polygon.centroid
         center_point = Point(centroid.x, centroid.y)
         
-        # Create location for field
-        field_location = Location.objects.create(
+        # Create location for field (city/region from the nearest place)
+        field_location = fill_address(Location(
             user=user,
             name=field_name,
             location_type='field',
             point=center_point,
             shape=geom_polygon
-        )
+        ))
+        field_location.save()
         
         # Create field
         from .models import Field
@@ -279,6 +450,8 @@ def create_field(request):
                 'name': field_location.name,
                 'crop_type': field.crop_type,
                 'area_size': float(field.area_size) if field.area_size else None,
+                'area_m2': field_location.area_m2,
+                'perimeter_m': field_location.perimeter_m,
                 'latitude': field_location.latitude,
                 'longitude': field_location.longitude,
                 'polygon': polygon
@@ -293,6 +466,85 @@ def create_field(request):
         )
 
 
+# Synchronous field import limits (parsing, repair and inserts run in the request)
+FIELD_IMPORT_MAX_FEATURES = 500
+FIELD_IMPORT_MAX_BYTES = 10 * 1024 * 1024
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_fields_file(request):
+    """
+    Bulk import of field parcels
+    
+    POST /api/fields/import/
+    Form data:
+        - file: GeoJSON, zipped Shapefile (.zip) or KML
+        - crop_type: crop for features without a crop attribute (default: other)
+        - name_field / crop_field: feature attributes to read (optional)
+    
+    Uploads are limited to FIELD_IMPORT_MAX_BYTES and
+    FIELD_IMPORT_MAX_FEATURES; larger cadastral files go through
+    `manage.py import_fields`.
+    """
+    import os
+    import tempfile
+    
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response({'error': 'No file provided'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    default_crop = request.data.get('crop_type', 'other')
+    if default_crop not in CROP_TYPES:
+        return Response({'error': f'Invalid crop_type: {default_crop}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if upload.size > FIELD_IMPORT_MAX_BYTES:
+        return Response(
+            {'error': f'File too large (max {FIELD_IMPORT_MAX_BYTES // (1024 * 1024)} MB) - use manage.py import_fields'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    # GDAL reads from a path, so spool the upload to disk
+    extension = os.path.splitext(upload.name)[1].lower()
+    temp = tempfile.NamedTemporaryFile(suffix=extension, delete=False)
+    try:
+        for chunk in upload.chunks():
+            temp.write(chunk)
+        temp.close()
+        
+        feature_count = count_features(temp.name)
+        if feature_count > FIELD_IMPORT_MAX_FEATURES:
+            return Response(
+                {'error': f'Too many features ({feature_count}, max {FIELD_IMPORT_MAX_FEATURES}) - use manage.py import_fields'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        report = import_fields(
+            temp.name,
+            request.user,
+            default_crop=default_crop,
+            name_field=request.data.get('name_field') or None,
+            crop_field=request.data.get('crop_field') or None,
+        )
+        
+        return Response({
+            'message': f"Imported {report['created']} fields",
+            **report,
+        }, status=status.HTTP_201_CREATED if report['created'] else status.HTTP_400_BAD_REQUEST)
+    
+    except FieldImportError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except Exception as e:
+        traceback.print_exc()
+        return Response(
+            {'error': f'Failed to import fields: {str(e)}'},
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+    finally:
+        temp.close()
+        os.unlink(temp.name)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_camera(request):
@@ -331,6 +583,13 @@ def create_camera(request):
             is_active=True
         )
         
+        get_event_bus().publish(user.id, 'camera.status', {
+            'camera_id': camera.id,
+            'name': camera.name,
+            'is_active': camera.is_active,
+            'change': 'created',
+        })
+        
         return Response({
             'message': 'Camera created successfully',
             'camera': {
@@ -339,7 +598,8 @@ def create_camera(request):
                 'latitude': camera_location.latitude,
                 'longitude': camera_location.longitude,
                 'stream_url': camera.stream_url,
-                'is_active': camera.is_active
+                'is_active': camera.is_active,
+                'health': camera.health(),
             }
         }, status=status.HTTP_201_CREATED)
         
@@ -351,6 +611,69 @@ def create_camera(request):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_cameras(request):
+    """
+    User's cameras with stream health
+    
+    GET /api/cameras/
+    Query params:
+        - status: unknown, online or offline (optional)
+    """
+    from .models import Camera
+    cameras = Camera.objects.filter(owner=request.user).select_related('location').order_by('name')
+    camera_status = request.query_params.get('status')
+    if camera_status:
+        cameras = cameras.filter(status=camera_status)
+    
+    data = [{
+        'id': camera.id,
+        'name': camera.name,
+        'latitude': camera.location.latitude,
+        'longitude': camera.location.longitude,
+        'stream_url': camera.get_stream_url(),
+        'hls_url': camera.get_hls_url(),
+        'is_active': camera.is_active,
+        'health': camera.health(),
+    } for camera in cameras]
+    
+    return Response({
+        'cameras': data,
+        'online': sum(1 for camera in data if camera['health']['status'] == 'online'),
+        'total': len(data),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET', 'POST'])
+@permission_classes([IsAuthenticated])
+def camera_health(request, camera_id):
+    """
+    Stream health of one camera
+    
+    GET  /api/cameras/<id>/health/ - last recorded result
+    POST /api/cameras/<id>/health/ - probe the stream now
+    """
+    from .models import Camera
+    camera = get_object_or_404(Camera, id=camera_id, owner=request.user)
+    
+    if request.method == 'POST':
+        try:
+            # Default failure threshold, so one failed manual probe does not take the camera offline
+            probe_cameras([camera], timeout=5.0, log=lambda message: None)
+        except Exception as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    return Response({
+        'camera_id': camera.id,
+        'name': camera.name,
+        'is_active': camera.is_active,
+        'health': camera.health(),
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def delete_field(request, field_id):
@@ -390,9 +713,17 @@ def delete_camera(request, camera_id):
         location = camera.location
         
         # Delete camera and location
+        camera_data = {
+            'camera_id': camera.id,
+            'name': camera.name,
+            'is_active': False,
+            'change': 'deleted',
+        }
         camera.delete()
         location.delete()
         
+        get_event_bus().publish(user.id, 'camera.status', camera_data)
+        
         return Response({
             'message': 'Camera deleted successfully'
         }, status=status.HTTP_200_OK)
@@ -474,7 +805,7 @@ def login_user(request):
             )
         
         # Generate JWT tokens
-        refresh = RefreshToken.for_user(user)
+        tokens = issue_tokens(user)
         
         return Response({
             'message': 'Login successful',
@@ -482,10 +813,7 @@ def login_user(request):
                 'username': user.username,
                 'email': user.email,
             },
-            'tokens': {
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-            }
+            'tokens': tokens
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -508,6 +836,9 @@ def logout_user(request):
     try:
         refresh_token = request.data.get('refresh')
         
+        # Drop the cached user so the next request re-reads it
+        user_cache.invalidate(request.user.id)
+        
         if refresh_token:
             token = RefreshToken(refresh_token)
             token.blacklist()
@@ -523,6 +854,21 @@ def logout_user(request):
         )
 
 
+def _serialize_user_summary(user, profile):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'phone_number': profile.phone_number,
+        'farm_name': profile.farm_name,
+        'city': profile.primary_city,
+        'date_joined': user.date_joined.isoformat(),
+        'total_fields': profile.field_count,
+        'total_area': round(float(profile.total_area), 2),
+        'total_scans': profile.detection_count,
+    }
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_current_user(request):
@@ -530,32 +876,14 @@ def get_current_user(request):
     Get Current User Information
     GET /api/user/
     Headers: Authorization: Bearer <access_token>
+    
+    Counters come from the denormalized UserProfile summary (single-row read)
     """
     try:
         user = request.user
-        profile = UserProfile.objects.filter(user=user).first()
-        
-        # Count user's fields and total area
-        user_fields = Field.objects.filter(owner=user)
-        total_fields = user_fields.count()
-        total_area = sum([float(field.area_size) for field in user_fields if field.area_size])
-        
-        # Get city from first location if available
-        first_location = Location.objects.filter(user=user).first()
-        city = first_location.city if first_location else ''
+        profile, created = UserProfile.objects.get_or_create(user=user)
         
-        return Response({
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'phone_number': profile.phone_number if profile else '',
-            'farm_name': profile.farm_name if profile else '',
-            'city': city,
-            'date_joined': user.date_joined.isoformat(),
-            'total_fields': total_fields,
-            'total_area': round(total_area, 2) if total_area else 0,
-            'total_scans': 0,  # Placeholder - can be updated when disease scans tracking is implemented
-        }, status=status.HTTP_200_OK)
+        return Response(_serialize_user_summary(user, profile), status=status.HTTP_200_OK)
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -585,43 +913,25 @@ def update_user_profile(request):
         if 'email' in request.data:
             user.email = request.data.get('email', '')
             user.save()
+            user_cache.invalidate(user.id)
         
-        # Update profile fields
+        # Update profile fields (only these - summary counters are signal-maintained)
         if 'phone_number' in request.data:
             profile.phone_number = request.data.get('phone_number', '')
         if 'farm_name' in request.data:
             profile.farm_name = request.data.get('farm_name', '')
         
-        profile.save()
+        profile.save(update_fields=['phone_number', 'farm_name', 'updated_at'])
         
-        # Update city in first location if provided
+        # Update city on the farm location (refreshes profile.primary_city via signal)
         if 'city' in request.data:
-            first_location = Location.objects.filter(user=user).first()
-            if first_location:
-                first_location.city = request.data.get('city', '')
-                first_location.save()
-        
-        # Return updated user data
-        user_fields = Field.objects.filter(owner=user)
-        total_fields = user_fields.count()
-        total_area = sum([float(field.area_size) for field in user_fields if field.area_size])
+            farm_location = Location.objects.filter(user=user, location_type='farm').first()
+            if farm_location:
+                _, _, farm_location.city, farm_location.region = locate_city(request.data.get('city', ''))
+                farm_location.save()
+                profile.refresh_from_db(fields=['primary_city'])
         
-        # Get city from first location
-        first_location = Location.objects.filter(user=user).first()
-        city = first_location.city if first_location else ''
-        
-        return Response({
-            'id': user.id,
-            'username': user.username,
-            'email': user.email,
-            'phone_number': profile.phone_number,
-            'farm_name': profile.farm_name,
-            'city': city,
-            'date_joined': user.date_joined.isoformat(),
-            'total_fields': total_fields,
-            'total_area': round(total_area, 2) if total_area else 0,
-            'total_scans': 0,
-        }, status=status.HTTP_200_OK)
+        return Response(_serialize_user_summary(user, profile), status=status.HTTP_200_OK)
     except Exception as e:
         return Response(
             {'error': str(e)},
@@ -670,8 +980,14 @@ def change_password(request):
         user.set_password(new_password)
         user.save()
         
+        # Revoke all previously issued tokens; this session gets fresh ones
+        revoke_user_tokens(user)
+        
         return Response(
-            {'message': 'Password changed successfully'},
+            {
+                'message': 'Password changed successfully',
+                'tokens': issue_tokens(user)
+            },
             status=status.HTTP_200_OK
         )
     except Exception as e:
@@ -710,12 +1026,13 @@ def save_location(request):
             point = GEOSGeometry(json.dumps(point_data)) if point_data else None
             shape = GEOSGeometry(json.dumps(shape_data)) if shape_data else None
 
-            location = Location.objects.create(
+            location = fill_address(Location(
                 name=name,
                 point=point,
                 shape=shape,
                 user=user
-            )
+            ))
+            location.save()
             return JsonResponse({'status': 'success', 'location_id': location.id})
         except Exception as e:
             traceback.print_exc()
@@ -854,6 +1171,7 @@ def get_iot_sensors(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, BrowsableAPIRenderer, ColumnarJSONRenderer, PackedSeriesRenderer])
 def get_sensor_data(request, field_id):
     """
     Get sensor data for specific field
@@ -862,6 +1180,13 @@ def get_sensor_data(request, field_id):
     Query params:
         - sensor_type: temperature, soil_moisture, humidity, ph
         - hours: number of hours of history (default 24)
+    
+    Response layout is negotiated via the Accept header (or ?format=):
+        - application/json: one object per reading (default)
+        - application/vnd.novaterra.columnar+json: one delta-encoded
+          timestamps array and one values array per sensor type
+        - application/vnd.novaterra.columnar+binary: same columns packed
+          as int32 deltas / float32 values (see PackedSeriesRenderer)
     """
     try:
         sensor_type = request.query_params.get('sensor_type', 'all')
@@ -869,7 +1194,7 @@ def get_sensor_data(request, field_id):
         
         # Verify field ownership
         try:
-            field = Field.objects.get(id=field_id, location__farm__user=request.user)
+            field = Field.objects.select_related('location').get(id=field_id, owner=request.user)
         except Field.DoesNotExist:
             return Response({
                 'error': 'Field not found or access denied'
@@ -877,47 +1202,141 @@ def get_sensor_data(request, field_id):
         
         # Mock sensor data for now
         # In production, this will query MongoDB time-series data
-        from datetime import timedelta
         import random
         
+        sensor_types = [
+            s for s in ['temperature', 'soil_moisture', 'humidity']
+            if sensor_type in [s, 'all']
+        ]
+        mock_ranges = {
+            'temperature': (20, -3, 8),
+            'soil_moisture': (60, -10, 15),
+            'humidity': (65, -10, 20),
+        }
+        
         now = timezone.now()
-        readings = []
+        timestamps = [now - timedelta(hours=hours-i) for i in range(hours)]
+        series = {
+            s: [
+                round(mock_ranges[s][0] + random.uniform(mock_ranges[s][1], mock_ranges[s][2]), 1)
+                for _ in timestamps
+            ]
+            for s in sensor_types
+        }
         
-        for i in range(hours):
-            timestamp = now - timedelta(hours=hours-i)
-            
-            if sensor_type in ['temperature', 'all']:
+        response_data = {
+            'field_id': field_id,
+            'field_name': field.location.name,
+            'sensor_type': sensor_type,
+            'total_readings': len(timestamps) * len(series),
+        }
+        
+        if request.accepted_renderer.format in ['columnar', 'packed']:
+            response_data.update(build_columnar_series(timestamps, series))
+            return Response(response_data, status=status.HTTP_200_OK)
+        
+        readings = []
+        for i, timestamp in enumerate(timestamps):
+            for s in sensor_types:
                 readings.append({
-                    'sensor_type': 'temperature',
-                    'value': round(20 + random.uniform(-3, 8), 1),
-                    'unit': '°C',
+                    'sensor_type': s,
+                    'value': series[s][i],
+                    'unit': SENSOR_UNITS[s],
                     'timestamp': timestamp.isoformat()
                 })
+        
+        response_data['readings'] = readings
+        return Response(response_data, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def ingest_sensor_readings(request):
+    """
+    Ingest IoT sensor readings for a field
+    
+    POST /api/iot/readings/
+    Body: {
+        "field_id": 1,
+        "readings": [
+            {"sensor_type": "soil_moisture", "value": 41.5, "timestamp": "2026-10-19T08:00:00Z"}
+        ]
+    }
+    timestamp is optional (defaults to now). Each stored reading is pushed
+    to the user's live event stream as a "sensor.reading" event.
+    """
+    try:
+        field_id = request.data.get('field_id')
+        raw_readings = request.data.get('readings') or []
+        
+        if not field_id or not raw_readings:
+            return Response({
+                'error': 'field_id and readings are required'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            field = Field.objects.select_related('location').get(id=field_id, owner=request.user)
+        except Field.DoesNotExist:
+            return Response({
+                'error': 'Field not found or access denied'
+            }, status=status.HTTP_404_NOT_FOUND)
+        
+        valid_types = dict(SensorReading.SENSOR_TYPE_CHOICES)
+        now = timezone.now()
+        readings = []
+        for item in raw_readings:
+            sensor_type = item.get('sensor_type')
+            if sensor_type not in valid_types:
+                return Response({
+                    'error': f'Unknown sensor_type: {sensor_type}'
+                }, status=status.HTTP_400_BAD_REQUEST)
             
-            if sensor_type in ['soil_moisture', 'all']:
-                readings.append({
-                    'sensor_type': 'soil_moisture',
-                    'value': round(60 + random.uniform(-10, 15), 1),
-                    'unit': '%',
-                    'timestamp': timestamp.isoformat()
-                })
+            recorded_at = parse_datetime(item['timestamp']) if item.get('timestamp') else now
+            if recorded_at is None:
+                return Response({
+                    'error': f"Invalid timestamp: {item.get('timestamp')}"
+                }, status=status.HTTP_400_BAD_REQUEST)
             
-            if sensor_type in ['humidity', 'all']:
-                readings.append({
-                    'sensor_type': 'humidity',
-                    'value': round(65 + random.uniform(-10, 20), 1),
-                    'unit': '%',
-                    'timestamp': timestamp.isoformat()
-                })
+            readings.append(SensorReading(
+                field=field,
+                sensor_type=sensor_type,
+                value=float(item['value']),
+                recorded_at=recorded_at,
+            ))
+        
+        SensorReading.objects.bulk_create(readings)
+        
+        # Threshold / rate / anomaly rules, evaluated incrementally
+        recommendations = get_rule_engine().process(field, readings)
+        
+        event_bus = get_event_bus()
+        for reading in readings:
+            event_bus.publish(request.user.id, 'sensor.reading', {
+                'field_id': field.id,
+                'sensor_type': reading.sensor_type,
+                'value': reading.value,
+                'unit': SENSOR_UNITS[reading.sensor_type],
+                'timestamp': reading.recorded_at.isoformat(),
+            })
+        for recommendation in recommendations:
+            event_bus.publish(request.user.id, 'recommendation.created', _serialize_recommendation(recommendation))
         
         return Response({
-            'field_id': field_id,
-            'field_name': field.name,
-            'sensor_type': sensor_type,
-            'readings': readings,
-            'total_readings': len(readings)
-        }, status=status.HTTP_200_OK)
+            'message': 'Readings stored',
+            'field_id': field.id,
+            'total': len(readings),
+            'recommendations': len(recommendations)
+        }, status=status.HTTP_201_CREATED)
         
+    except (KeyError, TypeError, ValueError) as e:
+        return Response({
+            'error': f'Invalid reading: {str(e)}'
+        }, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         return Response({
             'error': str(e)
@@ -928,6 +1347,33 @@ def get_sensor_data(request, field_id):
 # AI Advisor API Views
 # ========================
 
+def _serialize_indicator(indicator):
+    return {
+        'field_id': indicator.field_id,
+        'date': indicator.date.isoformat(),
+        'tmin': indicator.tmin,
+        'tmax': indicator.tmax,
+        'gdd': indicator.gdd,
+        'et0': indicator.et0,
+        'leaf_wetness_hours': indicator.leaf_wetness_hours,
+        'fungal_risk': indicator.fungal_risk,
+    }
+
+
+def _serialize_recommendation(recommendation):
+    return {
+        'id': recommendation.id,
+        'kind': recommendation.kind,
+        'category': recommendation.category,
+        'priority': recommendation.priority,
+        'title': recommendation.title,
+        'description': recommendation.description,
+        'field_ids': [recommendation.field_id] if recommendation.field_id else [],
+        'confidence': recommendation.confidence,
+        'created_at': recommendation.created_at.isoformat()
+    }
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_ai_recommendations(request):
@@ -935,51 +1381,39 @@ def get_ai_recommendations(request):
     Get AI-powered farming recommendations
     
     GET /api/advisor/recommendations/
+    Query params:
+        - kind: recommendation or alert (default: both)
+        - limit: max number of results (default 50, max 200)
+    
+    Recommendations and alerts are produced by the sensor rule engine
+    (novaterra.services.rule_engine) as readings are ingested and by the
+    nightly batch job (manage.py precompute_recommendations).
     """
     try:
-        # Mock recommendations for now
-        # In production, this will use ML models based on:
-        # - Current weather conditions
-        # - Soil sensor data
-        # - Historical yield data
-        # - Disease patterns
-        
-        recommendations = [
-            {
-                'id': 1,
-                'category': 'irrigation',
-                'priority': 'high',
-                'title': 'Irrigation Recommended',
-                'description': 'Soil moisture levels are below optimal. Consider irrigating within the next 24 hours.',
-                'field_ids': [1, 2],
-                'confidence': 0.87,
-                'created_at': timezone.now().isoformat()
-            },
-            {
-                'id': 2,
-                'category': 'disease_prevention',
-                'priority': 'medium',
-                'title': 'Apply Preventive Fungicide',
-                'description': 'Weather conditions favorable for fungal diseases. Preventive application recommended.',
-                'field_ids': [1],
-                'confidence': 0.72,
-                'created_at': timezone.now().isoformat()
-            },
-            {
-                'id': 3,
-                'category': 'harvest',
-                'priority': 'low',
-                'title': 'Optimal Harvest Window',
-                'description': 'Weather forecast shows 5 days of dry conditions. Good window for harvesting.',
-                'field_ids': [3],
-                'confidence': 0.91,
-                'created_at': timezone.now().isoformat()
-            }
-        ]
+        kind = request.query_params.get('kind')
+        try:
+            limit = min(int(request.query_params.get('limit', 50)), 200)
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit must be at least 1'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        recommendations = Recommendation.objects.filter(user=request.user, is_active=True)
+        if kind:
+            recommendations = recommendations.filter(kind=kind)
+        
+        recommendations = [_serialize_recommendation(r) for r in recommendations[:limit]]
+        
+        # Today's precomputed indicators (manage.py compute_indicators)
+        indicators = FieldIndicator.objects.filter(
+            field__owner=request.user,
+            date=timezone.now().date()
+        )
         
         return Response({
             'recommendations': recommendations,
-            'total': len(recommendations)
+            'total': len(recommendations),
+            'indicators': [_serialize_indicator(i) for i in indicators]
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
@@ -988,6 +1422,30 @@ def get_ai_recommendations(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def refresh_ai_recommendations(request):
+    """
+    Recompute batch recommendations for the user's fields now
+    (the nightly precompute_recommendations job does this for everyone)
+    
+    POST /api/advisor/recommendations/refresh/
+    """
+    try:
+        total = refresh_user_recommendations(request.user)
+        
+        return Response({
+            'message': 'Recommendations refreshed',
+            'total': total
+        }, status=status.HTTP_200_OK)
+        
+    except Exception as e:
+        traceback.print_exc()
+        return Response({
+            'error': str(e)
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def get_crop_suggestions(request):
@@ -996,84 +1454,66 @@ def get_crop_suggestions(request):
     
     POST /api/advisor/crop-suggestions/
     Body:
-        - field_id: ID of field
+        - field_id: ID of field (defaults to the farm location)
         - soil_type: (optional) sandy, clay, loam
         - season: (optional) spring, summer, fall, winter
+        - limit: (optional) number of suggestions (default 3)
+    
+    Crops are scored against the regional climate normals grid cell of the
+    field centroid (see services/crop_suitability.py).
     """
     try:
         field_id = request.data.get('field_id')
         soil_type = request.data.get('soil_type', 'loam')
         season = request.data.get('season', 'spring')
+        try:
+            limit = int(request.data.get('limit', 3))
+        except (TypeError, ValueError):
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit must be at least 1'}, status=status.HTTP_400_BAD_REQUEST)
         
         # Verify field ownership if provided
+        indicators = []
         if field_id:
             try:
-                field = Field.objects.get(id=field_id, location__farm__user=request.user)
+                field = Field.objects.select_related('location').get(id=field_id, owner=request.user)
             except Field.DoesNotExist:
                 return Response({
                     'error': 'Field not found or access denied'
                 }, status=status.HTTP_404_NOT_FOUND)
+            
+            location = field.location
+            indicators = [
+                _serialize_indicator(i)
+                for i in field.indicators.filter(date__gte=timezone.now().date())
+            ]
+        else:
+            location = Location.objects.filter(user=request.user, location_type='farm').first()
+        
+        if location and location.point:
+            latitude, longitude = location.latitude, location.longitude
+        else:
+            latitude, longitude = DEFAULT_COORDINATES  # Default to Tunisia center
         
-        # Mock crop suggestions
-        # In production, this will use ML model trained on:
-        # - Soil analysis data
-        # - Climate conditions
-        # - Historical yields
-        # - Market prices
-        
-        suggestions = [
-            {
-                'crop': 'Tomato',
-                'suitability_score': 0.92,
-                'estimated_yield': '45-55 tons/hectare',
-                'growing_season': '90-120 days',
-                'water_requirements': 'Medium-High',
-                'market_price': 'High',
-                'reasons': [
-                    'Excellent soil conditions',
-                    'Optimal temperature range',
-                    'High market demand',
-                    'Good disease resistance varieties available'
-                ]
-            },
-            {
-                'crop': 'Wheat',
-                'suitability_score': 0.78,
-                'estimated_yield': '3-4 tons/hectare',
-                'growing_season': '120-150 days',
-                'water_requirements': 'Low-Medium',
-                'market_price': 'Stable',
-                'reasons': [
-                    'Good for crop rotation',
-                    'Low water requirements',
-                    'Stable market prices'
-                ]
-            },
-            {
-                'crop': 'Olives',
-                'suitability_score': 0.85,
-                'estimated_yield': '2-3 tons/hectare',
-                'growing_season': 'Perennial',
-                'water_requirements': 'Low',
-                'market_price': 'High',
-                'reasons': [
-                    'Well-suited to local climate',
-                    'Drought resistant',
-                    'High value crop',
-                    'Long-term investment'
-                ]
-            }
-        ]
+        try:
+            suggestions, climate = suggest_crops(latitude, longitude, soil_type, season, limit)
+        except ValueError as e:
+            return Response({
+                'error': str(e)
+            }, status=status.HTTP_400_BAD_REQUEST)
         
         return Response({
             'field_id': field_id,
             'soil_type': soil_type,
             'season': season,
+            'climate': climate,
             'suggestions': suggestions,
-            'total': len(suggestions)
+            'total': len(suggestions),
+            'indicators': indicators
         }, status=status.HTTP_200_OK)
         
     except Exception as e:
         return Response({
             'error': str(e)
-        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+        }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)